@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+    concurrency_benchmark.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Measures aggregate throughput as the number of concurrent jobs grows. For each job count,
+        that many copies of a video are processed at once through one shared model, as the API runs
+        them, first with the library default thread counts and then with CPU budgets from
+        lab_monitor.resources. Aggregate frames per second should keep rising with the job count
+        when budgeted, rather than falling from oversubscription.
+
+        Usage:
+            python experiments/concurrency_benchmark.py --video data/uploads/clip.mp4 --max-jobs 4 \
+                --seconds 20 --output data/concurrency_benchmark.jsonl
+
+    Change History:
+        0.1: Created.
+"""
+import argparse
+from contextlib import nullcontext
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_jobs(video_path: str, jobs: int, seconds: float, scheduler, resources, work_dir: str) -> dict:
+    """
+        Processes the video jobs times at once in log-only mode.
+    Args:
+        video_path (str): Video to process.
+        jobs (int): Concurrent copies.
+        seconds (float): Length of video each job processes.
+        scheduler (InferenceScheduler): Scheduler holding the loaded model.
+        resources (ResourceManager, optional): Budgets each job's thread, library defaults when None.
+        work_dir (str): Directory for the jobs' logs.
+    Returns:
+        dict: Frames processed, wall seconds and aggregate frames per second.
+    """
+    from lab_monitor.pipeline import process_video  # pylint: disable=C0415
+
+    def run(index):
+        job_id = f"job{index}"
+        network = scheduler.client(job_id)
+        try:
+            with resources.job(job_id) if resources else nullcontext():
+                process_video(video_path, os.devnull, os.path.join(work_dir, f"{job_id}.csv"),
+                              output_mode="log_only", end_time=seconds, network=network)
+        finally:
+            network.close()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(jobs)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    frames = 0
+    for index in range(jobs):
+        with open(os.path.join(work_dir, f"job{index}_detections.ndjson"), "r", encoding="utf-8") as f:
+            frames += sum(1 for _ in f)
+    return {"frames": frames, "seconds": round(elapsed, 2), "aggregate_fps": round(frames / elapsed, 2)}
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark throughput against the number of concurrent jobs.")
+    parser.add_argument("--video", required=True, help="Video to process.")
+    parser.add_argument("--max-jobs", type=int, default=4, help="Largest number of concurrent jobs.")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of video each job processes.")
+    parser.add_argument("--pin", action="store_true", help="Also pin budgeted jobs and the model to their cores.")
+    parser.add_argument("--output", help="JSON lines file to append the results to.")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT / "src"))
+    import cv2  # pylint: disable=C0415
+    from lab_monitor.inference_scheduler import InferenceScheduler  # pylint: disable=C0415
+    from lab_monitor.resources import ResourceManager, available_cores  # pylint: disable=C0415
+
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait_ms=10.0)
+    scheduler.load_network()
+    results = []
+    for jobs in range(1, args.max_jobs + 1):
+        for budgeted in (False, True):
+            resources = ResourceManager(scheduler, pin=args.pin) if budgeted else None
+            if not budgeted:
+                # Library defaults, every core for torch and OpenCV
+                scheduler.set_num_threads(len(available_cores()))
+                cv2.setNumThreads(-1)
+            with tempfile.TemporaryDirectory() as work_dir:
+                result = {"jobs": jobs, "budgeted": budgeted, "pinned": budgeted and args.pin,
+                          **run_jobs(args.video, jobs, args.seconds, scheduler, resources, work_dir)}
+            results.append(result)
+            print(json.dumps(result))
+    scheduler.stop()
+
+    if args.output:
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        with open(args.output, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps({"timestamp": timestamp, **result}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
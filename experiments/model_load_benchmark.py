@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+    model_load_benchmark.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Measures model cold-start time, each run in a fresh interpreter: loading the original
+        checkpoint with GroundingDINO's load_model (full unpickle), against DinoProcess.load_model
+        memory-mapping the checkpoint converted by lab_monitor.weights. The checkpoint is converted
+        first if needed. The page cache is warm after the first run, so the first run of each mode
+        shows the true cold start.
+
+        Usage:
+            python experiments/model_load_benchmark.py --config <GroundingDINO_SwinT_OGC.py> \
+                --checkpoint weights/groundingdino_swint_ogc.pth --runs 3
+
+    Change History:
+        0.1: Created.
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+LOAD_CODE = {
+    "pickle": (
+        "import time; start = time.perf_counter(); "
+        "from groundingdino.util.inference import load_model; "
+        "load_model({config!r}, {checkpoint!r}, device='cpu'); print(time.perf_counter() - start)"
+    ),
+    "mmap": (
+        "import time; start = time.perf_counter(); "
+        "from lab_monitor.dino_functions import DinoProcess; "
+        "DinoProcess(device='cpu').load_model({config!r}, {checkpoint!r}); print(time.perf_counter() - start)"
+    ),
+}
+
+
+def time_load(mode: str, config: str, checkpoint: str) -> float:
+    """
+        Loads the model in a fresh interpreter.
+    Returns:
+        float: Seconds from the first import to the loaded model.
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT / "src"), os.environ.get("PYTHONPATH", "")])}
+    result = subprocess.run([sys.executable, "-c", LOAD_CODE[mode].format(config=config, checkpoint=checkpoint)],
+                            env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark model cold-start time.")
+    parser.add_argument("--config", required=True, help="GroundingDINO config path.")
+    parser.add_argument("--checkpoint", required=True, help="Original .pth checkpoint.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs of each mode.")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT / "src"))
+    from lab_monitor.weights import convert_checkpoint, converted_path  # pylint: disable=C0415
+    if not os.path.exists(converted_path(args.checkpoint)):
+        convert_checkpoint(args.checkpoint)
+
+    result = {}
+    for mode in LOAD_CODE:
+        runs = [time_load(mode, args.config, args.checkpoint) for _ in range(args.runs)]
+        result[mode] = {"first_s": round(runs[0], 3), "median_s": round(statistics.median(runs), 3)}
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -63,9 +63,8 @@ with tqdm(total=frame_count, desc="Processing video", unit="frame") as pbar:
         for box, phrase in zip(boxes, phrases):
             detected_objects.setdefault(phrase.lower(), []).append(box)
         event_tracker.update(frame_number, detected_objects)
-        # Annotate the frame with detected objects
-        bgr_annotated = cv2.cvtColor(annotated, cv2.COLOR_RGB2BGR)
-        out.write(bgr_annotated)  # Save the undistorted frame
+        # annotate_image draws onto the BGR frame in place
+        out.write(annotated)  # Save the annotated frame
         ret, frame = cap.read()
         frame_number += 1
         pbar.update(1)
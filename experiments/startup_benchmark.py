@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+    startup_benchmark.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Measures how long the API takes to start: the cold import time of main.py in a fresh
+        interpreter, and the time from launching uvicorn to the first answered request. Also
+        reports whether torch or GroundingDINO were imported at startup, which they should not be.
+        Each run can be appended to a JSON lines file to track startup time across changes.
+
+        Usage:
+            python experiments/startup_benchmark.py --runs 5 --output data/startup_benchmark.jsonl
+
+    Change History:
+        0.1: Created.
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("torch", "groundingdino", "PIL")
+IMPORT_CODE = (
+    "import sys, time; start = time.perf_counter(); import main; "
+    f"print(time.perf_counter() - start); print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def _env() -> dict:
+    """
+        Environment for child interpreters, with the repository and src importable.
+    """
+    path = os.pathsep.join([str(ROOT), str(ROOT / "src"), os.environ.get("PYTHONPATH", "")])
+    return {**os.environ, "PYTHONPATH": path}
+
+
+def time_import() -> tuple:
+    """
+        Imports main.py in a fresh interpreter.
+    Returns:
+        tuple: (seconds, heavy modules that were imported)
+    """
+    result = subprocess.run([sys.executable, "-c", IMPORT_CODE], cwd=ROOT, env=_env(),
+                            capture_output=True, text=True, check=True)
+    seconds, loaded = result.stdout.strip().splitlines()[-2:]
+    return float(seconds), [name for name in loaded.split(",") if name]
+
+
+def time_first_response(port: int, path: str = "/profiles", timeout: float = 60.0) -> float:
+    """
+        Launches uvicorn and polls until a request is answered.
+    Args:
+        port (int): Port to serve on.
+        path (str): Lightweight endpoint to request.
+        timeout (float): Seconds to wait for the first response.
+    Returns:
+        float: Seconds from launch to the first response.
+    """
+    start = time.perf_counter()
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)]
+    server = subprocess.Popen(command, cwd=ROOT, env=_env(),  # pylint: disable=R1732
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before answering.")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1.0):
+                    return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError(f"No response within {timeout} seconds.")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark API startup time.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs of each measurement, the median is reported.")
+    parser.add_argument("--port", type=int, default=8011, help="Port for the time to first response runs.")
+    parser.add_argument("--output", help="JSON lines file to append the result to.")
+    args = parser.parse_args(argv)
+
+    imports = [time_import() for _ in range(args.runs)]
+    responses = [time_first_response(args.port) for _ in range(args.runs)]
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "import_s": round(statistics.median(seconds for seconds, _ in imports), 3),
+        "first_response_s": round(statistics.median(responses), 3),
+        "heavy_modules": sorted({name for _, loaded in imports for name in loaded}),
+    }
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@
 
     Created: 25/06/2025
 
-    Version: 0.1
+    Version: 0.20
 
     Description:
         hosts a fastapi server that allows users to upload a video, track processing progress,
@@ -16,84 +16,419 @@
 
     Change History:
         0.1: Created.
+        0.2: Added fill level time series download.
+        0.3: Added video encoder selection on upload.
+        0.4: Added log-only output mode and detections download.
+        0.5: Jobs are persisted and checkpointed, unfinished jobs resume when the server restarts.
+        0.6: Uploads are indexed for accurate progress and ETA, and a time window can be processed.
+        0.7: Events from every job are stored in an indexed database with query and count endpoints.
+        0.8: Event thumbnails and optional clips can be listed and downloaded.
+        0.9: Detections are always kept and annotated video can be rendered on demand for a time range.
+        0.10: Each job selects a camera calibration profile, whose maps are shared between processes.
+        0.11: Jobs share one model through a dynamic batching scheduler, with latency stats.
+        0.12: Jobs can send frames to a standalone model server set with LAB_MONITOR_MODEL_SERVER.
+        0.13: Uploads, outputs and logs are kept within disk budgets, evicting the least recently downloaded.
+        0.14: Added still image detection, awaited without blocking and batched with concurrent requests.
+        0.15: Jobs can be cancelled, and run by priority with lower priority jobs preempted and resumed later.
+        0.16: The CPU cores are budgeted between running jobs and the shared model.
+        0.17: Detections of recurring frames are cached by perceptual hash, with hit rate in the stats.
+        0.18: Media downloads only serve known jobs.
+        0.19: The detection cache is off unless LAB_MONITOR_DETECTION_CACHE is set.
+        0.20: Upload encoder settings are validated, and uploads are indexed before they are queued.
+            Event media, renders, checkpoints and job manifests are budgeted too, and job status reports
+            the job's storage.
 """
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from uuid import uuid4
 from pathlib import Path
+from typing import Optional
+import json
+import os
 import shutil
-import threading
+import time
+import cv2
+import numpy as np
 
-from lab_monitor.pipeline import process_video
+from lab_monitor.async_inference import BoundedExecutor, ExecutorBusy
+from lab_monitor.calibration import DEFAULT_PROFILE, list_profiles
+from lab_monitor.checkpoint import JobCheckpoint
+from lab_monitor.detection_cache import DetectionCache
+from lab_monitor.detections import format_detections
+from lab_monitor.event_media import media_name
+from lab_monitor.event_store import GROUP_COLUMNS, EventStore
+from lab_monitor.inference_scheduler import InferenceScheduler
+from lab_monitor.job_queue import CANCEL, PRIORITIES, JobControl, JobQueue
+from lab_monitor.model_client import ModelServerClient
+from lab_monitor.pipeline import OUTPUT_MODES, JobStopped, process_video
+from lab_monitor.render import RenderCache, render_range
+from lab_monitor.resources import ResourceManager
+from lab_monitor.storage import StorageBudget, StorageManager
+from lab_monitor.video_index import VideoIndex
+from lab_monitor.video_writers import VIDEO_BACKENDS, validate_encoder_settings
 
 # Define project directories
 DATA_DIR = Path("data")
 UPLOAD_DIR = DATA_DIR / "uploads"
 OUTPUT_DIR = DATA_DIR / "outputs"
 LOG_DIR = DATA_DIR / "logs"
+JOBS_DIR = DATA_DIR / "jobs"
+CHECKPOINT_DIR = DATA_DIR / "checkpoints"
+MEDIA_DIR = DATA_DIR / "media"
+CALIBRATION_DIR = DATA_DIR / "calibration"
+# Length of the clips saved around each event for jobs uploaded with clips=true
+CLIP_SECONDS = 4.0
+RENDER_DIR = DATA_DIR / "renders"
+# Longest time range that can be rendered on demand, in seconds
+MAX_RENDER_SECONDS = 120.0
 PROGRESS = {}
+JOBS = {}
+# Job id to (monotonic start time, progress at start) of the current run, for the ETA
+STARTED = {}
+GB = 1024 ** 3
+DAY = 24 * 60 * 60
+# Size and age budgets per directory, artifacts are evicted least recently downloaded first.
+# Job manifests are kept as long as the longest lived artifacts, so a job's files stay reachable.
+STORAGE_BUDGETS = {
+    UPLOAD_DIR: StorageBudget(max_bytes=50 * GB, max_age_seconds=30 * DAY),
+    OUTPUT_DIR: StorageBudget(max_bytes=50 * GB, max_age_seconds=30 * DAY),
+    LOG_DIR: StorageBudget(max_bytes=5 * GB, max_age_seconds=90 * DAY),
+    MEDIA_DIR: StorageBudget(max_bytes=20 * GB, max_age_seconds=30 * DAY),
+    RENDER_DIR: StorageBudget(max_bytes=10 * GB, max_age_seconds=7 * DAY),
+    CHECKPOINT_DIR: StorageBudget(max_bytes=1 * GB, max_age_seconds=30 * DAY),
+    JOBS_DIR: StorageBudget(max_age_seconds=90 * DAY),
+}
+# Uploads are refused when they would leave less free disk space than this
+MIN_FREE_BYTES = 5 * GB
+# Seconds between background eviction passes
+EVICTION_INTERVAL = 300.0
+# Jobs processed at once, further jobs wait by priority and may preempt lower priority running jobs
+MAX_RUNNING_JOBS = 2
+# Statuses of jobs that are still to finish, preempted jobs wait in the queue to resume
+ACTIVE_STATUSES = ("queued", "running", "preempted")
 
 # Ensure directories exist
-for directory in [UPLOAD_DIR, OUTPUT_DIR, LOG_DIR]:
+for directory in [UPLOAD_DIR, OUTPUT_DIR, LOG_DIR, JOBS_DIR, CHECKPOINT_DIR, MEDIA_DIR, RENDER_DIR, CALIBRATION_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
+EVENTS = EventStore(DATA_DIR / "events.db")
+RENDERS = RenderCache(RENDER_DIR)
+# Set LAB_MONITOR_DETECTION_CACHE to a number of frames to reuse the detections of recurring frames,
+# e.g. an idle bench, for frames that look the same. Off by default.
+DETECTION_CACHE_ENTRIES = int(os.environ.get("LAB_MONITOR_DETECTION_CACHE", "0"))
+DETECTION_CACHE = DetectionCache(max_entries=DETECTION_CACHE_ENTRIES) if DETECTION_CACHE_ENTRIES > 0 else None
+# One model shared by every job, frames from concurrent jobs are batched together
+SCHEDULER = InferenceScheduler(max_batch_size=8, max_wait_ms=10.0, detection_cache=DETECTION_CACHE)
+# Address of a standalone model server (python -m lab_monitor.model_server), which then holds the
+# model instead of this process
+MODEL_SERVER = os.environ.get("LAB_MONITOR_MODEL_SERVER")
+# Threads waiting on the model server for /detect, only used when MODEL_SERVER is set
+DETECT_EXECUTOR = BoundedExecutor(max_workers=4, max_pending=64, name="detect")
+# Share of the CPU cores for the running jobs' decoding and encoding, the shared model gets the rest
+JOB_CPU_SHARE = 0.25
+# Set LAB_MONITOR_PIN_CPUS=1 to pin each job and the model to their own cores (Linux only)
+RESOURCES = ResourceManager(None if MODEL_SERVER else SCHEDULER, job_share=JOB_CPU_SHARE,
+                            pin=os.environ.get("LAB_MONITOR_PIN_CPUS") == "1")
+
+
+def save_job(job_id: str, **changes) -> None:
+    """
+        Updates a job and writes its manifest, so the job survives a server restart.
+    Args:
+        job_id (str): Job to update.
+        **changes: Fields to set on the job, e.g. status.
+    """
+    job = JOBS.setdefault(job_id, {})
+    job.update(changes)
+    with open(JOBS_DIR / f"{job_id}.json", "w", encoding="utf-8") as f:
+        json.dump(job, f)
+
+
+def active_jobs() -> list:
+    """
+        Returns the ids of jobs that are queued or running, whose artifacts must not be evicted.
+    """
+    return [job_id for job_id, job in list(JOBS.items()) if job.get("status") in ACTIVE_STATUSES]
+
+
+STORAGE = StorageManager(STORAGE_BUDGETS, min_free_bytes=MIN_FREE_BYTES, active_jobs=active_jobs)
+
+
+def index_path(job_id: str) -> str:
+    """
+        Returns the path of an upload's keyframe index.
+    """
+    return str(UPLOAD_DIR / f"{job_id}.index.json")
+
+
+def remove_job_files(job_id: str) -> None:
+    """
+        Removes everything a job has written, and its upload, e.g. once it is cancelled.
+    """
+    for directory in (UPLOAD_DIR, OUTPUT_DIR, LOG_DIR, CHECKPOINT_DIR):
+        for path in directory.glob(f"{job_id}*"):
+            if path.is_file():
+                path.unlink(missing_ok=True)
+    shutil.rmtree(MEDIA_DIR / job_id, ignore_errors=True)
+    EVENTS.delete_job(job_id)
+
+
+def run_job(job_id: str, control: JobControl) -> bool:
+    """
+        Runs a job on its share of the CPU cores until it finishes or its control stops it. The job
+        checkpoints as it goes, so a job that was interrupted or preempted carries on from its last
+        checkpoint. A cancelled job's files are removed.
+    Args:
+        job_id (str): Job to run, its options are read from JOBS.
+        control (JobControl): Checked between frames.
+    Returns:
+        bool: True if the job stopped before finishing.
+    """
+    job = JOBS[job_id]
+
+    def report_progress(progress):
+        STARTED.setdefault(job_id, (time.monotonic(), progress))
+        PROGRESS[job_id] = progress
+
+    save_job(job_id, status="running")
+    STARTED.pop(job_id, None)
+    checkpoint_path = CHECKPOINT_DIR / f"{job_id}.json"
+    # Events after the last checkpoint will be emitted again when the job resumes
+    EVENTS.delete_job(job_id, from_frame=(JobCheckpoint(str(checkpoint_path)).load() or {}).get("frame_number", 0))
+    priority = PRIORITIES[job.get("priority", "normal")]
+    network = ModelServerClient(MODEL_SERVER) if MODEL_SERVER else SCHEDULER.client(job_id, priority)
+    try:
+        with RESOURCES.job(job_id):
+            process_video(
+                str(UPLOAD_DIR / f"{job_id}.mp4"),
+                str(OUTPUT_DIR / f"{job_id}.mp4"),
+                str(LOG_DIR / f"{job_id}.csv"),
+                report_progress,
+                fill_log_path=str(LOG_DIR / f"{job_id}_fill.csv"),
+                encoder_settings=job["encoder_settings"],
+                output_mode=job["output_mode"],
+                detections_path=str(LOG_DIR / f"{job_id}_detections.ndjson"),
+                checkpoint_path=str(checkpoint_path),
+                index_path=index_path(job_id),
+                start_time=job.get("start_time"),
+                end_time=job.get("end_time"),
+                event_callback=lambda frame, timestamp, action: EVENTS.add(job_id, frame, timestamp, action),
+                media_dir=str(MEDIA_DIR / job_id),
+                clip_seconds=CLIP_SECONDS if job.get("clips") else None,
+                camera_profile=job.get("camera_profile", DEFAULT_PROFILE),
+                calibration_dir=str(CALIBRATION_DIR),
+                network=network,
+                should_stop=control.should_stop
+            )
+    except JobStopped:
+        if control.reason == CANCEL:
+            remove_job_files(job_id)
+            save_job(job_id, status="cancelled")
+        else:
+            save_job(job_id, status="preempted")
+        return True
+    except Exception:
+        save_job(job_id, status="failed")
+        raise
+    finally:
+        network.close()
+    save_job(job_id, status="complete")
+    PROGRESS[job_id] = 100  # Mark as complete
+    return False
+
+
+JOB_QUEUE = JobQueue(run_job, max_running=MAX_RUNNING_JOBS)
+
+
+def start_job(job_id: str) -> None:
+    """
+        Queues a job to run on a background thread, by its priority.
+    Args:
+        job_id (str): Job to run, its options are read from JOBS.
+    """
+    JOB_QUEUE.submit(job_id, PRIORITIES[JOBS[job_id].get("priority", "normal")])
+
+
+def resume_jobs() -> None:
+    """
+        Restarts every job that was queued, running or preempted when the server last stopped.
+    """
+    for manifest in sorted(JOBS_DIR.glob("*.json")):
+        with open(manifest, "r", encoding="utf-8") as f:
+            job = json.load(f)
+        job_id = manifest.stem
+        JOBS[job_id] = job
+        PROGRESS[job_id] = 100 if job.get("status") == "complete" else 0
+        if job.get("status") in ACTIVE_STATUSES:
+            start_job(job_id)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+        Resumes unfinished jobs on startup and evicts old artifacts in the background while running.
+    """
+    resume_jobs()
+    STORAGE.start(EVICTION_INTERVAL)
+    yield
+    STORAGE.stop()
+
+
 # Create FastAPI app with custom metadata
 app = FastAPI(
     title="Lab Monitor Video Processing API",
     description="Upload a video, track processing progress, and download results (annotated video and log).",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 
 @app.post("/upload/", summary="Upload a video for processing")
-async def upload_video(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
+async def upload_video(file: UploadFile = File(...), background_tasks: BackgroundTasks = None,
+                       encoder: str = "auto", codec: str = "libx264", crf: int = 23, preset: str = "veryfast",
+                       output_mode: str = "video",
+                       start_time: Optional[float] = None, end_time: Optional[float] = None, clips: bool = False,
+                       camera_profile: str = DEFAULT_PROFILE, priority: str = "normal"):
     """
         Upload a video file and begin background processing.
         Returns a `job_id` to track progress and retrieve results.
+
+        The annotated video is encoded with `encoder` (auto, ffmpeg, pyav or opencv), using the given
+        `codec` (libx264 or libx265), `crf` (0 to 51) and speed `preset` (ultrafast to veryslow) where
+        the encoder supports them.
+        With `output_mode=log_only` no video is rendered and only the logs and per-frame detections are
+        produced, annotated video can then be rendered for just the parts needed with `/render/{job_id}`.
+        Jobs are checkpointed while they run and resume if the server is restarted.
+        The upload is indexed before it is queued, and rejected if it cannot be read as a video.
+        Set `start_time` and/or `end_time` (seconds) to only process part of a long video.
+        A thumbnail is saved for every event, set `clips=true` to also save a few seconds of video around each.
+        Lens correction uses the camera calibration profile `camera_profile`, see `/profiles`.
+        Jobs run a few at a time by `priority` (low, normal or high). A job uploaded when every slot is
+        taken preempts a lower priority running job, which resumes from where it stopped once a slot is free.
+        Returns 507 if there is not enough disk space for the upload, see `/storage`.
     """
+    if output_mode not in OUTPUT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown output mode, expected one of {', '.join(OUTPUT_MODES)}.")
+    if encoder not in VIDEO_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown encoder, expected one of {', '.join(VIDEO_BACKENDS)}.")
+    if (start_time is not None and start_time < 0) or \
+            (start_time is not None and end_time is not None and end_time <= start_time):
+        raise HTTPException(status_code=400, detail="end_time must be after start_time, and start_time not negative.")
+    if camera_profile not in list_profiles(str(CALIBRATION_DIR)):
+        raise HTTPException(status_code=400, detail="Unknown camera profile, see /profiles.")
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority, expected one of {', '.join(PRIORITIES)}.")
+    try:
+        validate_encoder_settings(codec, crf, preset)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+    encoder_settings = {"backend": encoder, "codec": codec, "crf": crf, "preset": preset}
     job_id = str(uuid4())
     video_path = UPLOAD_DIR / f"{job_id}.mp4"
-    output_path = OUTPUT_DIR / f"{job_id}.mp4"
-    log_path = LOG_DIR / f"{job_id}.csv"
 
-    with open(video_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    with STORAGE.pinned_job(job_id):
+        if not STORAGE.has_room(UPLOAD_DIR, file.size or 0):
+            raise HTTPException(status_code=507, detail="Not enough disk space for the upload.")
+        with open(video_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        # Indexing reads the whole file, so it runs off the event loop
+        try:
+            await run_in_threadpool(VideoIndex.load_or_build, str(video_path), index_path(job_id))
+        except ValueError as error:
+            video_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=400, detail=str(error)) from error
 
-    PROGRESS[job_id] = 0
+        PROGRESS[job_id] = 0
+        save_job(job_id, status="queued", output_mode=output_mode,
+                 encoder_settings=encoder_settings, start_time=start_time, end_time=end_time, clips=clips,
+                 camera_profile=camera_profile, priority=priority)
+        start_job(job_id)
 
-    def run_job():
-        process_video(
-            str(video_path),
-            str(output_path),
-            str(log_path),
-            lambda p: PROGRESS.update({job_id: p})
-        )
-        PROGRESS[job_id] = 100  # Mark as complete
+    return {"job_id": job_id}
 
-    threading.Thread(target=run_job, daemon=True).start()
 
-    return {"job_id": job_id}
+def estimate_eta(job_id: str, progress: int) -> Optional[float]:
+    """
+        Estimates the seconds left on a job from its progress rate since it last started.
+    Args:
+        job_id (str): Job to estimate.
+        progress (int): Current progress percentage.
+    Returns:
+        float: Seconds remaining, 0 once complete, or None before there is a rate to go on.
+    """
+    if progress >= 100:
+        return 0.0
+    started = STARTED.get(job_id)
+    if started is None or progress <= started[1]:
+        return None
+    elapsed = time.monotonic() - started[0]
+    return round(elapsed * (100 - progress) / (progress - started[1]), 1)
+
+
+@app.get("/profiles", summary="List camera calibration profiles")
+def get_profiles():
+    """
+        List the camera calibration profiles a job can be uploaded with.
+    """
+    return {"profiles": list_profiles(str(CALIBRATION_DIR)), "default": DEFAULT_PROFILE}
 
 
 @app.get("/status/{job_id}", summary="Check job progress")
 def check_status(job_id: str):
     """
-        Check the current progress of a video processing job.
+        Check the status and current progress of a video processing job, with an estimate of the seconds
+        remaining. Progress counts the frames of the video's keyframe index, so it is exact for variable
+        frame rate video. `storage_bytes` is the space the job's files take up in each directory, see `/storage`.
     """
     progress = PROGRESS.get(job_id)
     if progress is None:
         raise HTTPException(status_code=404, detail="Job ID not found.")
-    return {"job_id": job_id, "progress": progress}
+    return {"job_id": job_id, "status": JOBS.get(job_id, {}).get("status"), "progress": progress,
+            "eta_seconds": estimate_eta(job_id, progress), "storage_bytes": STORAGE.job_usage(job_id)}
+
+
+@app.post("/cancel/{job_id}", summary="Cancel a job")
+def cancel_job(job_id: str):
+    """
+        Cancel a queued or running job. A running job stops at its next frame, then its partial
+        outputs, logs, events and upload are removed. Returns 409 if the job has already finished.
+    """
+    if job_id not in JOBS:
+        raise HTTPException(status_code=404, detail="Job ID not found.")
+    state = JOB_QUEUE.cancel(job_id)
+    if state is None:
+        raise HTTPException(status_code=409, detail=f"Job is {JOBS[job_id].get('status')}, it cannot be cancelled.")
+    if state == "queued":
+        remove_job_files(job_id)
+        save_job(job_id, status="cancelled")
+        return {"job_id": job_id, "status": "cancelled"}
+    return {"job_id": job_id, "status": "cancelling"}
+
+
+@app.get("/storage", summary="Disk usage against the storage budgets")
+def storage_status():
+    """
+        Report the size and number of artifacts in each data directory against its budget, and the free disk
+        space. Artifacts over budget are evicted least recently downloaded first.
+    """
+    return STORAGE.usage()
 
 
 @app.get("/download/video/{job_id}", summary="Download the processed video")
 def download_video(job_id: str):
     """
         Download the annotated video for a completed job.
+        Returns 409 for jobs processed in log-only mode, which never produce a video.
     """
+    if JOBS.get(job_id, {}).get("output_mode") == "log_only":
+        raise HTTPException(status_code=409, detail="Job was processed in log-only mode; no video was produced.")
     path = OUTPUT_DIR / f"{job_id}.mp4"
     if not path.exists():
         raise HTTPException(status_code=404, detail="Processed video not found.")
+    STORAGE.touch(path)
     return FileResponse(path, media_type="video/mp4", filename=f"{job_id}.mp4")
 
 
@@ -105,9 +440,183 @@ def download_log(job_id: str):
     path = LOG_DIR / f"{job_id}.csv"
     if not path.exists():
         raise HTTPException(status_code=404, detail="Log file not found.")
+    STORAGE.touch(path)
     return FileResponse(path, media_type="text/csv", filename=f"{job_id}.csv")
 
 
+@app.get("/download/fill/{job_id}", summary="Download the fill level time series")
+def download_fill_log(job_id: str):
+    """
+        Download the petri dish and bottle fill level time series (CSV) generated during video processing.
+    """
+    path = LOG_DIR / f"{job_id}_fill.csv"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Fill level log not found.")
+    STORAGE.touch(path)
+    return FileResponse(path, media_type="text/csv", filename=f"{job_id}_fill.csv")
+
+
+@app.get("/download/detections/{job_id}", summary="Download the per-frame detections")
+def download_detections(job_id: str):
+    """
+        Download the per-frame detections (NDJSON). A frame with the same detections as the frame
+        before is written as just its frame number.
+    """
+    path = LOG_DIR / f"{job_id}_detections.ndjson"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Detections not found.")
+    STORAGE.touch(path)
+    return FileResponse(path, media_type="application/x-ndjson", filename=f"{job_id}_detections.ndjson")
+
+
+@app.get("/render/{job_id}", summary="Render annotated video for a time range")
+def render_video(job_id: str, start_time: float = Query(0.0, ge=0), end_time: float = Query(...)):
+    """
+        Render the annotated video between `start_time` and `end_time` (seconds) of a completed job,
+        from its upload and per-frame detections. Recently rendered ranges are cached.
+        Returns 410 if the upload has been evicted to stay within the storage budget.
+    """
+    if job_id not in JOBS:
+        raise HTTPException(status_code=404, detail="Job ID not found.")
+    if JOBS[job_id].get("status") != "complete":
+        raise HTTPException(status_code=409, detail="Job has not finished processing.")
+    if not 0 < end_time - start_time <= MAX_RENDER_SECONDS:
+        raise HTTPException(status_code=400, detail="end_time must be after start_time and at most "
+                                                    f"{MAX_RENDER_SECONDS:g} seconds later.")
+    detections_path = LOG_DIR / f"{job_id}_detections.ndjson"
+    if not detections_path.exists():
+        raise HTTPException(status_code=404, detail="Detections not found.")
+    video_path = UPLOAD_DIR / f"{job_id}.mp4"
+    if not video_path.exists():
+        raise HTTPException(status_code=410, detail="The uploaded video has been evicted.")
+    STORAGE.touch(video_path)
+    STORAGE.touch(detections_path)
+    try:
+        path = RENDERS.get((job_id, start_time, end_time), lambda output_path: render_range(
+            str(video_path), str(detections_path), output_path,
+            start_time=start_time, end_time=end_time, index_path=index_path(job_id),
+            encoder_settings=JOBS[job_id].get("encoder_settings"),
+            camera_profile=JOBS[job_id].get("camera_profile", DEFAULT_PROFILE), calibration_dir=str(CALIBRATION_DIR)))
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+    return FileResponse(path, media_type="video/mp4", filename=f"{job_id}_{start_time:g}-{end_time:g}.mp4")
+
+
+@app.get("/resources", summary="CPU budgets of the running jobs and the model")
+def resource_budgets():
+    """
+        Report the threads, and cores when pinned, given to each running job and to the shared model.
+        The budgets are rebalanced whenever a job starts or finishes.
+    """
+    return RESOURCES.usage()
+
+
+@app.get("/inference/stats", summary="Inference latency per job")
+def inference_stats(job_id: Optional[str] = None):
+    """
+        Report the shared model's mean batch size and the 50th, 95th and 99th percentile latency in
+        milliseconds of each job's recent frames, from submission to result, and the detection cache's
+        hit rate and memory use, or null when the cache is off.
+    """
+    return {**SCHEDULER.stats(job_id), "cache": DETECTION_CACHE.stats() if DETECTION_CACHE else None}
+
+
+def detect_on_server(image: np.ndarray, box_threshold: float, text_threshold: float) -> dict:
+    """
+        Detects objects in an image on the model server.
+    """
+    client = ModelServerClient(MODEL_SERVER)
+    try:
+        boxes, logits, phrases = client.process_image(image, box_threshold, text_threshold)
+        return format_detections(boxes, logits, [client.map_label(p) for p in phrases])
+    finally:
+        client.close()
+
+
+@app.post("/detect", summary="Detect objects in a still image")
+async def detect(file: UploadFile = File(...), box_threshold: float = Query(0.35, gt=0, lt=1),
+                 text_threshold: float = Query(0.25, gt=0, lt=1)):
+    """
+        Detect objects in a still image (PNG or JPEG) and return them straight away, with boxes as
+        normalised (cx, cy, w, h). The image is not lens corrected. Concurrent requests are batched
+        through the shared model. Returns 503 when too many detections are already waiting.
+    """
+    image = cv2.imdecode(np.frombuffer(await file.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise HTTPException(status_code=400, detail="Could not decode the image.")
+    try:
+        if MODEL_SERVER:
+            detections = await DETECT_EXECUTOR.run(detect_on_server, image, box_threshold, text_threshold)
+        else:
+            boxes, logits, phrases = await SCHEDULER.detect("detect", image, box_threshold, text_threshold)
+            detections = format_detections(boxes, logits, [SCHEDULER.map_label(p) for p in phrases])
+    except ExecutorBusy as error:
+        raise HTTPException(status_code=503, detail="Too many detections waiting, try again shortly.",
+                            headers={"Retry-After": "1"}) from error
+    return {"width": image.shape[1], "height": image.shape[0], **detections}
+
+
+@app.get("/events", summary="Query events across jobs")
+def list_events(job_id: Optional[str] = None, action: Optional[str] = None,
+                since: Optional[datetime] = None, until: Optional[datetime] = None,
+                limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    """
+        List the events of every job, oldest first, optionally filtered by job, action
+        (e.g. `bottle is poured into petri dish`) and when they were recorded (ISO 8601 times).
+        Use `limit` and `offset` to page through the results.
+    """
+    filters = {"job_id": job_id, "action": action, "since": since.timestamp() if since else None,
+               "until": until.timestamp() if until else None}
+    return {"total": EVENTS.count(**filters), "limit": limit, "offset": offset,
+            "events": EVENTS.query(**filters, limit=limit, offset=offset)}
+
+
+@app.get("/events/counts", summary="Count events per action or per job")
+def count_events(group_by: str = "action", job_id: Optional[str] = None, action: Optional[str] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+        Count the events matching the filters, grouped by `action` or by `job`.
+    """
+    if group_by not in GROUP_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unknown grouping, expected one of {', '.join(GROUP_COLUMNS)}.")
+    return {"group_by": group_by,
+            "counts": EVENTS.counts(group_by, job_id=job_id, action=action,
+                                    since=since.timestamp() if since else None,
+                                    until=until.timestamp() if until else None)}
+
+
+@app.get("/media/{job_id}", summary="List a job's event thumbnails and clips")
+def list_media(job_id: str, limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    """
+        List a job's events with the names of their thumbnail (JPEG) and clip (MP4), or null where
+        none was saved. Download them from `/media/{job_id}/{name}`.
+    """
+    if job_id not in PROGRESS:
+        raise HTTPException(status_code=404, detail="Job ID not found.")
+    job_media = MEDIA_DIR / job_id
+    events = EVENTS.query(job_id=job_id, limit=limit, offset=offset)
+    for event in events:
+        name = media_name(event["frame"], event["action"])
+        for key, extension in (("thumbnail", "jpg"), ("clip", "mp4")):
+            event[key] = f"{name}.{extension}" if (job_media / f"{name}.{extension}").exists() else None
+    return {"job_id": job_id, "total": EVENTS.count(job_id=job_id), "limit": limit, "offset": offset,
+            "events": events}
+
+
+@app.get("/media/{job_id}/{name}", summary="Download an event thumbnail or clip")
+def download_media(job_id: str, name: str):
+    """
+        Download a thumbnail or clip listed by `/media/{job_id}`.
+    """
+    if job_id not in JOBS:
+        raise HTTPException(status_code=404, detail="Job ID not found.")
+    path = MEDIA_DIR / job_id / name
+    if path.parent.parent != MEDIA_DIR or path.suffix not in (".jpg", ".mp4") or not path.exists():
+        raise HTTPException(status_code=404, detail="Media not found.")
+    STORAGE.touch(path)
+    return FileResponse(path, media_type="image/jpeg" if path.suffix == ".jpg" else "video/mp4", filename=name)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8001, reload=True)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+    annotation.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Lightweight detection annotator that draws boxes and labels directly onto a BGR
+        frame in place. Follows the layout of the supervision BoxAnnotator used by
+        groundingdino's annotate, without its colour conversions and frame copies.
+
+    Change History:
+        0.1: Created.
+"""
+from collections import OrderedDict
+from typing import List
+import cv2
+import numpy as np
+from lab_monitor.cv_functions import boxes_to_pixels
+
+# The supervision default palette, written in the channel order it appeared in our
+# annotated videos so the colours stay the same.
+DEFAULT_PALETTE = [
+    (230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 49), (145, 30, 180),
+    (70, 240, 240), (240, 50, 230), (210, 245, 60), (250, 190, 190), (0, 128, 128), (230, 190, 255),
+    (170, 110, 40), (255, 250, 200), (128, 0, 0), (170, 255, 195),
+]
+
+
+class BoxAnnotator:  # pylint: disable=R0902
+    """
+        Draws detection boxes with a filled label above each one. Every class keeps the same
+        colour for the whole video and rendered labels are cached, so drawing a frame is a
+        handful of rectangle calls and array copies.
+    """
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+    def __init__(self, palette=None, thickness: int = 2, text_scale: float = 0.5,  # pylint: disable=R0917
+                 text_thickness: int = 1, text_padding: int = 10, text_color=(0, 0, 0),
+                 max_cached_labels: int = 512):
+        """
+        Args:
+            palette (list, optional): BGR colours assigned to classes in order of first appearance.
+            thickness (int): Box line thickness.
+            text_scale (float): Label font scale.
+            text_thickness (int): Label font thickness.
+            text_padding (int): Padding around the label text.
+            text_color (tuple): BGR label text colour.
+            max_cached_labels (int): Number of rendered labels to keep.
+        """
+        self.palette = palette or DEFAULT_PALETTE
+        self.thickness = thickness
+        self.text_scale = text_scale
+        self.text_thickness = text_thickness
+        self.text_padding = text_padding
+        self.text_color = text_color
+        self.max_cached_labels = max_cached_labels
+        self.class_colors = {}
+        self._labels = OrderedDict()
+
+    def color_for(self, label: str) -> tuple:
+        """
+            Returns the colour of a class, assigning the next palette colour on first use.
+        Args:
+            label (str): Class label.
+        Returns:
+            tuple: BGR colour.
+        """
+        color = self.class_colors.get(label)
+        if color is None:
+            color = self.palette[len(self.class_colors) % len(self.palette)]
+            self.class_colors[label] = color
+        return color
+
+    def render_label(self, text: str, color: tuple) -> np.ndarray:
+        """
+            Returns the label image for the given text and background colour, rendering it on first use.
+        Args:
+            text (str): Label text.
+            color (tuple): BGR background colour.
+        Returns:
+            np.ndarray: BGR label image, the text baseline sits text_padding above the bottom edge.
+        """
+        key = (text, color)
+        patch = self._labels.get(key)
+        if patch is not None:
+            self._labels.move_to_end(key)
+            return patch
+        (text_width, text_height), _ = cv2.getTextSize(text, self.FONT, self.text_scale, self.text_thickness)
+        pad = self.text_padding
+        patch = np.empty((text_height + 2 * pad + 1, text_width + 2 * pad + 1, 3), dtype=np.uint8)
+        patch[:] = color
+        cv2.putText(patch, text, (pad, pad + text_height), self.FONT, self.text_scale,
+                    self.text_color, self.text_thickness, cv2.LINE_AA)
+        self._labels[key] = patch
+        if len(self._labels) > self.max_cached_labels:
+            self._labels.popitem(last=False)
+        return patch
+
+    def annotate(self, frame: np.ndarray, boxes, logits, phrases: List[str]) -> np.ndarray:
+        """
+            Draws the detections onto the frame in place.
+        Args:
+            frame (np.ndarray): BGR frame, modified in place.
+            boxes (array-like): N x 4 normalised (cx, cy, w, h) boxes from GroundingDINO.
+            logits (array-like): N detection scores.
+            phrases (List[str]): N labels.
+        Returns:
+            np.ndarray: The same frame, for convenience.
+        """
+        height, width = frame.shape[:2]
+        for (x1, y1, x2, y2), logit, phrase in zip(boxes_to_pixels(boxes, frame.shape), logits, phrases):
+            color = self.color_for(phrase)
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, self.thickness)
+
+            patch = self.render_label(f"{phrase} {float(logit):.2f}", color)
+            top = y1 - patch.shape[0] + 1
+            src_y, src_x = max(0, -top), 0
+            dst_y1, dst_x1 = max(0, top), x1
+            dst_y2 = min(height, top + patch.shape[0])
+            dst_x2 = min(width, x1 + patch.shape[1])
+            if dst_y2 > dst_y1 and dst_x2 > dst_x1:
+                frame[dst_y1:dst_y2, dst_x1:dst_x2] = patch[src_y:src_y + dst_y2 - dst_y1,
+                                                            src_x:src_x + dst_x2 - dst_x1]
+        return frame
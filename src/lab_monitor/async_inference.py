@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+    async_inference.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Bounded executor for awaiting blocking inference from async code. Calls run on a small,
+        dedicated thread pool, so the event loop is never blocked and inference never runs on more
+        threads than the pool has. At most max_pending calls can be queued or running, further
+        calls are refused straight away with ExecutorBusy so callers can shed load, e.g. with a 503.
+
+    Change History:
+        0.1: Created.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import threading
+
+
+class ExecutorBusy(RuntimeError):
+    """
+        Raised when an executor already has as many calls as it will queue.
+    """
+
+
+class BoundedExecutor:
+    """
+        Runs blocking calls on a dedicated thread pool for async callers.
+    Args:
+        max_workers (int): Threads running calls, 1 for a model that runs one forward pass at a time.
+        max_pending (int): Most calls queued or running at once.
+        name (str): Thread name prefix.
+    """
+    def __init__(self, max_workers: int = 1, max_pending: int = 16, name: str = "inference"):
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    def reserve(self) -> None:
+        """
+            Takes a pending slot.
+        Raises:
+            ExecutorBusy: If every slot is taken.
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise ExecutorBusy(f"{self.pending} calls already pending.")
+            self.pending += 1
+
+    def release(self) -> None:
+        """
+            Frees a pending slot.
+        """
+        with self.lock:
+            self.pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """
+            Runs fn(*args, **kwargs) on the pool and waits for its result without blocking the event loop.
+        Raises:
+            ExecutorBusy: If max_pending calls are already queued or running.
+        """
+        self.reserve()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args, **kwargs))
+        finally:
+            self.release()
+
+    def shutdown(self) -> None:
+        """
+            Stops the pool once the calls already queued have run.
+        """
+        self.executor.shutdown(wait=True)
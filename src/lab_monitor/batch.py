@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+"""
+    batch.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Batch lens correction and detection of still images, the library version of
+        experiments/process_folder.py. Images are grouped by resolution and fanned out
+        across a process pool, each worker builds the undistortion maps once per resolution,
+        and detections are run in batches and written to a single NDJSON file.
+
+        Usage:
+            python -m lab_monitor.batch samples/raw --output-dir samples/corrected --k1 -0.282 --k2 -0.282
+            python -m lab_monitor.batch "stills/**/*.png" --detect --detections detections.ndjson
+            python -m lab_monitor.batch stills --profile lab_camera --calibration-dir data/calibration
+
+    Change History:
+        0.1: Created.
+        0.2: Lens correction can come from a camera profile, whose maps the workers share.
+"""
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
+import cv2
+from PIL import Image
+from tqdm import tqdm
+from lab_monitor.calibration import load_transform
+from lab_monitor.cv_functions import BarrelUndistortTransform
+from lab_monitor.detections import format_detections
+from lab_monitor.model_options import add_model_arguments, parse_model_paths
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tiff")
+
+# Per-process state, set up once by each worker
+_TRANSFORMS = {}
+_NETWORK = None
+
+
+def find_images(source: str) -> List[str]:
+    """
+        Lists the images in a directory, or matching a glob pattern.
+    Args:
+        source (str): Directory, or glob pattern such as "stills/**/*.png".
+    Returns:
+        List[str]: Sorted image paths.
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path))
+
+
+def get_transform(shape, k1: float, k2: float, camera_profile: Optional[str] = None,
+                  calibration_dir: Optional[str] = None) -> BarrelUndistortTransform:
+    """
+        Returns the undistortion transform for an image shape, building its maps on first use in this process.
+    Args:
+        shape (tuple): Image shape (height, width, channels).
+        k1 (float): Radial distortion coefficient k1.
+        k2 (float): Radial distortion coefficient k2.
+        camera_profile (str, optional): Camera profile to use instead of k1 and k2. With a calibration
+            directory its maps are memory-mapped, so every worker shares one copy.
+        calibration_dir (str, optional): Directory holding the camera profiles.
+    Returns:
+        BarrelUndistortTransform: Cached transform.
+    """
+    if camera_profile:
+        return load_transform(camera_profile, shape, calibration_dir)
+    key = (tuple(shape[:2]), k1, k2)
+    transform = _TRANSFORMS.get(key)
+    if transform is None:
+        transform = BarrelUndistortTransform(shape, k1=k1, k2=k2)
+        _TRANSFORMS[key] = transform
+    return transform
+
+
+def _image_size(path: str):
+    """
+        Reads an image's size from its header without decoding it.
+    """
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except OSError:
+        return None
+
+
+def _chunks_by_resolution(paths: List[str], chunk_size: int) -> List[List[str]]:
+    """
+        Splits the paths into chunks where every image has the same resolution,
+        so each worker reuses one set of maps and detection batches need no padding.
+    """
+    groups = {}
+    for path in paths:
+        groups.setdefault(_image_size(path), []).append(path)
+    return [group[start:start + chunk_size] for group in groups.values()
+            for start in range(0, len(group), chunk_size)]
+
+
+def _init_worker(detect: bool, text_prompt: Optional[str], model_paths: Optional[dict]) -> None:
+    """
+        Sets up a worker process, loading the detection model once if needed.
+    """
+    global _NETWORK  # pylint: disable=W0603
+    # The pool already uses every core, stop OpenCV starting its own threads in each worker
+    cv2.setNumThreads(1)
+    if detect:
+        # Imported here so lens correction alone does not load torch and GroundingDINO
+        from lab_monitor.dino_functions import DinoProcess  # pylint: disable=C0415
+        _NETWORK = DinoProcess(text_prompt=text_prompt)
+        _NETWORK.load_model(**(model_paths or {}))
+
+
+def _process_chunk(paths: List[str], root: str, output_dir: Optional[str],  # pylint: disable=R0917
+                   k1: float, k2: float, box_threshold: float, text_threshold: float,
+                   camera_profile: Optional[str] = None, calibration_dir: Optional[str] = None) -> List[dict]:
+    """
+        Corrects a chunk of images and, if the worker has a model, detects objects in them as one batch.
+    Returns:
+        List[dict]: One record per image.
+    """
+    records, corrected_images = [], []
+    for path in paths:
+        name = os.path.relpath(path, root)
+        image = cv2.imread(path)
+        if image is None:
+            records.append({"image": name, "error": "cannot load"})
+            continue
+        corrected = get_transform(image.shape, k1, k2, camera_profile, calibration_dir).apply(image)
+        if output_dir:
+            output_path = os.path.join(output_dir, name)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            cv2.imwrite(output_path, corrected)
+        records.append({"image": name})
+        corrected_images.append((records[-1], corrected))
+
+    if _NETWORK is not None and corrected_images:
+        results = _NETWORK.process_batch([image for _, image in corrected_images],
+                                         box_threshold=box_threshold, text_threshold=text_threshold)
+        for (record, _), (boxes, logits, phrases) in zip(corrected_images, results):
+            record.update(format_detections(boxes, logits, [_NETWORK.map_label(p) for p in phrases]))
+    return records
+
+
+def process_images(source: str, output_dir: str = None,  # pylint: disable=R0917
+                   detections_path: str = None, k1: float = -0.182, k2: float = 0.0032, workers: Optional[int] = None,
+                   detect: bool = False, batch_size: int = 8, text_prompt: str = None,
+                   box_threshold: float = 0.35, text_threshold: float = 0.25,
+                   model_paths: dict = None, progress_callback=None, camera_profile: Optional[str] = None,
+                   calibration_dir: Optional[str] = None) -> int:
+    """
+        Lens corrects, and optionally runs detection on, every image in a directory or glob.
+    Args:
+        source (str): Directory, or glob pattern of images.
+        output_dir (str, optional): Directory to save the corrected images, keeping their relative paths.
+        detections_path (str, optional): Path to save one NDJSON record per image.
+        k1 (float): Radial distortion coefficient k1.
+        k2 (float): Radial distortion coefficient k2.
+        workers (int, optional): Number of worker processes, all cores by default. 0 runs in this process.
+            With detection each worker loads its own model, so keep this low on a GPU.
+        detect (bool): Run GroundingDINO on the corrected images.
+        batch_size (int): Images per chunk of work, and per detection batch.
+        text_prompt (str, optional): Detection prompt, DinoProcess's default when not given.
+        box_threshold (float): Threshold for box detection.
+        text_threshold (float): Threshold for text detection.
+        model_paths (dict, optional): model_config_path and model_checkpoint_path for DinoProcess.load_model.
+        progress_callback (callable, optional): Called with the percentage of images processed.
+        camera_profile (str, optional): Camera profile to correct with instead of k1 and k2.
+        calibration_dir (str, optional): Directory holding the camera profiles. The profile's maps are
+            saved there once and memory-mapped by every worker.
+    Returns:
+        int: Number of images processed.
+    """
+    paths = find_images(source)
+    if not paths:
+        return 0
+    root = source if os.path.isdir(source) else os.path.commonpath([os.path.dirname(p) for p in paths])
+    chunks = _chunks_by_resolution(paths, batch_size)
+    run_chunk = partial(_process_chunk, root=root, output_dir=output_dir, k1=k1, k2=k2,
+                        box_threshold=box_threshold, text_threshold=text_threshold,
+                        camera_profile=camera_profile, calibration_dir=calibration_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    detections_file = None
+    if detections_path:
+        detections_file = open(detections_path, "w", encoding="utf-8")  # pylint: disable=R1732
+    executor = None
+    try:
+        if workers == 0:
+            _init_worker(detect, text_prompt, model_paths)
+            results = map(run_chunk, chunks)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(detect, text_prompt, model_paths))
+            results = executor.map(run_chunk, chunks)
+
+        done = 0
+        for records in results:
+            if detections_file:
+                for record in records:
+                    detections_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            done += len(records)
+            if progress_callback:
+                progress_callback(int((done / len(paths)) * 100))
+    finally:
+        if executor:
+            executor.shutdown()
+        if detections_file:
+            detections_file.close()
+    return done
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Batch lens correction and detection of still images.")
+    parser.add_argument("source", help="Image directory or glob pattern, e.g. 'stills/**/*.png'.")
+    parser.add_argument("--output-dir", help="Directory to save the corrected images.")
+    parser.add_argument("--detections", help="NDJSON file to save the per-image detections.")
+    parser.add_argument("--k1", type=float, default=-0.182, help="Radial distortion coefficient k1.")
+    parser.add_argument("--k2", type=float, default=0.0032, help="Radial distortion coefficient k2.")
+    parser.add_argument("--profile", help="Camera profile to correct with instead of --k1 and --k2.")
+    parser.add_argument("--calibration-dir", help="Directory holding the camera profiles.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, all cores by default.")
+    parser.add_argument("--detect", action="store_true", help="Run GroundingDINO detection.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Images per detection batch.")
+    add_model_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tqdm(total=100, desc="Processing images") as progress:
+        count = process_images(args.source, output_dir=args.output_dir, detections_path=args.detections,
+                               k1=args.k1, k2=args.k2, camera_profile=args.profile,
+                               calibration_dir=args.calibration_dir, workers=args.workers, detect=args.detect,
+                               batch_size=args.batch_size, model_paths=parse_model_paths(args),
+                               progress_callback=lambda p: progress.update(p - progress.n))
+    print(f"Processed {count} images.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+    buffer_pool.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Pool of preallocated frame buffers, so the pipeline reuses the same few
+        full resolution arrays instead of allocating new ones on every frame.
+
+    Change History:
+        0.1: Created.
+"""
+import queue
+import numpy as np
+
+
+class FramePool:
+    """
+        A fixed set of equally shaped frame buffers. Buffers are handed out with acquire
+        and must be given back with release once nothing is reading them any more.
+    Args:
+        shape (tuple): Frame shape, e.g. (height, width, 3).
+        size (int): Number of buffers to allocate.
+        dtype (np.dtype): Frame dtype.
+    """
+    def __init__(self, shape, size: int = 4, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.size = size
+        self._free = queue.LifoQueue()
+        for _ in range(size):
+            self._free.put(np.empty(self.shape, dtype=self.dtype))
+
+    @classmethod
+    def like(cls, frame: np.ndarray, size: int = 4) -> "FramePool":
+        """
+            Creates a pool of buffers matching an example frame.
+        Args:
+            frame (np.ndarray): Example frame, usually the first decoded frame.
+            size (int): Number of buffers to allocate.
+        Returns:
+            FramePool: The new pool.
+        """
+        return cls(frame.shape, size=size, dtype=frame.dtype)
+
+    def acquire(self, timeout: float = 30.0) -> np.ndarray:
+        """
+            Takes a free buffer, waiting for one to be released if they are all in use.
+        Args:
+            timeout (float): Seconds to wait before giving up.
+        Returns:
+            np.ndarray: A buffer with undefined contents.
+        """
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty as error:
+            raise RuntimeError(f"No frame buffer released within {timeout}s, all {self.size} are in use.") from error
+
+    def release(self, buffer: np.ndarray) -> None:
+        """
+            Returns a buffer to the pool.
+        Args:
+            buffer (np.ndarray): A buffer previously returned by acquire.
+        """
+        if buffer.shape != self.shape or buffer.dtype != self.dtype:
+            raise ValueError("Buffer does not belong to this pool.")
+        self._free.put(buffer)
+
+    @property
+    def available(self) -> int:
+        """
+            Number of buffers currently free.
+        """
+        return self._free.qsize()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+    calibration.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Named camera calibration profiles. A profile stores the camera intrinsics and distortion
+        coefficients, and the undistortion remap tables built from them for each resolution as .npy
+        files. The tables are memory-mapped read only, so every process using a profile shares one
+        physical copy through the page cache instead of building its own.
+
+        Without a calibration directory only the built-in profiles are available and their tables
+        are built in memory.
+
+        Layout:
+            <calibration_dir>/<name>/profile.json
+            <calibration_dir>/<name>/map1_<width>x<height>.npy
+            <calibration_dir>/<name>/map2_<width>x<height>.npy
+
+    Change History:
+        0.1: Created.
+        0.2: Cached transforms are rebuilt once their profile has been saved again.
+"""
+import json
+import os
+import re
+from typing import List, Optional
+import numpy as np
+from lab_monitor.cv_functions import BarrelUndistortTransform
+
+DEFAULT_PROFILE = "lab_camera"
+# Profiles that are created on first use, the lab camera coefficients were determined experimentally
+BUILTIN_PROFILES = {
+    DEFAULT_PROFILE: {"dist_coeffs": [-0.182, 0.0032, 0.0, 0.0, 0.0]},
+}
+PROFILE_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# Per-process cache of (profile modification time, transform) by (calibration_dir, name, height, width)
+_TRANSFORMS = {}
+
+
+def _save_atomic(path: str, save) -> None:
+    """
+        Saves to a temporary file and moves it into place, so concurrent readers never see a partial file.
+    Args:
+        path (str): Destination path.
+        save (callable): Called with an open binary file to write.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        save(f)
+    os.replace(tmp_path, path)
+
+
+class CameraProfile:
+    """
+        Intrinsics and distortion coefficients of a camera.
+    Args:
+        name (str): Profile name, used as its directory name.
+        dist_coeffs (array-like): Distortion coefficients (k1, k2, p1, p2, k3).
+        camera_matrix (array-like, optional): 3 x 3 intrinsic matrix measured at image_size. When not
+            given it is estimated from the frame size, as BarrelUndistortTransform does.
+        image_size (tuple, optional): (width, height) the camera matrix was measured at.
+    """
+    def __init__(self, name: str, dist_coeffs, camera_matrix=None, image_size=None):
+        if not PROFILE_NAME.match(name):
+            raise ValueError(f"Invalid camera profile name '{name}'.")
+        self.name = name
+        self.dist_coeffs = [float(c) for c in dist_coeffs]
+        self.camera_matrix = None if camera_matrix is None else np.asarray(camera_matrix, dtype=np.float64).tolist()
+        self.image_size = None if image_size is None else [int(v) for v in image_size]
+
+    @classmethod
+    def load(cls, name: str, calibration_dir: Optional[str] = None) -> "CameraProfile":
+        """
+            Loads a saved profile, saving built-in profiles to the calibration directory on first use.
+        Args:
+            name (str): Profile name.
+            calibration_dir (str, optional): Directory holding the profiles.
+        Returns:
+            CameraProfile: The profile.
+        """
+        if not PROFILE_NAME.match(name):
+            raise ValueError(f"Invalid camera profile name '{name}'.")
+        path = os.path.join(calibration_dir, name, "profile.json") if calibration_dir else None
+        if path is None or not os.path.exists(path):
+            if name not in BUILTIN_PROFILES:
+                raise ValueError(f"Unknown camera profile '{name}'.")
+            profile = cls(name, **BUILTIN_PROFILES[name])
+            if calibration_dir:
+                profile.save(calibration_dir)
+            return profile
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(name, **json.load(f))
+
+    def save(self, calibration_dir: str) -> None:
+        """
+            Writes the profile. Remap tables saved for an earlier version of the profile are removed.
+        Args:
+            calibration_dir (str): Directory holding the profiles.
+        """
+        directory = os.path.join(calibration_dir, self.name)
+        os.makedirs(directory, exist_ok=True)
+        for file_name in os.listdir(directory):
+            if file_name.endswith(".npy"):
+                os.remove(os.path.join(directory, file_name))
+        data = {"dist_coeffs": self.dist_coeffs, "camera_matrix": self.camera_matrix, "image_size": self.image_size}
+        _save_atomic(os.path.join(directory, "profile.json"), lambda f: f.write(json.dumps(data).encode("utf-8")))
+        for key in [key for key in _TRANSFORMS if key[:2] == (calibration_dir, self.name)]:
+            del _TRANSFORMS[key]
+
+    def camera_matrix_for(self, image_shape) -> Optional[np.ndarray]:
+        """
+            Returns the camera matrix scaled to a frame size.
+        Args:
+            image_shape (tuple): Frame shape (height, width).
+        Returns:
+            np.ndarray: 3 x 3 matrix, or None to estimate it from the frame size.
+        """
+        if self.camera_matrix is None:
+            return None
+        matrix = np.array(self.camera_matrix, dtype=np.float64)
+        if self.image_size:
+            scale_x = image_shape[1] / self.image_size[0]
+            scale_y = image_shape[0] / self.image_size[1]
+            matrix[0] *= scale_x
+            matrix[1] *= scale_y
+        return matrix
+
+    def transform(self, image_shape, calibration_dir: Optional[str] = None) -> BarrelUndistortTransform:
+        """
+            Returns the undistortion transform for a frame size, with its remap tables memory-mapped
+            from the profile directory. The tables are built and saved the first time a size is used.
+        Args:
+            image_shape (tuple): Frame shape (height, width).
+            calibration_dir (str, optional): Directory holding the profiles, the tables are built in
+                memory when not given.
+        Returns:
+            BarrelUndistortTransform: Transform whose maps are read only memory maps.
+        """
+        camera_matrix = self.camera_matrix_for(image_shape)
+        if not calibration_dir:
+            return BarrelUndistortTransform(image_shape, camera_matrix=camera_matrix, dist_coeffs=self.dist_coeffs)
+        height, width = image_shape[:2]
+        directory = os.path.join(calibration_dir, self.name)
+        paths = [os.path.join(directory, f"map{i}_{width}x{height}.npy") for i in (1, 2)]
+        if not all(os.path.exists(path) for path in paths):
+            built = BarrelUndistortTransform(image_shape, camera_matrix=camera_matrix, dist_coeffs=self.dist_coeffs)
+            os.makedirs(directory, exist_ok=True)
+            for path, table in zip(paths, (built.map1, built.map2)):
+                _save_atomic(path, lambda f, table=table: np.save(f, table))
+        maps = tuple(np.load(path, mmap_mode="r") for path in paths)
+        return BarrelUndistortTransform(image_shape, camera_matrix=camera_matrix, dist_coeffs=self.dist_coeffs,
+                                        maps=maps)
+
+
+def list_profiles(calibration_dir: Optional[str] = None) -> List[str]:
+    """
+        Lists the saved and built-in profile names.
+    Args:
+        calibration_dir (str, optional): Directory holding the profiles.
+    Returns:
+        List[str]: Sorted profile names.
+    """
+    names = set(BUILTIN_PROFILES)
+    if calibration_dir and os.path.isdir(calibration_dir):
+        names.update(name for name in os.listdir(calibration_dir)
+                     if os.path.exists(os.path.join(calibration_dir, name, "profile.json")))
+    return sorted(names)
+
+
+def _profile_mtime(name: str, calibration_dir: Optional[str]) -> Optional[int]:
+    """
+        Returns the modification time of a saved profile in nanoseconds, None if it is not saved.
+    """
+    if not calibration_dir:
+        return None
+    try:
+        return os.stat(os.path.join(calibration_dir, name, "profile.json")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_transform(name: str, image_shape, calibration_dir: Optional[str] = None) -> BarrelUndistortTransform:
+    """
+        Returns a profile's transform for a frame size, cached by the process until the profile is saved
+        again, by this process or another.
+    Args:
+        name (str): Profile name.
+        image_shape (tuple): Frame shape (height, width).
+        calibration_dir (str, optional): Directory holding the profiles.
+    Returns:
+        BarrelUndistortTransform: Transform with memory-mapped maps when a calibration directory is given.
+    """
+    if not PROFILE_NAME.match(name):
+        raise ValueError(f"Invalid camera profile name '{name}'.")
+    key = (calibration_dir, name, *image_shape[:2])
+    cached = _TRANSFORMS.get(key)
+    if cached is not None and cached[0] == _profile_mtime(name, calibration_dir):
+        return cached[1]
+    transform = CameraProfile.load(name, calibration_dir).transform(image_shape, calibration_dir)
+    # Loading saves a built-in profile on first use, so the time is read afterwards
+    _TRANSFORMS[key] = (_profile_mtime(name, calibration_dir), transform)
+    return transform
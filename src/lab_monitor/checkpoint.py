@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+    checkpoint.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Periodic checkpoints of pipeline state so an interrupted job can carry on from
+        where it stopped instead of starting again from frame 0.
+
+    Change History:
+        0.1: Created.
+"""
+import json
+import os
+from typing import Optional
+
+
+def open_log(path: str, resume_offset: Optional[int] = None):
+    """
+        Opens a log file for writing, either fresh or truncated back to a checkpointed offset.
+    Args:
+        path (str): Path to the log file.
+        resume_offset (int, optional): Byte offset recorded in a checkpoint. When given the file is
+            kept up to that offset and writing continues from there.
+    Returns:
+        A text file object open for writing.
+    """
+    if resume_offset is None:
+        return open(path, "w", encoding="utf-8")  # pylint: disable=R1732
+    log_file = open(path, "r+", encoding="utf-8")  # pylint: disable=R1732
+    log_file.truncate(resume_offset)
+    log_file.seek(resume_offset)
+    return log_file
+
+
+class JobCheckpoint:
+    """
+        Stores the state of a running job in a JSON file. Writes are atomic, so a crash
+        while saving leaves the previous checkpoint intact.
+    Args:
+        path (str): Path to the checkpoint file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[dict]:
+        """
+            Reads the last saved state.
+        Returns:
+            dict: The saved state, or None if no checkpoint exists.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, state: dict) -> None:
+        """
+            Replaces the checkpoint with the given state.
+        Args:
+            state (dict): JSON serialisable pipeline state.
+        """
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def delete(self) -> None:
+        """
+            Removes the checkpoint once the job has finished.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
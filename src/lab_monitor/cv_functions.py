@@ -8,13 +8,16 @@
 
     Created: 23/06/2025
 
-    Version: 0.1
+    Version: 0.4
 
     Description:
         Contains a library of OpenCV Image transforms for use in pipeline
 
     Change History:
         0.1: Created.
+        0.2: Added conversion of normalised detection boxes to pixel boxes.
+        0.3: Precompute the undistortion maps and allow writing into a destination frame.
+        0.4: Accept calibrated intrinsics and prebuilt maps, e.g. memory-mapped from a camera profile.
 """
 import cv2
 import numpy as np
@@ -29,28 +32,55 @@ class BarrelUndistortTransform:
         image_shape (tuple): Shape of input frames (height, width).
         k1 (float): Radial distortion coefficient k1.
         k2 (float): Radial distortion coefficient k2.
-        camera_matrix (np.ndarray): The camera intrinsic matrix.
-        dist_coeffs (np.ndarray): The distortion coefficients array.
+        camera_matrix (np.ndarray, optional): The camera intrinsic matrix, estimated from the image size when not given.
+        dist_coeffs (array-like, optional): Full distortion coefficients, overriding k1 and k2.
+        maps (tuple, optional): Prebuilt (map1, map2) remap tables for this image shape, camera matrix and
+            coefficients, equivalent to what cv2.undistort builds on every call. Built when not given.
     """
-    def __init__(self, image_shape, k1: float = -0.282, k2: float = -0.282):
+    def __init__(self, image_shape, k1: float = -0.282, k2: float = -0.282,  # pylint: disable=R0917
+                 camera_matrix=None, dist_coeffs=None, maps=None):
         h, w = image_shape[:2]
-        self.k1 = k1
-        self.k2 = k2
-        focal = max(w, h)
-        cx, cy = w / 2, h / 2
+        if camera_matrix is None:
+            focal = max(w, h)
+            cx, cy = w / 2, h / 2
+            camera_matrix = [[focal, 0, cx],
+                             [0, focal, cy],
+                             [0, 0, 1]]
+        self.camera_matrix = np.array(camera_matrix, dtype=np.float32)
+        self.dist_coeffs = np.array([k1, k2, 0, 0, 0] if dist_coeffs is None else dist_coeffs, dtype=np.float32)
+        self.k1, self.k2 = float(self.dist_coeffs[0]), float(self.dist_coeffs[1])
+        if maps is None:
+            maps = cv2.initUndistortRectifyMap(self.camera_matrix, self.dist_coeffs, None,
+                                               self.camera_matrix, (w, h), cv2.CV_16SC2)
+        self.map1, self.map2 = maps
 
-        self.camera_matrix = np.array([[focal, 0, cx],
-                                       [0, focal, cy],
-                                       [0, 0, 1]], dtype=np.float32)
-        self.dist_coeffs = np.array([k1, k2, 0, 0, 0], dtype=np.float32)
-
-    def apply(self, frame: np.ndarray) -> np.ndarray:
+    def apply(self, frame: np.ndarray, dst: np.ndarray = None) -> np.ndarray:
         """
             Undistorts a given frame using stored distortion parameters.
         Args:
             frame (np.ndarray): Input distorted image/frame.
+            dst (np.ndarray, optional): Preallocated output frame of the same shape and dtype, written in place.
 
         Returns:
             np.ndarray: Undistorted output image.
         """
-        return cv2.undistort(frame, self.camera_matrix, self.dist_coeffs)
+        return cv2.remap(frame, self.map1, self.map2, cv2.INTER_LINEAR, dst=dst)
+
+
+def boxes_to_pixels(boxes, image_shape) -> np.ndarray:
+    """
+        Converts normalised (cx, cy, w, h) detection boxes, as returned by GroundingDINO,
+        to integer pixel (x1, y1, x2, y2) boxes clipped to the image.
+    Args:
+        boxes (array-like): N x 4 normalised boxes.
+        image_shape (tuple): Shape of the image the boxes refer to (height, width).
+    Returns:
+        np.ndarray: N x 4 int32 array of pixel boxes.
+    """
+    h, w = image_shape[:2]
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    centres = boxes[:, :2] * (w, h)
+    half_sizes = boxes[:, 2:] * (w / 2, h / 2)
+    xyxy = np.concatenate((centres - half_sizes, centres + half_sizes), axis=1)
+    np.clip(xyxy, 0, (w, h, w, h), out=xyxy)
+    return xyxy.astype(np.int32)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+    detection_cache.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        LRU cache of detections for recurring frames. Recordings return to the same bench states
+        again and again, e.g. an idle bench between procedures, so a frame that looks the same as
+        one already detected reuses its detections instead of running the model. Entries are also
+        keyed on the prompt, thresholds and frame size, so detections are only reused where the model
+        would be run the same way.
+
+        A frame's fingerprint is a small colour thumbnail and a perceptual hash of it. The hash is a
+        difference hash: the thumbnail is downscaled to (hash_size + 1) x hash_size grey levels and
+        each bit records whether a cell is brighter than its left neighbour. Cached frames whose hash
+        is within a small Hamming distance are candidates, and one is only reused if no pixel of its
+        thumbnail differs by more than max_difference levels. The hash alone is not enough: it hardly
+        changes as an object moves across a plain bench, which would reuse boxes from where the object
+        was. Downscaling averages away sensor noise, so repeats of a still scene still match.
+
+    Change History:
+        0.1: Created.
+        0.2: Matches are checked against a thumbnail of the cached frame, so moved objects are not
+            given their old boxes.
+"""
+from collections import Counter, OrderedDict
+import sys
+import threading
+from typing import Hashable, Optional, Tuple
+import cv2
+import numpy as np
+
+# (width, height) of the thumbnail cached frames are compared with, about 12 KB per frame
+THUMBNAIL_SIZE = (64, 64)
+
+
+def perceptual_hash(image: np.ndarray, hash_size: int = 16) -> int:
+    """
+        Difference hash of a frame.
+    Args:
+        image (np.ndarray): BGR or greyscale frame.
+        hash_size (int): Cells per side, the hash has hash_size ** 2 bits.
+    Returns:
+        int: The hash.
+    """
+    # Downscale before converting so only the tiny image is converted
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+
+
+def fingerprint(image: np.ndarray) -> Tuple[int, np.ndarray]:
+    """
+        Fingerprint a frame is cached and looked up by.
+    Args:
+        image (np.ndarray): BGR or greyscale frame.
+    Returns:
+        tuple: (perceptual hash of the thumbnail, thumbnail)
+    """
+    small = cv2.resize(image, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return perceptual_hash(small), small
+
+
+def _nbytes(value) -> int:
+    """
+        Approximate memory held by a cached result: arrays and tensors by their data, the rest by object size.
+    """
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class DetectionCache:
+    """
+        Bounded LRU cache of detections keyed on frame fingerprints. One frame is kept per hash, the
+        most recently cached. Cached detections are shared between callers and must not be modified.
+    Args:
+        max_entries (int): Most frames cached, the least recently used is dropped first.
+        max_distance (int): Most hash bits that may differ for a cached frame to be compared, 0 for
+            equal hashes only.
+        max_difference (int): Most any thumbnail pixel may differ, in levels, for a frame to reuse
+            cached detections.
+    """
+    def __init__(self, max_entries: int = 1024, max_distance: int = 4, max_difference: int = 4):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_difference = max_difference
+        # (key, hash) to (result, thumbnail, bytes), least recently used first
+        self.entries = OrderedDict()
+        # Key to the hashes cached for it, searched for near matches
+        self.hashes = {}
+        # "hits" and "misses"
+        self.lookups = Counter()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(image: np.ndarray) -> Tuple[int, np.ndarray]:
+        """
+            Returns a frame's fingerprint, see fingerprint.
+        """
+        return fingerprint(image)
+
+    def get(self, key: Hashable, frame: Tuple[int, np.ndarray]):
+        """
+            Looks up the detections of the closest cached frame that matches.
+        Args:
+            key (Hashable): Prompt, thresholds and frame size the detections were made with.
+            frame (tuple): The frame's fingerprint.
+        Returns:
+            The cached detections, or None on a miss.
+        """
+        with self.lock:
+            match = self._match(key, *frame)
+            if match is None:
+                self.lookups["misses"] += 1
+                return None
+            self.lookups["hits"] += 1
+            self.entries.move_to_end((key, match))
+            return self.entries[(key, match)][0]
+
+    def _match(self, key: Hashable, image_hash: int, small: np.ndarray) -> Optional[int]:
+        """
+            Returns the hash of the closest cached frame within max_distance whose thumbnail is within
+            max_difference of small. Called with the lock held.
+        """
+        candidates = []
+        for cached in self.hashes.get(key, ()):
+            distance = (image_hash ^ cached).bit_count()
+            if distance <= self.max_distance:
+                candidates.append((distance, cached))
+        for _, cached in sorted(candidates):
+            thumbnail = self.entries[(key, cached)][1]
+            if thumbnail.shape == small.shape and int(cv2.absdiff(thumbnail, small).max()) <= self.max_difference:
+                return cached
+        return None
+
+    def put(self, key: Hashable, frame: Tuple[int, np.ndarray], result) -> None:
+        """
+            Caches a frame's detections, dropping the least recently used frames over max_entries.
+        """
+        if self.max_entries <= 0:
+            return
+        image_hash, small = frame
+        with self.lock:
+            self.entries.pop((key, image_hash), None)
+            self.entries[(key, image_hash)] = (result, small, _nbytes(result) + small.nbytes)
+            self.hashes.setdefault(key, set()).add(image_hash)
+            while len(self.entries) > self.max_entries:
+                old_key, old_hash = self.entries.popitem(last=False)[0]
+                self.hashes[old_key].discard(old_hash)
+                if not self.hashes[old_key]:
+                    del self.hashes[old_key]
+
+    def clear(self) -> None:
+        """
+            Drops every entry and resets the counts.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hashes.clear()
+            self.lookups.clear()
+
+    def stats(self) -> dict:
+        """
+            Reports the cache's use.
+        Returns:
+            dict: {"entries", "max_entries", "max_distance", "max_difference", "hits", "misses", "hit_rate",
+                "bytes"}
+        """
+        with self.lock:
+            hits, misses = self.lookups["hits"], self.lookups["misses"]
+            return {"entries": len(self.entries), "max_entries": self.max_entries,
+                    "max_distance": self.max_distance, "max_difference": self.max_difference,
+                    "hits": hits, "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+                    "bytes": sum(size for _, _, size in self.entries.values())}
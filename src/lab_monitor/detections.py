@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+    detections.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.4
+
+    Description:
+        Per-frame detections sidecar, written as newline delimited JSON next to the event log
+        so detections can be inspected without rendering an annotated video.
+        Frames with the same detections as the frame before are delta encoded as {"frame": n}.
+
+    Change History:
+        0.1: Created.
+        0.2: State can be saved and restored for resumable jobs.
+        0.3: Record formatting shared with the batch image API.
+        0.4: Unchanged frames are delta encoded, added read_detections.
+"""
+import json
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from lab_monitor.checkpoint import open_log
+
+
+def format_detections(boxes, logits, phrases, precision: int = 4) -> dict:
+    """
+        Converts detections to a JSON serialisable record.
+    Args:
+        boxes (array-like): N x 4 normalised (cx, cy, w, h) boxes.
+        logits (array-like): N detection scores.
+        phrases (List[str]): N labels.
+        precision (int): Decimal places kept for boxes and scores.
+    Returns:
+        dict: {"boxes": ..., "scores": ..., "labels": ...}
+    """
+    return {
+        "boxes": np.round(np.asarray(boxes, dtype=np.float64).reshape(-1, 4), precision).tolist(),
+        "scores": np.round(np.asarray(logits, dtype=np.float64).reshape(-1), precision).tolist(),
+        "labels": list(phrases),
+    }
+
+
+class DetectionsWriter:
+    """
+        Writes one JSON line per frame with the detected boxes, scores and labels.
+    """
+    def __init__(self, path, precision: int = 4, resume_state: dict = None):
+        """
+        Args:
+            path (str): Path to the NDJSON sidecar file.
+            precision (int): Decimal places kept for boxes and scores.
+            resume_state (dict, optional): State from get_state to carry on an interrupted sidecar.
+        """
+        self.precision = precision
+        self.file = open_log(path, resume_state["log_offset"] if resume_state else None)
+        self.previous = resume_state.get("previous") if resume_state else None
+
+    def update(self, frame_number, boxes, logits, phrases) -> None:
+        """
+            Appends the detections for one frame, only the frame number when they have not changed.
+        Args:
+            frame_number (int): The current frame number in the video.
+            boxes (array-like): N x 4 normalised (cx, cy, w, h) boxes.
+            logits (array-like): N detection scores.
+            phrases (List[str]): N labels.
+        Returns:
+            None
+        """
+        detections = format_detections(boxes, logits, phrases, self.precision)
+        record = {"frame": frame_number} if detections == self.previous else {"frame": frame_number, **detections}
+        self.previous = detections
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def get_state(self) -> dict:
+        """
+            Returns the state needed to resume, flushing the file first.
+        Returns:
+            dict: The file offset and the last frame's detections.
+        """
+        self.file.flush()
+        return {"log_offset": self.file.tell(), "previous": self.previous}
+
+    def close(self):
+        """
+        Closes the sidecar file.
+        """
+        self.file.close()
+
+
+def read_detections(path, end_frame: Optional[int] = None) -> Iterator[Tuple[int, dict]]:
+    """
+        Reads a detections sidecar, expanding delta encoded frames.
+    Args:
+        path (str): Path to the NDJSON sidecar file.
+        end_frame (int, optional): Stop before this frame.
+    Yields:
+        tuple: (frame number, {"boxes": ..., "scores": ..., "labels": ...}) for every recorded frame.
+    """
+    detections = {"boxes": [], "scores": [], "labels": []}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            frame_number = record.pop("frame")
+            if end_frame is not None and frame_number >= end_frame:
+                return
+            if record:
+                detections = record
+            yield frame_number, detections
@@ -8,30 +8,68 @@
 
     Created: 24/06/2025
 
-    Version: 0.1
+    Version: 0.12
 
     Description:
         Contains a library of Dino Image transforms for use in pipeline
 
     Change History:
         0.1: Created.
+        0.2: Annotate frames in place with the native BoxAnnotator.
+        0.3: Added batched detection over several images in one forward pass.
+        0.4: Added a client backend that runs detection on a shared model server.
+        0.5: Converted checkpoints are memory-mapped instead of unpickled.
+        0.6: Added raw per-token scores output for threshold sweeps.
+        0.7: Added async detection on a bounded executor.
+        0.8: The intra-op thread count can be set for CPU budgeting.
+        0.9: Added an optional perceptual hash cache of detections for recurring frames.
+        0.10: A converted checkpoint is converted again if the original has been replaced.
+        0.11: Cached detections are looked up by frame fingerprint.
+        0.12: The size frames are resized to for the model can be set.
 """
+import os
 from typing import Tuple, List
 import cv2
 from PIL import Image
 import torch
 import numpy as np
-from groundingdino.util.inference import predict, annotate, load_model
+from groundingdino.models import build_model
+from groundingdino.util.inference import predict, load_model, preprocess_caption
+from groundingdino.util.slconfig import SLConfig
+from groundingdino.util.utils import get_phrases_from_posmap
 import groundingdino.datasets.transforms as T
+from lab_monitor.annotation import BoxAnnotator
+from lab_monitor.async_inference import BoundedExecutor
+from lab_monitor.detection_cache import DetectionCache
+from lab_monitor.weights import convert_checkpoint, converted_path, load_state_dict, source_changed
 
 
-class DinoProcess:
+# GroundingDINO's resize, frames are scaled so the short side is INPUT_SIZE and the long side at most MAX_INPUT_SIZE
+INPUT_SIZE = 800
+MAX_INPUT_SIZE = 1333
+
+
+class DinoProcess:  # pylint: disable=R0902
     """
         A class to handle image processing using GroundingDINO.
+        With a server_address the model is not loaded here, frames are sent to a model server instead
+        (see lab_monitor.model_server), and the server's text prompt is used.
+        With a detection cache, which is off by default, a frame that looks the same as one already
+        detected with the same prompt and thresholds returns the cached detections without running the model.
+        Frames are resized so their short side is input_size before detection, a smaller size is faster
+        but may miss small objects. The long side is capped in proportion. It only applies when the model
+        runs in this process.
     """
-    def __init__(self, device="cuda" if torch.cuda.is_available() else "cpu", text_prompt: str = None):
+    def __init__(self, device="cuda" if torch.cuda.is_available() else "cpu", text_prompt: str = None,
+                 server_address: str = None, cache: DetectionCache = None, input_size: int = INPUT_SIZE):
         self.device = device
+        self.input_size = input_size
         self.model = None
+        self.server_address = server_address
+        self.client = None
+        self.cache = cache
+        self.executor = None
+        self.annotator = BoxAnnotator()
         self.text_prompt = text_prompt or (
             "glass bottle, blue bottle cap, glass petri dish, empty petri dish, hand, circular glass dish"
         )
@@ -40,17 +78,43 @@ class DinoProcess:
                    model_config_path="/workspaces/GroundingDINO/groundingdino/config/GroundingDINO_SwinT_OGC.py",
                    model_checkpoint_path="../weights/groundingdino_swint_ogc.pth"):
         """
-            Explicitly loads the GroundingDINO model.
+            Explicitly loads the GroundingDINO model. If the checkpoint has been converted with
+            lab_monitor.weights, the converted weights are memory-mapped instead, after converting
+            again if the checkpoint has been replaced since.
         Args:
             model_config_path (str): Path to the model configuration file.
             model_checkpoint_path (str): Path to the model checkpoint file.
         """
+        if self.server_address:
+            # Imported here, it is only needed when the model runs on a server
+            from lab_monitor.model_client import ModelServerClient  # pylint: disable=C0415
+            self.client = ModelServerClient(self.server_address)
+            return
+        converted = converted_path(model_checkpoint_path)
+        if os.path.exists(converted) and source_changed(converted, model_checkpoint_path):
+            convert_checkpoint(model_checkpoint_path, converted)
+        if os.path.exists(converted):
+            args = SLConfig.fromfile(model_config_path)
+            args.device = self.device
+            model = build_model(args)
+            # assign keeps the memory-mapped tensors as the parameters rather than copying them
+            model.load_state_dict(load_state_dict(converted), strict=False, assign=True)
+            self.model = model.eval()
+            return
         self.model = load_model(
             model_config_path=model_config_path,
             model_checkpoint_path=model_checkpoint_path,
             device=self.device
         )
 
+    def set_num_threads(self, threads: int) -> None:
+        """
+            Sets torch's intra-op thread count. Call it from the thread that runs the model.
+        Args:
+            threads (int): Threads for each forward pass.
+        """
+        torch.set_num_threads(threads)
+
     def _transform(self, cv_image: np.array) -> torch.Tensor:
         """
             Transforms a CV image to a tensor suitable for GroundingDINO.
@@ -61,7 +125,7 @@ class DinoProcess:
         """
         transform = T.Compose(
             [
-                T.RandomResize([800], max_size=1333),
+                T.RandomResize([self.input_size], max_size=round(self.input_size * MAX_INPUT_SIZE / INPUT_SIZE)),
                 T.ToTensor(),
                 T.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225]),
             ]
@@ -82,6 +146,29 @@ class DinoProcess:
         Returns:
             Tuple[np.ndarray, np.ndarray, List[str]]: Detected boxes, logits, and phrases.
         """
+        if self.cache is None:
+            return self._predict(cv_image, box_threshold, text_threshold)
+        key = self._cache_key(cv_image, box_threshold, text_threshold)
+        frame = self.cache.fingerprint(cv_image)
+        result = self.cache.get(key, frame)
+        if result is None:
+            result = self._predict(cv_image, box_threshold, text_threshold)
+            self.cache.put(key, frame, result)
+        return result
+
+    def _cache_key(self, cv_image: np.array, box_threshold: float, text_threshold: float) -> tuple:
+        """
+        Returns what the cached detections of a frame depend on besides the frame itself.
+        """
+        return self.text_prompt, box_threshold, text_threshold, cv_image.shape[:2], self.input_size
+
+    def _predict(self, cv_image: np.array, box_threshold: float,
+                 text_threshold: float) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Runs the model, or the model server, on one image.
+        """
+        if self.client is not None:
+            return self.client.process_image(cv_image, box_threshold, text_threshold)
         if self.model is None:
             raise RuntimeError("Model not loaded. Call load_model() first.")
         image_transformed = self._transform(cv_image)
@@ -94,21 +181,134 @@ class DinoProcess:
         )
         return boxes, logits, phrases
 
+    def process_batch(self, cv_images: List[np.array],
+                      box_threshold: float = 0.35,
+                      text_threshold: float = 0.25) -> List[Tuple[torch.Tensor, torch.Tensor, List[str]]]:
+        """
+        Processes several images in a single forward pass. Images of different sizes are padded and
+        masked by the model, so batches of one resolution waste the least work.
+        Args:
+            cv_images (List[np.array]): Input images in OpenCV format (BGR).
+            box_threshold (float): Threshold for box detection.
+            text_threshold (float): Threshold for text detection.
+        Returns:
+            List[Tuple[torch.Tensor, torch.Tensor, List[str]]]: Detected boxes, logits, and phrases for each image,
+                the same as process_image would return.
+        """
+        if self.cache is None:
+            return self._predict_batch(cv_images, box_threshold, text_threshold)
+        keys = [self._cache_key(cv_image, box_threshold, text_threshold) for cv_image in cv_images]
+        frames = [self.cache.fingerprint(cv_image) for cv_image in cv_images]
+        results = [self.cache.get(key, frame) for key, frame in zip(keys, frames)]
+        misses = [index for index, result in enumerate(results) if result is None]
+        # Only the frames not in the cache are run through the model
+        detected = self._predict_batch([cv_images[index] for index in misses], box_threshold, text_threshold)
+        for index, result in zip(misses, detected):
+            self.cache.put(keys[index], frames[index], result)
+            results[index] = result
+        return results
+
+    def _predict_batch(self, cv_images: List[np.array], box_threshold: float,
+                       text_threshold: float) -> List[Tuple[torch.Tensor, torch.Tensor, List[str]]]:
+        """
+        Runs the model, or the model server, on a batch of images.
+        """
+        if self.client is not None:
+            return [self.client.process_image(cv_image, box_threshold, text_threshold) for cv_image in cv_images]
+        if self.model is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if not cv_images:
+            return []
+        pred_logits, pred_boxes, tokenized, tokenizer = self._forward(cv_images)
+        results = []
+        for prediction_logits, prediction_boxes in zip(pred_logits, pred_boxes):
+            mask = prediction_logits.max(dim=1)[0] > box_threshold
+            logits = prediction_logits[mask]
+            phrases = [
+                get_phrases_from_posmap(logit > text_threshold, tokenized, tokenizer).replace('.', '')
+                for logit in logits
+            ]
+            results.append((prediction_boxes[mask], logits.max(dim=1)[0], phrases))
+        return results
+
+    def _async_executor(self) -> BoundedExecutor:
+        """
+        Returns the executor async detections run on, one thread as the model runs one forward pass at a time.
+        """
+        if self.executor is None:
+            self.executor = BoundedExecutor(max_workers=1, name="dino")
+        return self.executor
+
+    async def process_image_async(self, cv_image: np.array, box_threshold: float = 0.35,
+                                  text_threshold: float = 0.25) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Awaitable process_image, run on a dedicated bounded executor so the event loop is not blocked.
+        Raises:
+            ExecutorBusy: If too many detections are already waiting.
+        """
+        return await self._async_executor().run(self.process_image, cv_image, box_threshold, text_threshold)
+
+    async def process_batch_async(self, cv_images: List[np.array], box_threshold: float = 0.35,
+                                  text_threshold: float = 0.25) -> List[Tuple[torch.Tensor, torch.Tensor, List[str]]]:
+        """
+        Awaitable process_batch, run on the same executor as process_image_async.
+        Raises:
+            ExecutorBusy: If too many detections are already waiting.
+        """
+        return await self._async_executor().run(self.process_batch, cv_images, box_threshold, text_threshold)
+
+    def _forward(self, cv_images: List[np.array]):
+        """
+        Runs the model on a batch of images.
+        Returns:
+            tuple: Token scores (B x Q x 256), boxes (B x Q x 4), the tokenized caption and the tokenizer.
+        """
+        caption = preprocess_caption(caption=self.text_prompt)
+        model = self.model.to(self.device)
+        images = [self._transform(cv_image).to(self.device) for cv_image in cv_images]
+        with torch.no_grad():
+            outputs = model(images, captions=[caption] * len(images))
+        tokenizer = model.tokenizer
+        return outputs["pred_logits"].cpu().sigmoid(), outputs["pred_boxes"].cpu(), tokenizer(caption), tokenizer
+
+    def process_raw(self, cv_images: List[np.array],
+                    box_threshold: float = 0.05) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], List[str]]:
+        """
+        Processes several images in a single forward pass, keeping every box above a low threshold with
+        its score for each caption token, so box and text thresholds can be applied afterwards without
+        running the model again (see lab_monitor.sweep).
+        Args:
+            cv_images (List[np.array]): Input images in OpenCV format (BGR).
+            box_threshold (float): Lowest box threshold that will be applied afterwards.
+        Returns:
+            Tuple[List[Tuple[np.ndarray, np.ndarray]], List[str]]: For each image the N x 4 boxes and N x T
+                token scores, and the T caption tokens.
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if not cv_images:
+            return [], []
+        pred_logits, pred_boxes, tokenized, tokenizer = self._forward(cv_images)
+        tokens = tokenizer.convert_ids_to_tokens(tokenized["input_ids"])
+        results = []
+        for prediction_logits, prediction_boxes in zip(pred_logits, pred_boxes):
+            mask = prediction_logits.max(dim=1)[0] > box_threshold
+            results.append((prediction_boxes[mask].numpy(), prediction_logits[mask][:, :len(tokens)].numpy()))
+        return results, tokens
+
     def annotate_image(self, cv_image: np.array, boxes: np.ndarray,
                        logits: np.ndarray, phrases: List[str]) -> np.ndarray:
         """
-        Annotates the input image with detected boxes and phrases.
+        Annotates the input image with detected boxes and phrases. The image is drawn on in place.
         Args:
             cv_image (np.array): Input image in OpenCV format (BGR).
             boxes (np.ndarray): Detected boxes from GroundingDINO.
             logits (np.ndarray): Logits corresponding to the boxes.
             phrases (List[str]): Phrases corresponding to the boxes.
         Returns:
-            np.ndarray: Annotated image with boxes and phrases.
+            np.ndarray: The same BGR image, annotated with boxes and phrases.
         """
-        annotated_frame = annotate(image_source=cv_image, boxes=boxes,
-                                   logits=logits, phrases=phrases)
-        return annotated_frame
+        return self.annotator.annotate(cv_image, boxes, logits, phrases)
 
     GROUP_MAP = {
         "hand": "hand",
@@ -128,3 +328,14 @@ class DinoProcess:
             str: The mapped group label or the original phrase if no mapping exists."""
         phrase = phrase.strip().lower()
         return self.GROUP_MAP.get(phrase, phrase)
+
+    def close(self) -> None:
+        """
+        Disconnects from the model server, if one is used, and stops the async executor.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.client is not None:
+            self.client.close()
+            self.client = None
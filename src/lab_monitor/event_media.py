@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+    event_media.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Captures a downscaled JPEG thumbnail, and optionally a short clip, around each event
+        while a video is being processed, so events can be reviewed without the full video.
+
+    Change History:
+        0.1: Created.
+        0.2: Downscaled frames have even dimensions, which yuv420p clips need.
+"""
+from collections import deque
+from pathlib import Path
+import re
+import cv2
+import numpy as np
+from lab_monitor.video_writers import create_video_writer
+
+
+def media_name(frame_number: int, action: str) -> str:
+    """
+        Returns the file name, without extension, of the media for an event.
+    Args:
+        frame_number (int): Frame number of the event.
+        action (str): Event description, e.g. "hand touches petri dish".
+    Returns:
+        str: e.g. "00000042_hand_touches_petri_dish".
+    """
+    return f"{frame_number:08d}_{re.sub(r'[^a-z0-9]+', '_', action.lower()).strip('_')}"
+
+
+class EventMediaRecorder:  # pylint: disable=R0902
+    """
+        Writes a thumbnail and optional clip for each event from the frames the pipeline already decodes.
+        Clips are centred on the event, the frames before it come from a ring buffer of downscaled frames.
+    """
+    def __init__(self, media_dir, fps: float, max_width: int = 320,  # pylint: disable=R0917
+                 jpeg_quality: int = 80, clip_seconds: float = None, encoder_settings: dict = None):
+        """
+        Args:
+            media_dir (str): Directory the thumbnails and clips are written to.
+            fps (float): Video frames per second, used for the clip length and frame rate.
+            max_width (int): Frames wider than this are downscaled to it, keeping the aspect ratio.
+            jpeg_quality (int): JPEG quality of the thumbnails, 0 to 100.
+            clip_seconds (float, optional): Length of the clip around each event. No clips are written when not given.
+            encoder_settings (dict, optional): Keyword arguments for create_video_writer for the clips.
+        """
+        self.media_dir = Path(media_dir)
+        self.media_dir.mkdir(parents=True, exist_ok=True)
+        self.fps = fps
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.encoder_settings = {**(encoder_settings or {}), "threaded": False}
+        half = int(round((clip_seconds or 0) * fps / 2))
+        self.clip_frames = (half, half) if clip_seconds else None
+        self.recent = deque(maxlen=max(half, 1))
+        self.pending = []
+        self.clips = []
+
+    def mark(self, frame_number: int, timestamp: float, action: str) -> None:  # pylint: disable=W0613
+        """
+            Records an event, its media is written when its frame is passed to update.
+            Has the same signature as OverlapEventTracker's on_event callback.
+        """
+        self.pending.append(media_name(frame_number, action))
+
+    def downscale(self, frame: np.ndarray) -> np.ndarray:
+        """
+            Returns a copy of the frame no wider than max_width. Both dimensions are rounded down to even
+            numbers, as yuv420p, which the clips are encoded in, cannot hold odd ones.
+        """
+        height, width = frame.shape[:2]
+        scale = min(self.max_width / width, 1.0)
+        size = (max(int(round(width * scale)) // 2 * 2, 2), max(int(round(height * scale)) // 2 * 2, 2))
+        if size == (width, height):
+            return frame.copy()
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def update(self, frame_number: int, frame: np.ndarray) -> None:  # pylint: disable=W0613
+        """
+            Writes the media of the events marked on this frame and adds the frame to open clips.
+        Args:
+            frame_number (int): The current frame number in the video.
+            frame (np.ndarray): The BGR frame, it is not modified or kept.
+        """
+        if not (self.pending or self.clip_frames):
+            return
+        small = self.downscale(frame)
+        for name in self.pending:
+            cv2.imwrite(str(self.media_dir / f"{name}.jpg"), small, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if self.clip_frames:
+                writer = create_video_writer(str(self.media_dir / f"{name}.mp4"), self.fps,
+                                             (small.shape[1], small.shape[0]), **self.encoder_settings)
+                for recent in self.recent:
+                    writer.write(recent)
+                self.clips.append([writer, self.clip_frames[1] + 1])
+        self.pending.clear()
+
+        for clip in self.clips:
+            clip[0].write(small)
+            clip[1] -= 1
+            if clip[1] == 0:
+                clip[0].release()
+        self.clips = [clip for clip in self.clips if clip[1] > 0]
+        if self.clip_frames:
+            self.recent.append(small)
+
+    def close(self) -> None:
+        """
+            Finishes any clips still open at the end of the video.
+        """
+        for writer, _ in self.clips:
+            writer.release()
+        self.clips = []
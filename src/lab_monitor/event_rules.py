@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+    event_rules.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Declarative interaction rules for the event tracker and the uniform grid used to find
+        which detected objects are close enough to be worth testing for overlap.
+
+        A rules file is JSON of the form
+            {"rules": [{"objects": ["hand", "bottle"], "start": "hand touches bottle", "end": "hand releases bottle"}]}
+        where "start" is logged when the two objects begin to overlap and "end", if given, when they stop.
+
+    Change History:
+        0.1: Created.
+        0.2: Grid cells are sized from valid boxes only and a box covers a bounded number of cells.
+"""
+import json
+import math
+import os
+from typing import List, Optional, Set, Tuple
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "event_rules.json")
+# Most grid cells a box spans along each side, so a box much larger than the average stays cheap to bin
+MAX_CELLS_PER_SIDE = 8
+
+
+def load_rules(path: Optional[str] = None) -> List[dict]:
+    """
+        Loads and validates interaction rules.
+    Args:
+        path (str, optional): Path to a rules file, the bundled lab rules when not given.
+    Returns:
+        List[dict]: Rules in file order, each {"pair": (class, class), "start": str, "end": str or None}
+            with lower case class names.
+    """
+    with open(path or DEFAULT_RULES_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rules, seen = [], set()
+    for rule in data.get("rules", []):
+        objects = rule.get("objects", [])
+        if len(objects) != 2 or not rule.get("start"):
+            raise ValueError(f"Each rule needs two objects and a start message, got {rule}.")
+        pair = (objects[0].lower(), objects[1].lower())
+        if pair in seen:
+            raise ValueError(f"Duplicate rule for {pair}.")
+        seen.add(pair)
+        rules.append({"pair": pair, "start": rule["start"], "end": rule.get("end")})
+    return rules
+
+
+def candidate_pairs(extents: List[Tuple[float, float, float, float]]) -> Set[Tuple[int, int]]:
+    """
+        Finds the pairs of boxes that may overlap by binning them into a uniform grid sized to the
+        average box, so only boxes sharing a cell are paired. Every pair of boxes with a positive
+        area intersection is returned, along with some that merely share a cell. Boxes with x2 < x1
+        or y2 < y1 cannot overlap anything and are left out.
+    Args:
+        extents (list): (x1, y1, x2, y2) boxes.
+    Returns:
+        set: (i, j) index pairs with i < j.
+    """
+    valid = [(index, extent) for index, extent in enumerate(extents)
+             if extent[2] >= extent[0] and extent[3] >= extent[1]]
+    if len(valid) < 2:
+        return set()
+    sides = [max(x2 - x1, y2 - y1) for _, (x1, y1, x2, y2) in valid]
+    cell = max(sum(sides) / len(sides), max(sides) / MAX_CELLS_PER_SIDE)
+    if not cell > 0:
+        cell = 1.0
+    grid = {}
+    for index, (x1, y1, x2, y2) in valid:
+        for cx in range(math.floor(x1 / cell), math.floor(x2 / cell) + 1):
+            for cy in range(math.floor(y1 / cell), math.floor(y2 / cell) + 1):
+                grid.setdefault((cx, cy), []).append(index)
+    pairs = set()
+    for members in grid.values():
+        for a, first in enumerate(members):
+            for second in members[a + 1:]:
+                pairs.add((first, second))
+    return pairs
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+    event_store.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Indexed SQLite store of the events emitted by every job, so events can be queried
+        and counted across jobs without downloading and parsing each job's CSV log.
+
+    Change History:
+        0.1: Created.
+"""
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    frame INTEGER NOT NULL,
+    video_time REAL NOT NULL,
+    action TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_job ON events (job_id, frame);
+CREATE INDEX IF NOT EXISTS idx_events_action ON events (action, created_at);
+CREATE INDEX IF NOT EXISTS idx_events_created ON events (created_at);
+"""
+
+GROUP_COLUMNS = {"action": "action", "job": "job_id"}
+
+
+class EventStore:
+    """
+        Thread safe event store backed by a single SQLite file.
+    Args:
+        path (str): Path of the database file, ":memory:" for a temporary store.
+    """
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            # Write-ahead logging lets queries run while jobs are adding events
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+
+    def add(self, job_id: str, frame: int, video_time: float, action: str,
+            created_at: Optional[float] = None) -> None:
+        """
+            Records an event.
+        Args:
+            job_id (str): Job the event belongs to.
+            frame (int): Frame number the event happened on.
+            video_time (float): Time of the event in the video, in seconds.
+            action (str): Event description, as written to the CSV log.
+            created_at (float, optional): Unix time the event was recorded, now by default.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO events (job_id, frame, video_time, action, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, frame, video_time, action, time.time() if created_at is None else created_at)
+            )
+
+    def delete_job(self, job_id: str, from_frame: int = 0) -> None:
+        """
+            Removes a job's events, e.g. those after a checkpoint that a resumed job will emit again.
+        Args:
+            job_id (str): Job whose events are removed.
+            from_frame (int): Only remove events on or after this frame.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM events WHERE job_id = ? AND frame >= ?", (job_id, from_frame))
+
+    @staticmethod
+    def _where(job_id: Optional[str] = None, action: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None):
+        """
+            Builds the WHERE clause and parameters for the given filters.
+        """
+        clauses, params = [], []
+        for clause, value in (("job_id = ?", job_id), ("action = ?", action),
+                              ("created_at >= ?", since), ("created_at < ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, job_id: Optional[str] = None, action: Optional[str] = None,  # pylint: disable=R0917
+              since: Optional[float] = None, until: Optional[float] = None,
+              limit: int = 100, offset: int = 0) -> List[dict]:
+        """
+            Returns the events matching the filters, oldest first.
+        Args:
+            job_id (str, optional): Only events of this job.
+            action (str, optional): Only events with this action.
+            since (float, optional): Only events recorded at or after this Unix time.
+            until (float, optional): Only events recorded before this Unix time.
+            limit (int): Page size.
+            offset (int): Number of matching events to skip.
+        Returns:
+            List[dict]: Events with job_id, frame, video_time, action and created_at.
+        """
+        where, params = self._where(job_id, action, since, until)
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT job_id, frame, video_time, action, created_at FROM events{where} "
+                "ORDER BY created_at, id LIMIT ? OFFSET ?", (*params, limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, job_id: Optional[str] = None, action: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """
+            Counts the events matching the filters.
+        Returns:
+            int: Number of matching events.
+        """
+        where, params = self._where(job_id, action, since, until)
+        with self.lock:
+            return self.connection.execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+
+    def counts(self, group_by: str = "action", job_id: Optional[str] = None,  # pylint: disable=R0917
+               action: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None) -> dict:
+        """
+            Counts the events matching the filters per action or per job.
+        Args:
+            group_by (str): "action" or "job".
+        Returns:
+            dict: Action or job id to number of events.
+        """
+        column = GROUP_COLUMNS.get(group_by)
+        if column is None:
+            raise ValueError(f"Unknown grouping '{group_by}', expected one of {tuple(GROUP_COLUMNS)}.")
+        where, params = self._where(job_id, action, since, until)
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {column}, COUNT(*) FROM events{where} GROUP BY {column} ORDER BY {column}", params
+            ).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def close(self) -> None:
+        """
+            Closes the database.
+        """
+        with self.lock:
+            self.connection.close()
@@ -8,7 +8,7 @@
 
     Created: 24/06/2025
 
-    Version: 0.1
+    Version: 0.6
 
     Description:
         Rudimentary event tracker for detecting overlaps
@@ -16,46 +16,60 @@
 
     Change History:
         0.1: Created.
+        0.2: Use run-length encoded mask intersection when masks are available.
+        0.3: State can be saved and restored for resumable jobs.
+        0.4: Events can also be passed to a callback as they are emitted.
+        0.5: Rules are loaded from a config file and candidate pairs come from a spatial grid.
+        0.6: pairs_to_track follows the start messages.
 """
+from typing import Optional
+from lab_monitor.checkpoint import open_log
+from lab_monitor.event_rules import candidate_pairs, load_rules
+from lab_monitor.rle_mask import RLEMask
 
 
 class OverlapEventTracker:
     """
         A class to track overlapping events between pairs of objects in a video stream.
     """
-    def __init__(self, log_path, fps):
+    def __init__(self, log_path, fps, resume_state: dict = None, on_event=None,  # pylint: disable=R0917
+                 rules_path: str = None):
         """
         Args:
             log_path (str): Path to the log file.
             fps (float): Video frames per second to convert frame number to seconds.
+            resume_state (dict, optional): State from get_state to carry on an interrupted log.
+            on_event (callable, optional): Called with (frame_number, timestamp, action) for every event logged.
+            rules_path (str, optional): Path to an interaction rules file, the bundled lab rules when not given.
         """
         self.fps = fps
+        self.on_event = on_event
+
+        rules = load_rules(rules_path)
+        # In rule order, which pairs_to_track follows
+        self.start_messages = {rule["pair"]: rule["start"] for rule in rules}
+        self.end_messages = {rule["pair"]: rule["end"] for rule in rules if rule["end"]}
+        # Class to the rules it takes part in, as (pair, position of the class in the pair)
+        self.rules_by_class = {}
+        for pair in self.pairs_to_track:
+            for position, label in enumerate(pair):
+                self.rules_by_class.setdefault(label, []).append((pair, position))
 
-        self.pairs_to_track = [
-            ("hand", "petri dish"),
-            ("hand", "bottle"),
-            ("bottle cap", "bottle"),
-            ("bottle", "petri dish")
-        ]
-
-        self.start_messages = {
-            ("hand", "petri dish"): "hand touches petri dish",
-            ("hand", "bottle"): "hand touches bottle",
-            ("bottle cap", "bottle"): "bottle cap is placed on bottle",
-            ("bottle", "petri dish"): "bottle is poured into petri dish",
-        }
-        self.end_messages = {
-            ("hand", "petri dish"): "hand releases petri dish",
-            ("hand", "bottle"): "hand releases bottle",
-            ("bottle cap", "bottle"): "bottle cap is removed from bottle",
-        }
-
-        self.pairs_to_track = [(a.lower(), b.lower()) for a, b in self.pairs_to_track]
         self.current_overlaps = set()
-        self.log_file = open(log_path, "w", encoding="utf-8")  # pylint: disable=R1732
+        self.log_file = open_log(log_path, resume_state["log_offset"] if resume_state else None)
 
-        # Write CSV header
-        self.log_file.write("frame,timestamp,action\n")
+        if resume_state:
+            self.current_overlaps = {tuple(pair) for pair in resume_state["current_overlaps"]}
+        else:
+            # Write CSV header
+            self.log_file.write("frame,timestamp,action\n")
+
+    @property
+    def pairs_to_track(self) -> list:
+        """
+            Returns the tracked class pairs in rule order.
+        """
+        return list(self.start_messages)
 
     def boxes_overlap(self, box1, box2) -> bool:
         """
@@ -74,43 +88,114 @@ class OverlapEventTracker:
         inter_height = max(0, y_b - y_a)
         return inter_width > 0 and inter_height > 0
 
-    def update(self, frame_number, detected_objects) -> None:
+    def masks_overlap(self, mask1: RLEMask, mask2: RLEMask) -> bool:
+        """
+            Checks if two run-length encoded masks share any pixel.
+        Args:
+            mask1 (RLEMask): First object mask.
+            mask2 (RLEMask): Second object mask.
+        Returns:
+            bool: True if masks overlap, False otherwise.
+        """
+        return mask1.intersects(mask2)
+
+    def objects_overlap(self, box1, box2, mask1: Optional[RLEMask] = None, mask2: Optional[RLEMask] = None) -> bool:
+        """
+            Checks if two objects overlap, using their masks when both are available
+            and falling back to their bounding boxes otherwise.
+        Args:
+            box1 (tuple): Bounding box of the first object.
+            box2 (tuple): Bounding box of the second object.
+            mask1 (RLEMask, optional): Mask of the first object.
+            mask2 (RLEMask, optional): Mask of the second object.
+        Returns:
+            bool: True if the objects overlap, False otherwise.
+        """
+        if mask1 is not None and mask2 is not None:
+            return self.masks_overlap(mask1, mask2)
+        return self.boxes_overlap(box1, box2)
+
+    def update(self, frame_number, detected_objects, detected_masks=None) -> None:
         """
             Updates the tracker with the current frame number and detected objects.
         Args:
             frame_number (int): The current frame number in the video.
             detected_objects (dict): A dictionary where keys are object names and values are lists of bounding boxes.
                 Example: {'hand': [(x1, y1, x2, y2), ...], 'bottle': [(x1, y1, x2, y2), ...]}
+            detected_masks (dict, optional): Masks keyed like detected_objects, each list aligned with the
+                boxes. Entries may be None where no mask is available for that box.
+                Example: {'hand': [RLEMask, ...], 'bottle': [None, ...]}
         Returns:
             None
         """
+        objects = self._tracked_objects(detected_objects, detected_masks or {})
         new_overlaps = set()
-        for (obj1, obj2) in self.pairs_to_track:
-            boxes1 = detected_objects.get(obj1, [])
-            boxes2 = detected_objects.get(obj2, [])
-            for b1 in boxes1:
-                for b2 in boxes2:
-                    if self.boxes_overlap(b1, b2):
-                        new_overlaps.add((obj1, obj2))
-                        break
+        for i, j in sorted(candidate_pairs([extent for _, _, _, extent in objects])):
+            label1, box1, mask1, extent1 = objects[i]
+            label2, box2, mask2, extent2 = objects[j]
+            for pair, position in self.rules_by_class[label1]:
+                if pair in new_overlaps or pair[1 - position] != label2:
+                    continue
+                # The extents contain both the boxes and the masks, so objects whose extents
+                # do not overlap cannot overlap and the mask test can be skipped.
+                if self.boxes_overlap(extent1, extent2) and self.objects_overlap(box1, box2, mask1, mask2):
+                    new_overlaps.add(pair)
 
         started = new_overlaps - self.current_overlaps
         ended = self.current_overlaps - new_overlaps
 
         timestamp = frame_number / self.fps
 
-        for pair in started:
-            msg = self.start_messages.get(pair)
-            if msg:
-                self.log_file.write(f"{frame_number},{timestamp:.3f},{msg}\n")
-        for pair in ended:
-            msg = self.end_messages.get(pair)
-            if msg:
-                self.log_file.write(f"{frame_number},{timestamp:.3f},{msg}\n")
+        # Events are logged in rule order, so simultaneous events always come out in the same order
+        for pair, message in self.start_messages.items():
+            if pair in started:
+                self._log(frame_number, timestamp, message)
+        for pair in self.start_messages:
+            if pair in ended and pair in self.end_messages:
+                self._log(frame_number, timestamp, self.end_messages[pair])
 
         self.log_file.flush()
         self.current_overlaps = new_overlaps
 
+    def _tracked_objects(self, detected_objects, detected_masks) -> list:
+        """
+            Collects the objects of classes that appear in a rule.
+        Returns:
+            list: (label, box, mask, extent) per object, the extent is the box grown to contain the mask.
+        """
+        objects = []
+        for label in self.rules_by_class:
+            masks = detected_masks.get(label, [])
+            for i, box in enumerate(detected_objects.get(label, [])):
+                mask = masks[i] if i < len(masks) else None
+                extent = tuple(float(v) for v in box[:4])
+                mask_box = mask.bbox() if mask is not None else None
+                if mask_box is not None:
+                    extent = (min(extent[0], mask_box[0]), min(extent[1], mask_box[1]),
+                              max(extent[2], mask_box[2]), max(extent[3], mask_box[3]))
+                objects.append((label, box, mask, extent))
+        return objects
+
+    def _log(self, frame_number: int, timestamp: float, action: str) -> None:
+        """
+            Writes an event to the log and passes it to the on_event callback.
+        """
+        self.log_file.write(f"{frame_number},{timestamp:.3f},{action}\n")
+        if self.on_event:
+            self.on_event(frame_number, round(timestamp, 3), action)
+
+    def get_state(self) -> dict:
+        """
+            Returns the tracker state needed to resume, flushing the log first.
+        Returns:
+            dict: The overlaps in progress and the log file offset.
+        """
+        self.log_file.flush()
+        return {
+            "current_overlaps": sorted(list(pair) for pair in self.current_overlaps),
+            "log_offset": self.log_file.tell(),
+        }
+
     def close(self):
         """
         Closes the log file.
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""
+    fill_estimation.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Liquid fill estimation for petri dishes and bottles. Pixels inside each detection
+        box are thresholded in HSV with per-channel lookup tables, giving a fill percentage
+        per object, and the attenuation of the liquid against the surrounding background
+        gives a Beer-Lambert depth estimate. Results are written as a CSV time series.
+
+    Change History:
+        0.1: Created.
+        0.2: State can be saved and restored for resumable jobs.
+"""
+import math
+from collections import OrderedDict
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+from lab_monitor.checkpoint import open_log
+
+
+def beer_lambert_depth(intensity: float, background_intensity: float, k: float = 1.0) -> float:
+    """
+        Estimates liquid depth from its attenuation of the background,
+        depth = -ln(intensity / background_intensity) / k.
+    Args:
+        intensity (float): Mean intensity seen through the liquid.
+        background_intensity (float): Mean intensity of the unobstructed background.
+        k (float): Attenuation coefficient, determined experimentally.
+    Returns:
+        float: Estimated depth, in the units of 1 / k. Zero if the liquid is brighter than the background.
+    """
+    if intensity <= 0 or background_intensity <= 0 or intensity >= background_intensity:
+        return 0.0
+    return -math.log(intensity / background_intensity) / k
+
+
+class FillLevelEstimator:
+    """
+        Estimates how full each detected petri dish and bottle is on every frame.
+        Petri dishes report the fraction of their inscribed ellipse covered by liquid,
+        bottles report the height of the liquid column as a fraction of the box height.
+    """
+    # (lower, upper) HSV bounds per object, found with experiments/manual_hsv_tuner.py.
+    # A lower hue above the upper hue wraps around red.
+    DEFAULT_HSV_RANGES = {
+        "petri dish": ((20, 25, 60), (45, 255, 255)),
+        "bottle": ((18, 25, 40), (45, 255, 255)),
+    }
+
+    def __init__(self, log_path, fps, hsv_ranges: dict = None, attenuation: float = 1.0,  # pylint: disable=R0917
+                 row_fill_threshold: float = 0.3, max_cached_shapes: int = 64, resume_state: dict = None):
+        """
+        Args:
+            log_path (str): Path to the fill level CSV file.
+            fps (float): Video frames per second to convert frame number to seconds.
+            hsv_ranges (dict, optional): Object label to ((h, s, v) lower, (h, s, v) upper) bounds.
+            attenuation (float): Beer-Lambert attenuation coefficient k.
+            row_fill_threshold (float): Fraction of a bottle row that must be liquid to count as filled.
+            max_cached_shapes (int): Number of petri dish ellipse masks to keep cached.
+            resume_state (dict, optional): State from get_state to carry on an interrupted log.
+        """
+        self.fps = fps
+        self.attenuation = attenuation
+        self.row_fill_threshold = row_fill_threshold
+        self.max_cached_shapes = max_cached_shapes
+        self.luts = {label: self._build_lut(lower, upper)
+                     for label, (lower, upper) in (hsv_ranges or self.DEFAULT_HSV_RANGES).items()}
+        self._ellipses = OrderedDict()
+
+        self.log_file = open_log(log_path, resume_state["log_offset"] if resume_state else None)
+        if not resume_state:
+            self.log_file.write("frame,timestamp,object,index,fill_pct,depth\n")
+
+    @staticmethod
+    def _build_lut(lower, upper) -> np.ndarray:
+        """
+            Builds a 1 x 256 x 3 lookup table that maps each HSV channel value to 1 when in range.
+        Args:
+            lower (tuple): Lower (h, s, v) bounds, inclusive.
+            upper (tuple): Upper (h, s, v) bounds, inclusive.
+        Returns:
+            np.ndarray: Lookup table for cv2.LUT.
+        """
+        values = np.arange(256)
+        lut = np.zeros((1, 256, 3), dtype=np.uint8)
+        for channel, (low, high) in enumerate(zip(lower, upper)):
+            if low <= high:
+                lut[0, :, channel] = (values >= low) & (values <= high)
+            else:
+                lut[0, :, channel] = (values >= low) | (values <= high)
+        return lut
+
+    def _ellipse(self, height: int, width: int) -> np.ndarray:
+        """
+            Returns a cached mask of the ellipse inscribed in a box of the given size.
+        Args:
+            height (int): Box height in pixels.
+            width (int): Box width in pixels.
+        Returns:
+            np.ndarray: uint8 mask with 1 inside the ellipse.
+        """
+        key = (height, width)
+        mask = self._ellipses.get(key)
+        if mask is None:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.ellipse(mask, (width // 2, height // 2), (max(width // 2, 1), max(height // 2, 1)),
+                        0, 0, 360, 1, thickness=cv2.FILLED)
+            self._ellipses[key] = mask
+            if len(self._ellipses) > self.max_cached_shapes:
+                self._ellipses.popitem(last=False)
+        else:
+            self._ellipses.move_to_end(key)
+        return mask
+
+    def measure(self, frame: np.ndarray, box, label: str) -> Optional[Tuple[float, float]]:
+        """
+            Measures the fill of one object. Only the pixels inside the box are converted and thresholded.
+        Args:
+            frame (np.ndarray): Full BGR frame.
+            box (tuple): Pixel box (x1, y1, x2, y2).
+            label (str): Mapped object label, selects the HSV range and fill model.
+        Returns:
+            tuple: (fill percentage, Beer-Lambert depth), or None if the label has no HSV range or the box is empty.
+        """
+        lut = self.luts.get(label)
+        x1, y1, x2, y2 = (int(v) for v in box)
+        if lut is None or x2 <= x1 or y2 <= y1:
+            return None
+
+        hsv = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2HSV)
+        h, s, v = cv2.split(cv2.LUT(hsv, lut))
+        liquid = cv2.bitwise_and(cv2.bitwise_and(h, s), v)
+
+        if label == "bottle":
+            row_counts = cv2.reduce(liquid, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+            filled_rows = np.flatnonzero(row_counts >= self.row_fill_threshold * liquid.shape[1])
+            fill_pct = 0.0
+            if filled_rows.size:
+                fill_pct = 100.0 * float(liquid.shape[0] - filled_rows[0]) / liquid.shape[0]
+            region = None
+        else:
+            region = self._ellipse(*liquid.shape)
+            liquid = cv2.bitwise_and(liquid, region)
+            fill_pct = 100.0 * cv2.countNonZero(liquid) / max(cv2.countNonZero(region), 1)
+
+        depth = 0.0
+        liquid_pixels = cv2.countNonZero(liquid)
+        if liquid_pixels:
+            background = cv2.bitwise_xor(liquid, region) if region is not None else 1 - liquid
+            if cv2.countNonZero(background):
+                intensity = cv2.mean(hsv, mask=liquid)[2]
+                background_intensity = cv2.mean(hsv, mask=background)[2]
+                depth = beer_lambert_depth(intensity, background_intensity, self.attenuation)
+        return fill_pct, depth
+
+    def update(self, frame_number, frame: np.ndarray, detected_objects) -> None:
+        """
+            Measures every tracked object on the frame and appends the results to the log.
+        Args:
+            frame_number (int): The current frame number in the video.
+            frame (np.ndarray): Full BGR frame the boxes were detected on.
+            detected_objects (dict): Object label to list of pixel boxes (x1, y1, x2, y2).
+        Returns:
+            None
+        """
+        timestamp = frame_number / self.fps
+        for label in self.luts:
+            for index, box in enumerate(detected_objects.get(label, [])):
+                result = self.measure(frame, box, label)
+                if result is not None:
+                    self.log_file.write(f"{frame_number},{timestamp:.3f},{label},{index},"
+                                        f"{result[0]:.2f},{result[1]:.4f}\n")
+        self.log_file.flush()
+
+    def get_state(self) -> dict:
+        """
+            Returns the state needed to resume, flushing the log first.
+        Returns:
+            dict: The log file offset.
+        """
+        self.log_file.flush()
+        return {"log_offset": self.log_file.tell()}
+
+    def close(self):
+        """
+        Closes the log file.
+        """
+        self.log_file.close()
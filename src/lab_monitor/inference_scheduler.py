@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+"""
+    inference_scheduler.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.7
+
+    Description:
+        Central inference scheduler that owns one GroundingDINO model and serves every running
+        job. Frames submitted by the jobs are gathered into dynamic batches, bounded by a maximum
+        batch size and a maximum wait, and run through DinoProcess.process_batch. Higher priority
+        jobs are served first, and jobs of the same priority round robin so a long video cannot
+        starve the others. Per-job latency is recorded.
+
+    Change History:
+        0.1: Created.
+        0.2: load_network is public, and frames are released before results are returned, for the model server.
+        0.3: Async callers can await detections, with a bound on waiting frames.
+        0.4: Jobs' frames are served by job priority.
+        0.5: The model's thread count and cores can be set, applied on the batching thread.
+        0.6: The model it loads can be given a detection cache.
+        0.7: The async waiting bound is checked as the frame is queued, and frames from callers without
+            a client wait the full max_wait to be batched with others.
+"""
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+import threading
+import time
+from typing import Optional
+import numpy as np
+from lab_monitor.annotation import BoxAnnotator
+from lab_monitor.async_inference import ExecutorBusy
+from lab_monitor.resources import pin_thread
+
+# Jobs whose latency is kept for stats, the oldest are dropped first
+MAX_TRACKED_JOBS = 100
+# Latency samples kept per job
+LATENCY_SAMPLES = 1000
+
+
+class _Request:  # pylint: disable=R0903
+    """
+        A frame waiting for inference.
+    """
+    def __init__(self, job_id: str, image: np.ndarray, thresholds: tuple, unclaimed: bool):
+        self.job_id = job_id
+        self.image = image
+        self.thresholds = thresholds
+        # From a caller without a client, e.g. a still image request
+        self.unclaimed = unclaimed
+        self.submitted = time.monotonic()
+        self.future = Future()
+
+
+class InferenceScheduler:  # pylint: disable=R0902
+    """
+        Batches frames from all jobs through one shared model.
+    Args:
+        network (optional): Loaded model with DinoProcess's process_batch and map_label. A DinoProcess
+            is created and loaded on the first request when not given.
+        max_batch_size (int): Most frames run in one forward pass.
+        max_wait_ms (float): Longest a frame waits for a batch to fill. A batch is run straight away
+            once every active job has a frame waiting, as no more can arrive. Frames from callers
+            without a client, e.g. still image requests, always wait the full time, as any number
+            more may arrive.
+        model_paths (dict, optional): model_config_path and model_checkpoint_path for DinoProcess.load_model.
+        max_pending (int): Most frames waiting before async callers are refused, jobs are never refused.
+        detection_cache (DetectionCache, optional): Cache of detections for recurring frames, given to
+            the DinoProcess loaded when no network is given.
+    """
+    def __init__(self, network=None, max_batch_size: int = 8, max_wait_ms: float = 10.0,  # pylint: disable=R0917
+                 model_paths: dict = None, max_pending: int = 64, detection_cache=None):
+        self.network = network
+        self.detection_cache = detection_cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_pending = max_pending
+        self.model_paths = model_paths
+        self.queues = OrderedDict()
+        self.priorities = {}
+        self.pending = 0
+        self.unclaimed_pending = 0
+        self.active_clients = 0
+        self.latencies = OrderedDict()
+        self.batch_sizes = deque(maxlen=LATENCY_SAMPLES)
+        self.condition = threading.Condition()
+        self.load_lock = threading.Lock()
+        self.thread = None
+        self.stopped = False
+        # (threads, cores) for the model, and what the batching thread last applied
+        self.cpu_budget = (None, None)
+        self.applied_budget = (None, None)
+
+    def client(self, job_id: str, priority: int = 0) -> "SchedulerClient":
+        """
+            Returns a DinoProcess-like handle for a job. Close it when the job finishes.
+        Args:
+            job_id (str): Job the frames belong to, used for fairness and stats.
+            priority (int): Frames of higher priority jobs are batched first.
+        Returns:
+            SchedulerClient: Client with process_image, annotate_image and map_label.
+        """
+        with self.condition:
+            self.active_clients += 1
+            self.priorities[job_id] = priority
+        return SchedulerClient(self, job_id)
+
+    def release(self, job_id: str) -> None:
+        """
+            Marks one of the job's clients as finished.
+        """
+        with self.condition:
+            self.active_clients = max(0, self.active_clients - 1)
+            self.priorities.pop(job_id, None)
+            self.condition.notify_all()
+
+    def submit(self, job_id: str, image: np.ndarray, box_threshold: float = 0.35,  # pylint: disable=R0917
+               text_threshold: float = 0.25, bounded: bool = False) -> Future:
+        """
+            Queues a frame for detection.
+        Args:
+            job_id (str): Job the frame belongs to.
+            image (np.ndarray): BGR frame, it must not be modified until the result is ready.
+            box_threshold (float): Threshold for box detection.
+            text_threshold (float): Threshold for text detection.
+            bounded (bool): Refuse the frame if max_pending frames are already waiting.
+        Returns:
+            Future: Resolves to (boxes, logits, phrases), as DinoProcess.process_image returns.
+        Raises:
+            ExecutorBusy: If bounded and max_pending frames are already waiting.
+        """
+        with self.condition:
+            if self.stopped:
+                raise RuntimeError("Inference scheduler has been stopped.")
+            if bounded and self.pending >= self.max_pending:
+                raise ExecutorBusy(f"{self.pending} frames already waiting for inference.")
+            request = _Request(job_id, image, (box_threshold, text_threshold), job_id not in self.priorities)
+            self._start()
+            self.queues.setdefault(job_id, deque()).append(request)
+            self.pending += 1
+            self.unclaimed_pending += request.unclaimed
+            self.condition.notify_all()
+        return request.future
+
+    async def detect(self, job_id: str, image: np.ndarray, box_threshold: float = 0.35,
+                     text_threshold: float = 0.25) -> tuple:
+        """
+            Awaitable submit for async callers. Concurrent calls are batched together, and with the jobs' frames.
+        Raises:
+            ExecutorBusy: If max_pending frames are already waiting.
+        """
+        return await asyncio.wrap_future(self.submit(job_id, image, box_threshold, text_threshold, bounded=True))
+
+    def _start(self) -> None:
+        """
+            Starts the batching thread on first use. Called with the condition held.
+        """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _take_batch(self) -> list:
+        """
+            Takes up to max_batch_size requests, one job at a time, highest priority first and in least
+            recently served order within a priority. Only requests with the same thresholds as the first
+            are batched together. Called with the condition held.
+        """
+        batch = []
+        while len(batch) < self.max_batch_size:
+            # max keeps the first of equal priority, the least recently served
+            job_id = max((job for job, queue in self.queues.items()
+                          if not batch or queue[0].thresholds == batch[0].thresholds),
+                         key=lambda job: self.priorities.get(job, 0), default=None)
+            if job_id is None:
+                break
+            queue = self.queues.pop(job_id)
+            batch.append(queue.popleft())
+            if queue:
+                # Served jobs go to the back of the line
+                self.queues[job_id] = queue
+        self.pending -= len(batch)
+        self.unclaimed_pending -= sum(request.unclaimed for request in batch)
+        return batch
+
+    def _run(self) -> None:
+        """
+            Batching loop, runs until stopped and drained.
+        """
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                deadline = min(queue[0].submitted for queue in self.queues.values()) + self.max_wait
+                while self.pending < self._batch_target() and not self.stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch = self._take_batch()
+            self._process(batch)
+
+    def _batch_target(self) -> int:
+        """
+            Returns how many frames to wait for before the deadline. Called with the condition held.
+        """
+        if self.unclaimed_pending:
+            return self.max_batch_size
+        return min(self.max_batch_size, max(self.active_clients, 1))
+
+    def set_num_threads(self, threads: Optional[int], cores: Optional[list] = None) -> None:
+        """
+            Sets the model's intra-op thread count, and optionally the cores the batching thread runs on.
+            Both are applied on the batching thread before the next batch, as torch's thread count
+            belongs to the thread that runs the model.
+        Args:
+            threads (int, optional): Threads for the model's forward pass, None for the library default.
+            cores (list, optional): CPU ids to pin the batching thread to.
+        """
+        with self.condition:
+            self.cpu_budget = (threads, cores)
+
+    def _apply_cpu_budget(self, network) -> None:
+        """
+            Applies a changed CPU budget on the batching thread.
+        """
+        with self.condition:
+            threads, cores = budget = self.cpu_budget
+        if budget == self.applied_budget:
+            return
+        if threads is not None and hasattr(network, "set_num_threads"):
+            network.set_num_threads(threads)
+        if cores is not None:
+            pin_thread(0, cores)
+        self.applied_budget = budget
+
+    def load_network(self):
+        """
+            Returns the shared model, loading a DinoProcess on first use.
+        """
+        with self.load_lock:
+            if self.network is None:
+                # Imported here so the API does not load torch and GroundingDINO until a job runs
+                from lab_monitor.dino_functions import DinoProcess  # pylint: disable=C0415
+                network = DinoProcess(cache=self.detection_cache)
+                network.load_model(**(self.model_paths or {}))
+                self.network = network
+            return self.network
+
+    def _process(self, batch: list) -> None:
+        """
+            Runs a batch and resolves its futures.
+        """
+        box_threshold, text_threshold = batch[0].thresholds
+        try:
+            network = self.load_network()
+            self._apply_cpu_budget(network)
+            results = network.process_batch([request.image for request in batch],
+                                            box_threshold=box_threshold, text_threshold=text_threshold)
+        except Exception as error:  # pylint: disable=W0718
+            for request in batch:
+                request.image = None
+                request.future.set_exception(error)
+            return
+        done = time.monotonic()
+        with self.condition:
+            self.batch_sizes.append(len(batch))
+            for request in batch:
+                samples = self.latencies.pop(request.job_id, None) or deque(maxlen=LATENCY_SAMPLES)
+                samples.append((done - request.submitted) * 1000.0)
+                self.latencies[request.job_id] = samples
+            while len(self.latencies) > MAX_TRACKED_JOBS:
+                self.latencies.popitem(last=False)
+        for request, result in zip(batch, results):
+            # Drop the frame before the caller is woken, it may reuse the buffer once it has its result
+            request.image = None
+            request.future.set_result(result)
+
+    def map_label(self, phrase: str) -> str:
+        """
+            Maps a phrase to its group label with the shared model's mapping.
+        """
+        return self.load_network().map_label(phrase)
+
+    def stats(self, job_id: Optional[str] = None) -> dict:
+        """
+            Reports per-job latency percentiles over the most recent frames.
+        Args:
+            job_id (str, optional): Only report this job.
+        Returns:
+            dict: {"mean_batch_size": float, "jobs": {job_id: {"frames", "p50_ms", "p95_ms", "p99_ms"}}}
+        """
+        with self.condition:
+            latencies = {job: list(samples) for job, samples in self.latencies.items()
+                         if job_id is None or job == job_id}
+            batch_sizes = list(self.batch_sizes)
+        jobs = {}
+        for job, samples in latencies.items():
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            jobs[job] = {"frames": len(samples), "p50_ms": round(float(p50), 2),
+                         "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2)}
+        return {"mean_batch_size": round(float(np.mean(batch_sizes)), 2) if batch_sizes else None, "jobs": jobs}
+
+    def stop(self) -> None:
+        """
+            Stops the batching thread once the queued frames have been processed.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+
+
+class SchedulerClient:
+    """
+        Stands in for a DinoProcess in a job's pipeline, sending its frames to the shared scheduler.
+        Each client has its own annotator, so class colours stay per job.
+    Args:
+        scheduler (InferenceScheduler): Scheduler that owns the model.
+        job_id (str): Job the frames belong to.
+    """
+    def __init__(self, scheduler: InferenceScheduler, job_id: str):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.annotator = BoxAnnotator()
+
+    def load_model(self, **_) -> None:
+        """
+            Nothing to load, the scheduler owns the model.
+        """
+
+    def process_image(self, cv_image: np.ndarray, box_threshold: float = 0.35, text_threshold: float = 0.25):
+        """
+            Detects objects in a frame, waiting for the batch it is run in.
+        Returns:
+            tuple: Detected boxes, logits, and phrases.
+        """
+        return self.scheduler.submit(self.job_id, cv_image, box_threshold, text_threshold).result()
+
+    async def process_image_async(self, cv_image: np.ndarray, box_threshold: float = 0.35,
+                                  text_threshold: float = 0.25):
+        """
+            Awaitable process_image, as DinoProcess.process_image_async.
+        """
+        return await self.scheduler.detect(self.job_id, cv_image, box_threshold, text_threshold)
+
+    def annotate_image(self, cv_image: np.ndarray, boxes, logits, phrases) -> np.ndarray:
+        """
+            Annotates the frame in place.
+        """
+        return self.annotator.annotate(cv_image, boxes, logits, phrases)
+
+    def map_label(self, phrase: str) -> str:
+        """
+            Maps a phrase to its group label, as DinoProcess.map_label does.
+        """
+        return self.scheduler.map_label(phrase)
+
+    def close(self) -> None:
+        """
+            Tells the scheduler this job has finished.
+        """
+        self.scheduler.release(self.job_id)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+    job_queue.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Runs video processing jobs on background threads, a limited number at a time, highest
+        priority first and in submission order within a priority. Jobs stop cooperatively: each
+        running job has a JobControl that the pipeline checks between frames.
+
+        A job can be cancelled, whether queued or running. When every slot is taken and a job is
+        submitted with a higher priority than a running job, the lowest priority running job is
+        preempted. It stops at its next frame, after checkpointing, and goes back to its original
+        place in the queue, so it resumes from where it stopped once a slot is free.
+
+    Change History:
+        0.1: Created.
+"""
+import itertools
+import threading
+from typing import Callable, Optional
+
+PRIORITIES = {"low": 0, "normal": 1, "high": 2}
+CANCEL = "cancel"
+PREEMPT = "preempt"
+
+
+class JobControl:
+    """
+        Lets a running job be asked to stop between frames.
+    """
+    def __init__(self):
+        self.reason = None
+
+    def stop(self, reason: str) -> None:
+        """
+            Asks the job to stop. A cancellation overrides a preemption, not the other way round.
+        Args:
+            reason (str): CANCEL or PREEMPT.
+        """
+        if self.reason != CANCEL:
+            self.reason = reason
+
+    def should_stop(self) -> bool:
+        """
+            Returns True once the job has been asked to stop, passed to process_video as should_stop.
+        """
+        return self.reason is not None
+
+
+class JobQueue:
+    """
+        Runs jobs by priority with at most max_running at once, preempting lower priority jobs.
+    Args:
+        run (callable): Called with (job_id, JobControl) on a background thread. Runs the job until it
+            finishes or the control asks it to stop, and returns True if it stopped early.
+        max_running (int): Most jobs running at once.
+    """
+    def __init__(self, run: Callable[[str, JobControl], bool], max_running: int = 2):
+        self.run = run
+        self.max_running = max_running
+        # Job id to (priority, submission order)
+        self.queued = {}
+        # Job id to (priority, submission order, JobControl)
+        self.running = {}
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+
+    def submit(self, job_id: str, priority: int = PRIORITIES["normal"]) -> None:
+        """
+            Queues a job, starting it straight away if a slot is free.
+        Args:
+            job_id (str): Job to run.
+            priority (int): Higher runs first, see PRIORITIES.
+        """
+        with self.lock:
+            if job_id not in self.running:
+                self.queued[job_id] = (priority, next(self.sequence))
+                self._dispatch()
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+            Cancels a job. A queued job is removed straight away, a running job stops at its next frame.
+        Returns:
+            str: "queued" or "running", the state the job was cancelled in, or None if it was neither.
+        """
+        with self.lock:
+            if self.queued.pop(job_id, None) is not None:
+                return "queued"
+            if job_id in self.running:
+                self.running[job_id][2].stop(CANCEL)
+                return "running"
+        return None
+
+    def state(self, job_id: str) -> Optional[str]:
+        """
+            Returns "queued", "running" or None.
+        """
+        with self.lock:
+            if job_id in self.running:
+                return "running"
+            return "queued" if job_id in self.queued else None
+
+    def _dispatch(self) -> None:
+        """
+            Starts queued jobs while slots are free, then preempts lower priority running jobs for the
+            jobs still waiting. Called with the lock held.
+        """
+        waiting = sorted(self.queued, key=lambda job: (-self.queued[job][0], self.queued[job][1]))
+        while waiting and len(self.running) < self.max_running:
+            job_id = waiting.pop(0)
+            priority, sequence = self.queued.pop(job_id)
+            control = JobControl()
+            self.running[job_id] = (priority, sequence, control)
+            threading.Thread(target=self._run_job, args=(job_id, control), daemon=True).start()
+
+        # Jobs already stopping will free their slots for the first jobs waiting
+        stopping = sum(1 for _, _, control in self.running.values() if control.should_stop())
+        for job_id in waiting[stopping:]:
+            candidates = [(priority, -sequence, running_id) for running_id, (priority, sequence, control)
+                          in self.running.items() if not control.should_stop()]
+            if not candidates:
+                break
+            # The lowest priority job, the most recently submitted of those
+            priority, _, victim = min(candidates)
+            if priority >= self.queued[job_id][0]:
+                break
+            self.running[victim][2].stop(PREEMPT)
+
+    def _run_job(self, job_id: str, control: JobControl) -> None:
+        """
+            Runs a job, then requeues it if it was preempted and starts the next job.
+        """
+        stopped = False
+        try:
+            stopped = self.run(job_id, control)
+        finally:
+            with self.lock:
+                priority, sequence, _ = self.running.pop(job_id)
+                if stopped and control.reason == PREEMPT:
+                    # Back in its original place, ahead of jobs of the same priority submitted after it
+                    self.queued[job_id] = (priority, sequence)
+                self._dispatch()
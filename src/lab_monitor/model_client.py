@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+    model_client.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Client of the standalone model server (see lab_monitor.model_server). The client owns a ring
+        of frame slots in shared memory, writes a frame into a slot and sends only a small control
+        message naming the slot, so frames are never pickled.
+
+        Client and server authenticate with a shared secret, read from the LAB_MONITOR_MODEL_KEY
+        environment variable when it is not passed in. There is no default secret.
+
+    Change History:
+        0.1: Created, split from model_server so DinoProcess can use it without importing the scheduler.
+"""
+import os
+import threading
+from multiprocessing.connection import Client
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+import numpy as np
+from lab_monitor.annotation import BoxAnnotator
+
+AUTHKEY_ENV = "LAB_MONITOR_MODEL_KEY"
+# Frame slots in each client's ring
+RING_SLOTS = 4
+
+
+def parse_address(address: str):
+    """
+        Converts "host:port" to a TCP address, anything else is taken as a Unix socket path.
+    Args:
+        address (str): e.g. "127.0.0.1:8765" or "/tmp/lab_monitor_model.sock".
+    Returns:
+        tuple or str: Address for multiprocessing.connection.
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def resolve_authkey(authkey: Optional[bytes] = None) -> bytes:
+    """
+        Returns the shared secret, read from LAB_MONITOR_MODEL_KEY when not given.
+    Args:
+        authkey (bytes, optional): Shared secret.
+    Returns:
+        bytes: The shared secret.
+    Raises:
+        ValueError: If no secret is given and LAB_MONITOR_MODEL_KEY is not set.
+    """
+    if authkey:
+        return authkey
+    key = os.environ.get(AUTHKEY_ENV)
+    if not key:
+        raise ValueError(f"Set {AUTHKEY_ENV} to the model server's shared secret.")
+    return key.encode("utf-8")
+
+
+class ModelServerClient:
+    """
+        Sends frames to a ModelServer through a ring of shared memory slots.
+        Has the same process_image, annotate_image and map_label interface as DinoProcess.
+    Args:
+        address (str): Server address, "host:port" or a Unix socket path.
+        authkey (bytes, optional): Shared secret of the server, LAB_MONITOR_MODEL_KEY by default.
+        slots (int): Frame slots in the ring.
+    """
+    def __init__(self, address: str, authkey: bytes = None, slots: int = RING_SLOTS):
+        self.conn = Client(parse_address(address), authkey=resolve_authkey(authkey))
+        self.slots = slots
+        self.next_slot = 0
+        self.shm: Optional[SharedMemory] = None
+        self.group_map = {}
+        self.annotator = BoxAnnotator()
+        self.lock = threading.Lock()
+
+    @property
+    def slot_bytes(self) -> int:
+        """
+            Returns the size of each slot in the ring, 0 before the ring is created.
+        """
+        return self.shm.size // self.slots if self.shm is not None else 0
+
+    def _ensure_ring(self, nbytes: int) -> None:
+        """
+            Creates, or grows, the ring so a slot holds nbytes and tells the server about it.
+        """
+        if self.shm is not None and nbytes <= self.slot_bytes:
+            return
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+        self.shm = SharedMemory(create=True, size=nbytes * self.slots)
+        self.conn.send(("attach", self.shm.name, self.slot_bytes, os.getpid()))
+        _, info = self._reply()
+        self.group_map = info["group_map"]
+
+    def _reply(self):
+        """
+            Receives a reply, raising the server's error if the request failed.
+        """
+        reply = self.conn.recv()
+        if reply[0] == "error":
+            raise RuntimeError(f"Model server error: {reply[1]}")
+        return reply
+
+    def load_model(self, **_) -> None:
+        """
+            Nothing to load, the server owns the model.
+        """
+
+    def process_image(self, cv_image: np.ndarray, box_threshold: float = 0.35, text_threshold: float = 0.25):
+        """
+            Detects objects in a frame on the server.
+        Returns:
+            tuple: Detected boxes (N x 4 float32), logits (N float32) and phrases.
+        """
+        image = np.ascontiguousarray(cv_image)
+        with self.lock:
+            self._ensure_ring(image.nbytes)
+            slot = self.next_slot
+            self.next_slot = (slot + 1) % self.slots
+            view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+            view[...] = image
+            del view
+            self.conn.send(("detect", slot, image.shape, image.dtype.str, box_threshold, text_threshold))
+            _, boxes, logits, phrases = self._reply()
+        return boxes, logits, phrases
+
+    def annotate_image(self, cv_image: np.ndarray, boxes, logits, phrases) -> np.ndarray:
+        """
+            Annotates the frame in place.
+        """
+        return self.annotator.annotate(cv_image, boxes, logits, phrases)
+
+    def map_label(self, phrase: str) -> str:
+        """
+            Maps a phrase to its group label with the server model's mapping.
+        """
+        phrase = phrase.strip().lower()
+        return self.group_map.get(phrase, phrase)
+
+    def close(self) -> None:
+        """
+            Disconnects and frees the ring.
+        """
+        with self.lock:
+            try:
+                self.conn.send(("close",))
+            except OSError:
+                pass
+            self.conn.close()
+            if self.shm is not None:
+                self.shm.close()
+                self.shm.unlink()
+                self.shm = None
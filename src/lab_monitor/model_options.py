@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+    model_options.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Command line options for the GroundingDINO config and checkpoint, shared by the tools that
+        load the model, so each passes the same keyword arguments to DinoProcess.load_model.
+
+    Change History:
+        0.1: Created.
+"""
+import argparse
+
+
+def add_model_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+        Adds the --model-config and --model-checkpoint options.
+    Args:
+        parser (argparse.ArgumentParser): Parser to add the options to.
+    """
+    parser.add_argument("--model-config", help="GroundingDINO config path.")
+    parser.add_argument("--model-checkpoint", help="GroundingDINO checkpoint path.")
+
+
+def parse_model_paths(args: argparse.Namespace) -> dict:
+    """
+        Returns the model paths given on the command line.
+    Args:
+        args (argparse.Namespace): Parsed arguments of a parser set up with add_model_arguments.
+    Returns:
+        dict: model_config_path and model_checkpoint_path for DinoProcess.load_model, for those given.
+    """
+    paths = {}
+    if args.model_config:
+        paths["model_config_path"] = args.model_config
+    if args.model_checkpoint:
+        paths["model_checkpoint_path"] = args.model_checkpoint
+    return paths
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+    model_server.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.6
+
+    Description:
+        Standalone inference server holding the single GroundingDINO model for every API and
+        pipeline worker on the machine. Each client owns a ring of frame slots in shared memory,
+        writes a frame into a slot and sends only a small control message naming the slot, so
+        frames are never pickled. Detections come back as small arrays. Frames from all clients
+        are batched together through an InferenceScheduler.
+
+        Clients (see lab_monitor.model_client) authenticate with a shared secret, which the server
+        and its clients read from the LAB_MONITOR_MODEL_KEY environment variable when it is not passed in.
+
+        Usage:
+            LAB_MONITOR_MODEL_KEY=<secret> python -m lab_monitor.model_server --address 127.0.0.1:8765
+            LAB_MONITOR_MODEL_KEY=<secret> python -m lab_monitor.model_server --address /tmp/lab_monitor_model.sock
+
+    Change History:
+        0.1: Created.
+        0.2: Added a thread count option for the model.
+        0.3: Added detection cache options.
+        0.4: There is no default shared secret, it must be set with LAB_MONITOR_MODEL_KEY. The client
+            moved to lab_monitor.model_client.
+        0.5: Added a thumbnail difference option for the detection cache.
+        0.6: Malformed client messages are answered with an error instead of dropping the client.
+"""
+import argparse
+import itertools
+import os
+import threading
+from multiprocessing import AuthenticationError, resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from lab_monitor.detection_cache import DetectionCache
+from lab_monitor.inference_scheduler import InferenceScheduler
+from lab_monitor.model_client import parse_address, resolve_authkey
+from lab_monitor.model_options import add_model_arguments, parse_model_paths
+
+
+def _attach(name: str, client_pid: int) -> SharedMemory:
+    """
+        Attaches to a client's shared memory without taking ownership of it.
+    """
+    shm = SharedMemory(name=name)
+    if client_pid != os.getpid():
+        # The client created and unlinks the segment. Stop this process's resource tracker from
+        # unlinking it too when the server exits.
+        resource_tracker.unregister(shm._name, "shared_memory")  # pylint: disable=W0212
+    return shm
+
+
+def _slot_frame(shm: SharedMemory, slot_bytes: int, slot: int, shape, dtype) -> np.ndarray:
+    """
+        Returns a view of the frame a client wrote into a slot of its shared memory.
+    Raises:
+        ValueError: If the client has not attached, or the frame does not fit in the slot.
+    """
+    if shm is None:
+        raise ValueError("No shared memory attached.")
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    if slot < 0 or min(shape) < 0 or nbytes > slot_bytes or slot * slot_bytes + nbytes > shm.size:
+        raise ValueError("Frame does not fit in its shared memory slot.")
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * slot_bytes)
+
+
+class ModelServer:
+    """
+        Serves detections to clients over multiprocessing connections.
+    Args:
+        address (str): "host:port" or a Unix socket path to listen on.
+        scheduler (InferenceScheduler, optional): Scheduler owning the model, created when not given.
+        authkey (bytes, optional): Shared secret clients must present, LAB_MONITOR_MODEL_KEY by default.
+    """
+    def __init__(self, address: str, scheduler: InferenceScheduler = None, authkey: bytes = None):
+        authkey = resolve_authkey(authkey)
+        self.scheduler = scheduler or InferenceScheduler()
+        self.authkey = authkey
+        self.listener = Listener(parse_address(address), authkey=authkey)
+        self.address = self.listener.address
+        self.ids = itertools.count()
+        self.closed = False
+
+    def serve_forever(self) -> None:
+        """
+            Accepts clients until closed, each client is served on its own thread.
+        """
+        while not self.closed:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # A client that failed to connect or authenticate
+                if self.closed:
+                    return
+                continue
+            if self.closed:
+                conn.close()
+                return
+            threading.Thread(target=self._serve_client, args=(conn, f"client-{next(self.ids)}"),
+                             daemon=True).start()
+
+    def _serve_client(self, conn, client_id: str) -> None:
+        """
+            Handles one client's control messages until it disconnects.
+        """
+        network = self.scheduler.client(client_id)
+        shm, slot_bytes = None, 0
+        try:
+            while True:
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    return
+                if message[0] == "attach":
+                    _, name, slot_bytes, client_pid = message
+                    if shm is not None:
+                        shm.close()
+                        shm = None
+                    try:
+                        shm = _attach(name, client_pid)
+                    except (OSError, ValueError) as error:
+                        conn.send(("error", repr(error)))
+                        continue
+                    conn.send(("ok", {"group_map": self._group_map()}))
+                elif message[0] == "detect":
+                    frame = None
+                    try:
+                        _, slot, shape, dtype, box_threshold, text_threshold = message
+                        frame = _slot_frame(shm, slot_bytes, slot, shape, dtype)
+                        boxes, logits, phrases = network.process_image(frame, box_threshold, text_threshold)
+                    except Exception as error:  # pylint: disable=W0718
+                        conn.send(("error", repr(error)))
+                        continue
+                    finally:
+                        # The view must be released before the shared memory can be closed
+                        del frame
+                    conn.send(("ok", np.asarray(boxes, dtype=np.float32), np.asarray(logits, dtype=np.float32),
+                               list(phrases)))
+                elif message[0] == "close":
+                    return
+                else:
+                    conn.send(("error", f"Unknown message {message[0]!r}."))
+        finally:
+            network.close()
+            if shm is not None:
+                shm.close()
+            conn.close()
+
+    def _group_map(self) -> dict:
+        """
+            Returns the model's phrase to group label mapping, so clients can map labels locally.
+        """
+        return dict(getattr(self.scheduler.load_network(), "GROUP_MAP", {}))
+
+    def close(self) -> None:
+        """
+            Stops accepting clients and stops the scheduler.
+        """
+        self.closed = True
+        # Wake serve_forever, which is blocked waiting for a client
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+        self.listener.close()
+        self.scheduler.stop()
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Serve GroundingDINO detections to local workers.")
+    parser.add_argument("--address", default="127.0.0.1:8765", help="host:port or Unix socket path to listen on.")
+    parser.add_argument("--max-batch-size", type=int, default=8, help="Most frames per forward pass.")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="Longest a frame waits for a batch.")
+    add_model_arguments(parser)
+    parser.add_argument("--threads", type=int, help="torch intra-op threads, every core by default.")
+    parser.add_argument("--cache-entries", type=int, default=0,
+                        help="Frames whose detections are cached for recurring frames, 0 to disable.")
+    parser.add_argument("--cache-distance", type=int, default=4,
+                        help="Most perceptual hash bits that may differ for a cached frame to be compared.")
+    parser.add_argument("--cache-difference", type=int, default=4,
+                        help="Most any thumbnail pixel may differ, in levels, to reuse cached detections.")
+    args = parser.parse_args(argv)
+
+    cache = (DetectionCache(args.cache_entries, args.cache_distance, args.cache_difference)
+             if args.cache_entries > 0 else None)
+    scheduler = InferenceScheduler(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                                   model_paths=parse_model_paths(args), detection_cache=cache)
+    if args.threads:
+        scheduler.set_num_threads(args.threads)
+    server = ModelServer(args.address, scheduler)
+    print(f"Model server listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
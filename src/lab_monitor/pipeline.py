@@ -8,21 +8,108 @@
 
     Created: 25/06/2025
 
-    Version: 0.1
+    Version: 0.16
 
     Description:
         A bit of redundant code that is a callable wrapper around process_video.py.
 
     Change History:
         0.1: Created.
+        0.2: Added optional liquid fill estimation stage.
+        0.3: Output goes through a selectable, threaded video writer backend.
+        0.4: Added log-only output mode and detections sidecar.
+        0.5: Frames are annotated in place in BGR, no colour conversion before encoding.
+        0.6: Decode and undistort into reused buffers instead of allocating per frame.
+        0.7: Periodic checkpoints so an interrupted job can resume where it stopped.
+        0.8: Keyframe index for exact frame counts, seeking and processing a time window.
+        0.9: Events can be streamed to a callback as they are logged.
+        0.10: Thumbnails and optional clips are captured around each event.
+        0.11: The detections sidecar is always written, next to the event log by default.
+        0.12: Lens correction comes from a named camera profile with memory-mapped maps.
+        0.13: Interaction rules can be loaded from a config file.
+        0.14: A shared detection model, e.g. an inference scheduler client, can be passed in.
+        0.15: torch and GroundingDINO are only imported when a model is loaded.
+        0.16: A job can be stopped between frames, checkpointing so it can resume later.
 """
+from functools import partial
+import os
 import cv2
-from lab_monitor.cv_functions import BarrelUndistortTransform
-from lab_monitor.dino_functions import DinoProcess
+from lab_monitor.buffer_pool import FramePool
+from lab_monitor.checkpoint import JobCheckpoint
+from lab_monitor.calibration import DEFAULT_PROFILE, load_transform
+from lab_monitor.cv_functions import boxes_to_pixels
+from lab_monitor.detections import DetectionsWriter
+from lab_monitor.event_media import EventMediaRecorder
 from lab_monitor.event_tracker import OverlapEventTracker
+from lab_monitor.fill_estimation import FillLevelEstimator
+from lab_monitor.video_index import VideoIndex
+from lab_monitor.video_writers import SegmentedVideoWriter, create_video_writer
 
+OUTPUT_MODES = ("video", "log_only")
+# Enough undistorted frames for the writer queue plus the frame being processed
+FRAME_POOL_SIZE = 12
+# Frames between checkpoints, 10 seconds at 30 fps
+CHECKPOINT_INTERVAL = 300
 
-def process_video(video_path: str, output_path: str, log_path: str, progress_callback=None):
+
+class JobStopped(Exception):
+    """
+        Raised by process_video when should_stop asked it to stop. With a checkpoint path, the
+        checkpoint is at the frame it stopped on, so running the job again resumes from there.
+    Args:
+        frame_number (int): First frame not processed.
+    """
+    def __init__(self, frame_number: int):
+        super().__init__(f"Stopped before frame {frame_number}.")
+        self.frame_number = frame_number
+
+
+def default_detections_path(log_path: str) -> str:
+    """
+        Returns the path of the detections sidecar written next to an event log.
+    Args:
+        log_path (str): Path of the event log, e.g. "logs/job.csv".
+    Returns:
+        str: e.g. "logs/job_detections.ndjson".
+    """
+    return f"{os.path.splitext(log_path)[0]}_detections.ndjson"
+
+
+def group_by_label(boxes, phrases) -> dict:
+    """
+        Groups detection boxes by their lower case label.
+    Args:
+        boxes (iterable): Detection boxes.
+        phrases (List[str]): Label for each box.
+    Returns:
+        dict: Label to list of boxes.
+    """
+    grouped = {}
+    for box, phrase in zip(boxes, phrases):
+        grouped.setdefault(phrase.lower(), []).append(box)
+    return grouped
+
+
+def load_network():
+    """
+        Loads a DinoProcess. torch and GroundingDINO are imported here, not when this module is
+        imported, so the API and tests that never run the model start without them.
+    Returns:
+        DinoProcess: The loaded model.
+    """
+    from lab_monitor.dino_functions import DinoProcess  # pylint: disable=C0415
+    network = DinoProcess()
+    network.load_model()
+    return network
+
+
+def process_video(video_path: str, output_path: str, log_path: str,  # pylint: disable=R0915,R0917
+                  progress_callback=None, fill_log_path: str = None, encoder_settings: dict = None,
+                  output_mode: str = "video", detections_path: str = None, checkpoint_path: str = None,
+                  checkpoint_interval: int = CHECKPOINT_INTERVAL, index_path: str = None,
+                  start_time: float = None, end_time: float = None, event_callback=None,
+                  media_dir: str = None, clip_seconds: float = None, camera_profile: str = DEFAULT_PROFILE,
+                  calibration_dir: str = None, rules_path: str = None, network=None, should_stop=None):
     """
         Process a video file and save the output.
     Args:
@@ -30,44 +117,159 @@ def process_video(video_path: str, output_path: str, log_path: str, progress_cal
         output_path (str): Path to save the processed video.
         log_path (str): Path to save the event log.
         progress_callback (callable, optional): A callback function to report progress.
+        fill_log_path (str, optional): Path to save the petri dish and bottle fill level time series.
+            Fill estimation is skipped when not given.
+        encoder_settings (dict, optional): Keyword arguments for create_video_writer, e.g.
+            {"backend": "ffmpeg", "codec": "libx264", "crf": 23, "preset": "veryfast"}.
+        output_mode (str): "video" renders and encodes the annotated video to output_path,
+            "log_only" skips annotation and encoding and output_path is not written.
+        detections_path (str, optional): Path to save the per-frame detections as NDJSON, next to the
+            event log by default. The sidecar is always written so annotated video can be rendered later.
+        checkpoint_path (str, optional): Path of the job checkpoint. When given, the pipeline state is
+            saved every checkpoint_interval frames and a run with an existing checkpoint resumes from it.
+            The video is then encoded in segments of checkpoint_interval frames, so a resumed job
+            produces the same output as an uninterrupted one.
+        checkpoint_interval (int): Frames between checkpoints.
+        index_path (str, optional): Path of the video's keyframe index, built and saved if it does not exist.
+            The index gives the exact frame count for progress and is used for seeking.
+        start_time (float, optional): Only process frames from this time, in seconds.
+        end_time (float, optional): Only process frames before this time, in seconds.
+        event_callback (callable, optional): Called with (frame_number, timestamp, action) for every event logged.
+        media_dir (str, optional): Directory to save a downscaled JPEG of each event's frame to.
+            The frame is annotated in video mode. Skipped when not given.
+        clip_seconds (float, optional): Also save a clip of this many seconds around each event to media_dir.
+        camera_profile (str): Name of the camera calibration profile used for lens correction.
+        calibration_dir (str, optional): Directory holding the camera calibration profiles, whose
+            undistortion maps are shared between processes. Only built-in profiles are available without it.
+        rules_path (str, optional): Path to an interaction rules file, the bundled lab rules when not given.
+        network (optional): Detection model with DinoProcess's interface, such as an InferenceScheduler
+            client shared with other jobs. A DinoProcess is loaded when not given.
+        should_stop (callable, optional): Checked between frames, when it returns True the job is
+            checkpointed, its files are closed and JobStopped is raised.
+    Raises:
+        JobStopped: If should_stop returned True before the last frame.
     """
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode '{output_mode}', expected one of {OUTPUT_MODES}.")
+    checkpoint = JobCheckpoint(checkpoint_path) if checkpoint_path else None
+    state = (checkpoint.load() if checkpoint else None) or {}
+    index = None
+    if index_path:
+        index = VideoIndex.load_or_build(video_path, index_path)
+    elif start_time is not None or end_time is not None:
+        index = VideoIndex.build(video_path)
     cap = cv2.VideoCapture(video_path)
     ret, frame = cap.read()
     if not ret:
         cap.release()
         raise ValueError("Failed to read the video file.")
 
-    transform = BarrelUndistortTransform(frame.shape, k1=-0.182, k2=0.0032)
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    transform = load_transform(camera_profile, frame.shape, calibration_dir)
+    frame_count = index.frame_count if index else int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    start_frame, end_frame = index.frame_range(start_time, end_time) if index else (0, None)
     fps = cap.get(cv2.CAP_PROP_FPS)
-    event_tracker = OverlapEventTracker(log_path=log_path, fps=fps)
     frame_size = (frame.shape[1], frame.shape[0])
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, frame_size)
+    media = None
+    if media_dir:
+        media = EventMediaRecorder(media_dir, fps, clip_seconds=clip_seconds, encoder_settings=encoder_settings)
 
-    network = DinoProcess()
-    network.load_model()
+    def on_event(*event):
+        if media:
+            media.mark(*event)
+        if event_callback:
+            event_callback(*event)
+    event_tracker = OverlapEventTracker(log_path=log_path, fps=fps, resume_state=state.get("tracker"),
+                                        on_event=on_event if media or event_callback else None,
+                                        rules_path=rules_path)
+    fill_estimator = None
+    if fill_log_path:
+        fill_estimator = FillLevelEstimator(log_path=fill_log_path, fps=fps, resume_state=state.get("fill"))
+    detections_writer = DetectionsWriter(detections_path or default_detections_path(log_path),
+                                         resume_state=state.get("detections"))
+    out = None
+    if output_mode == "video":
+        make_writer = partial(create_video_writer, fps=fps, frame_size=frame_size, **(encoder_settings or {}))
+        out = SegmentedVideoWriter(output_path, make_writer, state.get("segments")) if checkpoint \
+            else make_writer(output_path)
+
+    if network is None:
+        network = load_network()
+    if "class_colors" in state:
+        # Keep the colours assigned before the interruption
+        network.annotator.class_colors = {label: tuple(color) for label, color in state["class_colors"].items()}
 
-    frame_number = 0
+    # The first decoded frame is reused as the decode buffer, undistorted frames come from the pool
+    # and go back to it once the writer has finished with them.
+    pool = FramePool.like(frame, size=FRAME_POOL_SIZE)
+    frame_number = max(state.get("frame_number", 0), start_frame)
+    if frame_number:
+        # Seek straight to the first frame needed rather than decoding everything before it
+        if index:
+            index.seek(cap, frame_number)
+        else:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        ret, frame = cap.read(frame)
+    total_frames = (end_frame if end_frame is not None else frame_count) - start_frame
+
+    def save_checkpoint():
+        if out:
+            out.end_segment()
+        checkpoint.save({
+            "frame_number": frame_number,
+            "tracker": event_tracker.get_state(),
+            "fill": fill_estimator.get_state() if fill_estimator else None,
+            "detections": detections_writer.get_state(),
+            "segments": out.segments if out else [],
+            "class_colors": network.annotator.class_colors,
+        })
+
+    stopped = False
+    ret = ret and (end_frame is None or frame_number < end_frame)
     while ret:
-        undistorted = transform.apply(frame)
+        buffer = pool.acquire()
+        undistorted = transform.apply(frame, dst=buffer)
         boxes, logits, phrases = network.process_image(undistorted)
         phrases = [network.map_label(p) for p in phrases]
-        annotated = network.annotate_image(undistorted, boxes, logits, phrases)
 
-        detected_objects = {}
-        for box, phrase in zip(boxes, phrases):
-            detected_objects.setdefault(phrase.lower(), []).append(box)
-        event_tracker.update(frame_number, detected_objects)
+        event_tracker.update(frame_number, group_by_label(boxes, phrases))
+        if fill_estimator:
+            fill_estimator.update(frame_number, undistorted,
+                                  group_by_label(boxes_to_pixels(boxes, undistorted.shape), phrases))
+
+        detections_writer.update(frame_number, boxes, logits, phrases)
 
-        bgr_annotated = cv2.cvtColor(annotated, cv2.COLOR_RGB2BGR)
-        out.write(bgr_annotated)
+        image = network.annotate_image(undistorted, boxes, logits, phrases) if out else undistorted
+        if media:
+            media.update(frame_number, image)
+        if out:
+            out.write(image, on_done=partial(pool.release, buffer))
+        else:
+            pool.release(buffer)
 
-        ret, frame = cap.read()
+        ret, frame = cap.read(frame)
         frame_number += 1
+        ret = ret and (end_frame is None or frame_number < end_frame)
+        stopped = ret and should_stop is not None and should_stop()
+        if checkpoint and ret and (stopped or frame_number % checkpoint_interval == 0):
+            save_checkpoint()
         if progress_callback:
-            progress_callback(int((frame_number / frame_count) * 100))
+            progress_callback(int(((frame_number - start_frame) / max(total_frames, 1)) * 100))
+        if stopped:
+            break
 
     event_tracker.close()
+    if fill_estimator:
+        fill_estimator.close()
+    detections_writer.close()
+    if media:
+        media.close()
     cap.release()
-    out.release()
+    if stopped:
+        if out and not checkpoint:
+            out.release()
+        # Checkpointed segments are kept for the job to carry on from
+        raise JobStopped(frame_number)
+    if out:
+        out.release()
+    if checkpoint:
+        checkpoint.delete()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+"""
+    regression.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Speed against accuracy harness on the bundled sample frames. Golden detections are recorded
+        once with the baseline DinoProcess configuration, then candidate configurations, e.g. a lower
+        input resolution, other thresholds, batching or a different model with the same interface,
+        are run over the same corpus. Each candidate's latency and throughput are reported alongside
+        box recall and precision, and label agreement, against the goldens in one JSON report.
+
+        Usage:
+            python -m lab_monitor.regression golden --output data/goldens.json
+            python -m lab_monitor.regression run --golden data/goldens.json --report data/report.json \
+                --candidate baseline --candidate small:input_size=400 --candidate batched:batch_size=8
+
+    Change History:
+        0.1: Created.
+        0.2: Candidates set the model's input size instead of shrinking frames, which the model resized back up.
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+from lab_monitor.detections import format_detections
+from lab_monitor.model_options import add_model_arguments, parse_model_paths
+
+SAMPLE_DIRS = ("samples/raw", "samples/corrected")
+# Detections of the same object overlap at least this much
+IOU_THRESHOLD = 0.5
+CANDIDATE_OPTIONS = {"input_size": int, "box_threshold": float, "text_threshold": float, "batch_size": int}
+
+
+class Candidate:  # pylint: disable=R0903
+    """
+        A configuration to measure.
+    Args:
+        name (str): Name in the report.
+        input_size (int, optional): Short side the model resizes frames to, the model's own when not given.
+        box_threshold (float): Threshold for box detection.
+        text_threshold (float): Threshold for text detection.
+        batch_size (int): Frames per call, process_batch is used above 1.
+    """
+    def __init__(self, name: str, input_size: Optional[int] = None,  # pylint: disable=R0917
+                 box_threshold: float = 0.35, text_threshold: float = 0.25, batch_size: int = 1):
+        self.name = name
+        self.input_size = input_size
+        self.box_threshold = box_threshold
+        self.text_threshold = text_threshold
+        self.batch_size = batch_size
+
+    @classmethod
+    def parse(cls, spec: str) -> "Candidate":
+        """
+            Parses "name" or "name:option=value,...", e.g. "small:input_size=400,batch_size=4".
+        """
+        name, _, options = spec.partition(":")
+        kwargs = {}
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            if key not in CANDIDATE_OPTIONS:
+                raise ValueError(f"Unknown candidate option '{key}', expected one of {', '.join(CANDIDATE_OPTIONS)}.")
+            kwargs[key] = CANDIDATE_OPTIONS[key](value)
+        return cls(name, **kwargs)
+
+    def config(self) -> dict:
+        """
+            Returns the options as a dict for the report.
+        """
+        return {key: getattr(self, key) for key in CANDIDATE_OPTIONS}
+
+
+def load_corpus(sample_dirs=SAMPLE_DIRS) -> Dict[str, np.ndarray]:
+    """
+        Loads the sample frames.
+    Args:
+        sample_dirs (iterable): Directories of PNG frames.
+    Returns:
+        Dict[str, np.ndarray]: "<directory name>/<file name>" to BGR frame, in name order.
+    """
+    corpus = {}
+    for directory in sample_dirs:
+        for path in sorted(glob.glob(os.path.join(directory, "*.png"))):
+            image = cv2.imread(path)
+            if image is not None:
+                corpus[f"{os.path.basename(os.path.normpath(directory))}/{os.path.basename(path)}"] = image
+    return corpus
+
+
+@contextmanager
+def _input_size(network, input_size: Optional[int]):
+    """
+        Sets the model's input size while a candidate runs, when the candidate gives one.
+    """
+    if input_size is None:
+        yield
+        return
+    default_size = network.input_size
+    network.input_size = input_size
+    try:
+        yield
+    finally:
+        network.input_size = default_size
+
+
+def run_candidate(network, corpus: Dict[str, np.ndarray], candidate: Candidate) -> tuple:
+    """
+        Runs a candidate over the corpus, timing every call after a warm up call.
+    Args:
+        network: Model with DinoProcess's process_image, process_batch and map_label, and input_size
+            when the candidate sets it. The model's input size is restored afterwards.
+        corpus (dict): Name to BGR frame.
+        candidate (Candidate): Configuration to run.
+    Returns:
+        tuple: (name to detections record, latency in ms per frame, seconds for the whole corpus)
+    """
+    names = list(corpus)
+
+    def detect(batch):
+        images = [corpus[name] for name in batch]
+        if candidate.batch_size > 1:
+            return network.process_batch(images, box_threshold=candidate.box_threshold,
+                                         text_threshold=candidate.text_threshold)
+        return [network.process_image(images[0], candidate.box_threshold, candidate.text_threshold)]
+
+    with _input_size(network, candidate.input_size):
+        if names:
+            detect(names[:candidate.batch_size])
+        records, latencies = {}, []
+        start = time.perf_counter()
+        for offset in range(0, len(names), candidate.batch_size):
+            batch = names[offset:offset + candidate.batch_size]
+            batch_start = time.perf_counter()
+            results = detect(batch)
+            latencies.extend([(time.perf_counter() - batch_start) * 1000.0 / len(batch)] * len(batch))
+            for name, (boxes, logits, phrases) in zip(batch, results):
+                records[name] = format_detections(boxes, logits, [network.map_label(p) for p in phrases])
+        return records, latencies, time.perf_counter() - start
+
+
+def _xyxy(boxes) -> np.ndarray:
+    """
+        Converts normalised (cx, cy, w, h) boxes to (x1, y1, x2, y2).
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return np.concatenate((boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2), axis=1)
+
+
+def iou_matrix(boxes1, boxes2) -> np.ndarray:
+    """
+        Intersection over union of every pair of normalised (cx, cy, w, h) boxes.
+    Returns:
+        np.ndarray: len(boxes1) x len(boxes2) IoUs.
+    """
+    a, b = _xyxy(boxes1), _xyxy(boxes2)
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def match_detections(golden: dict, record: dict, iou_threshold: float = IOU_THRESHOLD) -> tuple:
+    """
+        Greedily matches a frame's detections to its golden detections, highest IoU first.
+    Returns:
+        tuple: (matched boxes, of which with the golden label, golden boxes, detected boxes)
+    """
+    ious = iou_matrix(golden["boxes"], record["boxes"])
+    matched = same_label = 0
+    while ious.size and ious.max() >= iou_threshold:
+        i, j = divmod(int(np.argmax(ious)), ious.shape[1])
+        matched += 1
+        same_label += golden["labels"][i] == record["labels"][j]
+        ious[i, :] = -1
+        ious[:, j] = -1
+    return matched, int(same_label), len(golden["boxes"]), len(record["boxes"])
+
+
+def score(goldens: Dict[str, dict], records: Dict[str, dict], iou_threshold: float = IOU_THRESHOLD) -> dict:
+    """
+        Scores a candidate's detections against the goldens over the whole corpus.
+    Returns:
+        dict: box_recall, box_precision and label_agreement, the share of matched boxes with the golden label.
+    """
+    matched = same_label = golden_boxes = detected_boxes = 0
+    for name, golden in goldens.items():
+        counts = match_detections(golden, records.get(name, {"boxes": [], "labels": []}), iou_threshold)
+        matched, same_label = matched + counts[0], same_label + counts[1]
+        golden_boxes, detected_boxes = golden_boxes + counts[2], detected_boxes + counts[3]
+    return {
+        "box_recall": round(matched / golden_boxes, 4) if golden_boxes else 1.0,
+        "box_precision": round(matched / detected_boxes, 4) if detected_boxes else 1.0,
+        "label_agreement": round(same_label / matched, 4) if matched else 1.0,
+    }
+
+
+def record_goldens(network, corpus: Dict[str, np.ndarray], output_path: str) -> dict:
+    """
+        Runs the baseline configuration and saves its detections as the goldens.
+    Returns:
+        dict: The saved goldens.
+    """
+    baseline = Candidate("baseline")
+    records, _, _ = run_candidate(network, corpus, baseline)
+    goldens = {"created": datetime.now().isoformat(timespec="seconds"), "config": baseline.config(),
+               "images": records}
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(goldens, f)
+    return goldens
+
+
+def evaluate(network, corpus: Dict[str, np.ndarray], goldens: dict,  # pylint: disable=R0917
+             candidates: List[Candidate], report_path: Optional[str] = None,
+             iou_threshold: float = IOU_THRESHOLD) -> dict:
+    """
+        Measures each candidate's speed and accuracy against the goldens.
+    Args:
+        network: Model with DinoProcess's interface.
+        corpus (dict): Name to BGR frame.
+        goldens (dict): Goldens saved by record_goldens.
+        candidates (List[Candidate]): Configurations to measure.
+        report_path (str, optional): Path to save the report as JSON.
+        iou_threshold (float): Least IoU of a matching box.
+    Returns:
+        dict: {"frames", "iou_threshold", "candidates": [{"name", "config", "latency_ms_p50", "latency_ms_p95",
+            "throughput_fps", "box_recall", "box_precision", "label_agreement"}]}
+    """
+    missing = set(goldens["images"]) ^ set(corpus)
+    if missing:
+        raise ValueError(f"The goldens and the corpus differ in {len(missing)} frames, record the goldens again.")
+    results = []
+    for candidate in candidates:
+        records, latencies, seconds = run_candidate(network, corpus, candidate)
+        p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (0.0, 0.0)
+        results.append({
+            "name": candidate.name,
+            "config": candidate.config(),
+            "latency_ms_p50": round(float(p50), 2),
+            "latency_ms_p95": round(float(p95), 2),
+            "throughput_fps": round(len(records) / seconds, 2) if seconds > 0 else None,
+            **score(goldens["images"], records, iou_threshold),
+        })
+    report = {"created": datetime.now().isoformat(timespec="seconds"), "frames": len(corpus),
+              "iou_threshold": iou_threshold, "candidates": results}
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Measure detection speed against accuracy on the sample frames.")
+    parser.add_argument("command", choices=("golden", "run"), help="Record the goldens, or run candidates.")
+    parser.add_argument("--samples", nargs="+", default=list(SAMPLE_DIRS), help="Directories of sample frames.")
+    parser.add_argument("--golden", default="goldens.json", help="Goldens file to read.")
+    parser.add_argument("--output", default="goldens.json", help="Goldens file to write.")
+    parser.add_argument("--candidate", action="append", default=None,
+                        help="name:option=value,... with options " + ", ".join(CANDIDATE_OPTIONS) + ".")
+    parser.add_argument("--report", default="regression_report.json", help="Report file to write.")
+    add_model_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # Imported here so the scoring functions can be used without torch and GroundingDINO
+    from lab_monitor.dino_functions import DinoProcess  # pylint: disable=C0415
+    network = DinoProcess()
+    network.load_model(**parse_model_paths(args))
+    corpus = load_corpus(args.samples)
+
+    if args.command == "golden":
+        record_goldens(network, corpus, args.output)
+        print(f"Recorded goldens for {len(corpus)} frames to {args.output}")
+        return
+    with open(args.golden, "r", encoding="utf-8") as f:
+        goldens = json.load(f)
+    candidates = [Candidate.parse(spec) for spec in (args.candidate or ["baseline"])]
+    report = evaluate(network, corpus, goldens, candidates, args.report)
+    print(json.dumps(report["candidates"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+    render.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.4
+
+    Description:
+        Renders annotated video for a time range on demand, from the original upload and the
+        detections sidecar written while it was processed, so only the frames someone asks to
+        watch are ever annotated and encoded. Rendered ranges are kept in an LRU cache.
+
+    Change History:
+        0.1: Created.
+        0.2: Lens correction comes from the job's camera profile.
+        0.3: RenderCache clears renders left by a previous run, which it no longer tracks.
+        0.4: Concurrent requests for the same range render it once, and failed renders leave no file.
+"""
+from collections import OrderedDict
+import os
+import threading
+import uuid
+import cv2
+import numpy as np
+from lab_monitor.annotation import BoxAnnotator
+from lab_monitor.calibration import DEFAULT_PROFILE, load_transform
+from lab_monitor.detections import read_detections
+from lab_monitor.video_index import VideoIndex
+from lab_monitor.video_writers import create_video_writer
+
+
+def render_range(video_path: str, detections_path: str, output_path: str,  # pylint: disable=R0917
+                 start_time: float = None, end_time: float = None, index_path: str = None,
+                 encoder_settings: dict = None, camera_profile: str = DEFAULT_PROFILE,
+                 calibration_dir: str = None) -> None:
+    """
+        Renders the annotated video for a time range.
+    Args:
+        video_path (str): Path to the original video.
+        detections_path (str): Path to the detections sidecar written by process_video.
+        output_path (str): Path to save the rendered video.
+        start_time (float, optional): Range start in seconds, the start of the video when not given.
+        end_time (float, optional): Range end in seconds, the end of the video when not given.
+        index_path (str, optional): Path of the video's keyframe index, built and saved if it does not exist.
+        encoder_settings (dict, optional): Keyword arguments for create_video_writer.
+        camera_profile (str): Name of the camera calibration profile the video was processed with.
+        calibration_dir (str, optional): Directory holding the camera calibration profiles, whose
+            undistortion maps are shared between processes. Only built-in profiles are available without it.
+    """
+    index = VideoIndex.load_or_build(video_path, index_path) if index_path else VideoIndex.build(video_path)
+    start_frame, end_frame = index.frame_range(start_time, end_time)
+    if end_frame <= start_frame:
+        raise ValueError("The time range contains no frames.")
+
+    # Classes get colours in order of first appearance, so assign them over the frames before the
+    # range too and the colours match a video rendered from the start.
+    annotator = BoxAnnotator()
+    detections = {}
+    for frame_number, record in read_detections(detections_path, end_frame=end_frame):
+        for label in record["labels"]:
+            annotator.color_for(label)
+        if frame_number >= start_frame:
+            detections[frame_number] = record
+
+    cap = cv2.VideoCapture(video_path)
+    index.seek(cap, start_frame)
+    ret, frame = cap.read()
+    if not ret:
+        cap.release()
+        raise ValueError("Failed to read the first frame of the range.")
+    transform = load_transform(camera_profile, frame.shape, calibration_dir)
+    undistorted = np.empty_like(frame)
+    out = create_video_writer(output_path, index.fps, (frame.shape[1], frame.shape[0]),
+                              **{**(encoder_settings or {}), "threaded": False})
+    try:
+        for frame_number in range(start_frame, end_frame):
+            if frame_number > start_frame:
+                ret, frame = cap.read(frame)
+                if not ret:
+                    break
+            transform.apply(frame, dst=undistorted)
+            record = detections.get(frame_number)
+            if record:
+                annotator.annotate(undistorted, record["boxes"], record["scores"], record["labels"])
+            out.write(undistorted)
+    finally:
+        cap.release()
+        out.release()
+
+
+class RenderCache:
+    """
+        Keeps the most recently requested rendered ranges on disk, deleting the least recently used.
+        Videos already in the directory are from a previous run and untracked, so they are deleted.
+        Requests for a range that is already being rendered wait for it rather than rendering it again.
+    Args:
+        directory (str): Directory the rendered videos are kept in.
+        max_entries (int): Number of rendered videos to keep.
+    """
+    def __init__(self, directory, max_entries: int = 32):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.rendering = {}
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".mp4"):
+                os.remove(os.path.join(directory, name))
+
+    def get(self, key: tuple, render) -> str:
+        """
+            Returns the path of a rendered video, rendering it on a cache miss.
+        Args:
+            key (tuple): Identifies the render, e.g. (job_id, start_time, end_time).
+            render (callable): Called with the output path to render the video.
+        Returns:
+            str: Path of the rendered video.
+        """
+        with self.lock:
+            path = self._lookup(key)
+            if path is not None:
+                return path
+            key_lock = self.rendering.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                with self.lock:
+                    # Another request may have rendered it while this one waited
+                    path = self._lookup(key)
+                if path is None:
+                    path = self._render(key, render)
+            finally:
+                with self.lock:
+                    self.rendering.pop(key, None)
+        return path
+
+    def _lookup(self, key: tuple):
+        """
+            Returns the path of a cached render and marks it as recently used, or None. Call with the lock held.
+        """
+        path = self.entries.get(key)
+        if path is not None and os.path.exists(path):
+            self.entries.move_to_end(key)
+            return path
+        return None
+
+    def _render(self, key: tuple, render) -> str:
+        """
+            Renders a video to a unique temporary file, then moves it into the cache.
+        """
+        path = os.path.join(self.directory, "_".join(str(part) for part in key) + ".mp4")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.mp4"
+        try:
+            render(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self.lock:
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                _, evicted = self.entries.popitem(last=False)
+                if os.path.exists(evicted):
+                    os.remove(evicted)
+        return path
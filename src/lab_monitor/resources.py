@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+    resources.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Splits the CPU cores between the running jobs and the shared model, so concurrent jobs do
+        not oversubscribe the machine. Each job's thread decodes, undistorts, annotates and encodes
+        with OpenCV, while the heavy work is the model's forward pass, run with torch's intra-op
+        threads on the inference scheduler's thread for every job. Each job gets a small budget of
+        cores and the model gets the rest, recomputed whenever a job starts or finishes.
+
+        OpenCV's thread count is process wide, so it is set to one job's budget. torch's thread count
+        belongs to the thread that calls it, so the scheduler applies the model's budget on its own
+        thread before the next batch. With pinning (Linux only), each job's thread is restricted to
+        the job's cores, as are the writer threads and ffmpeg processes it starts after that, and the
+        scheduler's thread to the model's cores.
+
+    Change History:
+        0.1: Created.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import threading
+from typing import Iterable, List, Optional, Tuple
+import cv2
+
+# Share of the cores for the jobs' own work when the model runs in this process
+JOB_SHARE = 0.25
+
+
+class CpuBudget:  # pylint: disable=R0903
+    """
+        Threads and cores given to a job or to the model.
+    Args:
+        threads (int): Parallel threads to use.
+        cores (List[int]): CPU ids to run on when pinned.
+    """
+    def __init__(self, threads: int, cores: List[int]):
+        self.threads = threads
+        self.cores = cores
+
+    def as_dict(self) -> dict:
+        """
+            Returns the budget for reporting.
+        """
+        return {"threads": self.threads, "cores": self.cores}
+
+
+def available_cores() -> List[int]:
+    """
+        Returns the ids of the CPUs this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_thread(native_id: int, cores: Iterable[int]) -> bool:
+    """
+        Restricts a thread to some CPUs. Threads and processes it starts afterwards inherit the restriction.
+    Args:
+        native_id (int): Thread id from threading.get_native_id, 0 for the calling thread.
+        cores (iterable): CPU ids.
+    Returns:
+        bool: False if CPU affinity is not supported here or the thread has exited.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(native_id, set(cores))
+    except OSError:
+        return False
+    return True
+
+
+def allocate(cores: List[int], jobs: int, job_share: float = JOB_SHARE,
+             inference: bool = True) -> Tuple[List[CpuBudget], Optional[CpuBudget]]:
+    """
+        Splits cores between jobs and the model. Each job gets an equal part of job_share of the cores,
+        at least one, and the model the cores left over. Without a model in this process the jobs share
+        every core. With more jobs than cores, jobs share cores in turn.
+    Args:
+        cores (List[int]): CPU ids to split.
+        jobs (int): Running jobs.
+        job_share (float): Share of the cores for the jobs when the model runs here.
+        inference (bool): Whether the model runs in this process.
+    Returns:
+        tuple: (a CpuBudget per job, the model's CpuBudget or None without a model)
+    """
+    total = len(cores)
+    if not jobs:
+        return [], CpuBudget(total, list(cores)) if inference else None
+    per_job = max(1, (int(total * job_share) if inference else total) // jobs)
+    budgets = [CpuBudget(per_job, [cores[(index * per_job + offset) % total] for offset in range(per_job)])
+               for index in range(jobs)]
+    if not inference:
+        return budgets, None
+    left = cores[jobs * per_job:]
+    return budgets, CpuBudget(max(1, len(left)), left or list(cores))
+
+
+class ResourceManager:
+    """
+        Gives each running job a CPU budget and the shared model the rest, rebalancing as jobs come and go.
+    Args:
+        scheduler (InferenceScheduler, optional): Scheduler running the shared model in this process.
+            None when the model runs elsewhere, e.g. on a model server, and the jobs share every core.
+        cores (iterable, optional): CPU ids to split, every CPU this process may use by default.
+        job_share (float): Share of the cores for the jobs when the model runs here.
+        pin (bool): Pin jobs and the model to their cores.
+    """
+    def __init__(self, scheduler=None, cores: Iterable[int] = None, job_share: float = JOB_SHARE, pin: bool = False):
+        self.scheduler = scheduler
+        self.cores = list(cores) if cores is not None else available_cores()
+        self.job_share = job_share
+        self.pin = pin
+        # Job id to native id of the thread running it, in start order
+        self.jobs = OrderedDict()
+        self.budgets = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def job(self, job_id: str):
+        """
+            Budgets the calling thread, which runs the job, until the block exits.
+        Yields:
+            CpuBudget: The job's budget when it started, it changes as other jobs start and finish.
+        """
+        native_id = threading.get_native_id()
+        with self.lock:
+            self.jobs[job_id] = native_id
+            self._rebalance()
+            budget = self.budgets[job_id]
+        try:
+            yield budget
+        finally:
+            with self.lock:
+                self.jobs.pop(job_id, None)
+                self._rebalance()
+            if self.pin:
+                pin_thread(native_id, self.cores)
+
+    def _rebalance(self) -> None:
+        """
+            Recomputes and applies every budget. Called with the lock held.
+        """
+        budgets, inference = self._allocate()
+        self.budgets = dict(zip(self.jobs, budgets))
+        # A negative count restores OpenCV's default once no job is running
+        cv2.setNumThreads(budgets[0].threads if budgets else -1)
+        if self.scheduler is not None:
+            self.scheduler.set_num_threads(inference.threads, inference.cores if self.pin else None)
+        if self.pin:
+            for job_id, native_id in self.jobs.items():
+                pin_thread(native_id, self.budgets[job_id].cores)
+
+    def _allocate(self) -> Tuple[List[CpuBudget], Optional[CpuBudget]]:
+        """
+            Splits the cores for the running jobs. Called with the lock held.
+        """
+        return allocate(self.cores, len(self.jobs), self.job_share, self.scheduler is not None)
+
+    def usage(self) -> dict:
+        """
+            Reports the current budgets.
+        Returns:
+            dict: {"cores": int, "pinned": bool, "inference": {"threads", "cores"} or None,
+                "jobs": {job_id: {"threads", "cores"}}}
+        """
+        with self.lock:
+            inference = self._allocate()[1]
+            return {"cores": len(self.cores), "pinned": self.pin,
+                    "inference": inference.as_dict() if inference else None,
+                    "jobs": {job_id: budget.as_dict() for job_id, budget in self.budgets.items()}}
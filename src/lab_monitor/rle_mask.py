@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+    rle_mask.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Compact run-length encoded binary masks. Masks are stored as runs over the
+        row-major flattened image so per-object, per-frame masks stay small, and
+        area, bounding box and intersection queries work on the runs directly
+        without decoding back to dense arrays.
+
+    Change History:
+        0.1: Created.
+"""
+from typing import Optional, Tuple
+import numpy as np
+
+
+class RLEMask:
+    """
+        A binary mask stored as runs of set pixels.
+    Args:
+        shape (tuple): Mask shape (height, width).
+        starts (np.ndarray): Sorted flat start offsets of each run.
+        lengths (np.ndarray): Length of each run, in pixels.
+    """
+    def __init__(self, shape, starts, lengths):
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        if self.starts.shape != self.lengths.shape:
+            raise ValueError("starts and lengths must have the same length.")
+
+    @classmethod
+    def from_dense(cls, mask: np.ndarray) -> "RLEMask":
+        """
+            Encodes a dense 2D mask.
+        Args:
+            mask (np.ndarray): 2D array, any non-zero value is treated as set.
+        Returns:
+            RLEMask: The encoded mask.
+        """
+        if mask.ndim != 2:
+            raise ValueError("Mask must be 2D.")
+        flat = np.zeros(mask.size + 2, dtype=np.int8)
+        flat[1:-1] = mask.ravel() != 0
+        changes = np.diff(flat)
+        starts = np.flatnonzero(changes == 1)
+        ends = np.flatnonzero(changes == -1)
+        return cls(mask.shape, starts, ends - starts)
+
+    def to_dense(self) -> np.ndarray:
+        """
+            Decodes the mask to a dense boolean array.
+        Returns:
+            np.ndarray: Boolean array of shape (height, width).
+        """
+        flat = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.int8)
+        np.add.at(flat, self.starts, 1)
+        np.add.at(flat, self.starts + self.lengths, -1)
+        return np.cumsum(flat[:-1]).astype(bool).reshape(self.shape)
+
+    def to_dict(self) -> dict:
+        """
+            Serialises the mask to a JSON friendly dictionary.
+        Returns:
+            dict: Dictionary with size, starts and lengths.
+        """
+        return {"size": list(self.shape), "starts": self.starts.tolist(), "lengths": self.lengths.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RLEMask":
+        """
+            Restores a mask produced by to_dict.
+        Args:
+            data (dict): Dictionary with size, starts and lengths.
+        Returns:
+            RLEMask: The restored mask.
+        """
+        return cls(data["size"], data["starts"], data["lengths"])
+
+    @property
+    def area(self) -> int:
+        """
+            Number of set pixels.
+        """
+        return int(self.lengths.sum())
+
+    def bbox(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+            Computes the bounding box of the set pixels from the runs.
+        Returns:
+            tuple: (x1, y1, x2, y2) with exclusive x2/y2, or None if the mask is empty.
+        """
+        if self.starts.size == 0:
+            return None
+        width = self.shape[1]
+        last = self.starts + self.lengths - 1
+        first_rows = self.starts // width
+        last_rows = last // width
+        y1 = int(first_rows.min())
+        y2 = int(last_rows.max()) + 1
+        # A run that wraps onto the next row covers column 0 and the last column
+        if np.any(first_rows != last_rows):
+            return 0, y1, width, y2
+        x1 = int((self.starts % width).min())
+        x2 = int((last % width).max()) + 1
+        return x1, y1, x2, y2
+
+    def intersection_area(self, other: "RLEMask") -> int:
+        """
+            Counts the pixels set in both masks by sweeping over the run boundaries.
+        Args:
+            other (RLEMask): Mask of the same shape.
+        Returns:
+            int: Number of overlapping pixels.
+        """
+        if self.shape != other.shape:
+            raise ValueError(f"Mask shapes differ: {self.shape} vs {other.shape}.")
+        if self.starts.size == 0 or other.starts.size == 0:
+            return 0
+        self_end = self.starts[-1] + self.lengths[-1]
+        other_end = other.starts[-1] + other.lengths[-1]
+        if self_end <= other.starts[0] or other_end <= self.starts[0]:
+            return 0
+
+        positions = np.concatenate((self.starts, self.starts + self.lengths,
+                                    other.starts, other.starts + other.lengths))
+        deltas = np.concatenate((np.ones(self.starts.size, dtype=np.int8),
+                                 -np.ones(self.starts.size, dtype=np.int8),
+                                 np.ones(other.starts.size, dtype=np.int8),
+                                 -np.ones(other.starts.size, dtype=np.int8)))
+        order = np.argsort(positions, kind="stable")
+        positions = positions[order]
+        coverage = np.cumsum(deltas[order])[:-1]
+        segment_lengths = np.diff(positions)
+        return int(segment_lengths[coverage == 2].sum())
+
+    def intersects(self, other: "RLEMask") -> bool:
+        """
+            Checks if two masks share any pixel, rejecting on bounding boxes first.
+        Args:
+            other (RLEMask): Mask of the same shape.
+        Returns:
+            bool: True if the masks overlap.
+        """
+        box1, box2 = self.bbox(), other.bbox()
+        if box1 is None or box2 is None:
+            return False
+        if min(box1[2], box2[2]) <= max(box1[0], box2[0]) or min(box1[3], box2[3]) <= max(box1[1], box2[1]):
+            return False
+        return self.intersection_area(other) > 0
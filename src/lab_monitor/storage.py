@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+"""
+    storage.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Keeps the service's artifact directories within size and age budgets. Artifacts are
+        evicted least recently used first, where downloading an artifact counts as using it.
+        The last use is kept in the file's access time, so it survives a restart. Artifacts
+        belonging to a job that is running, or being uploaded, are never evicted.
+
+        Artifact file names start with their job id, e.g. "<job_id>.mp4" or "<job_id>_fill.csv".
+        A subdirectory named after a job, e.g. its event media, is one artifact.
+
+    Change History:
+        0.1: Created.
+        0.2: Job subdirectories are artifacts, and added per-job usage.
+"""
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class StorageBudget:  # pylint: disable=R0903
+    """
+        Limits on one directory.
+    Args:
+        max_bytes (int, optional): Largest total size of the directory's files.
+        max_age_seconds (float, optional): Files unused for longer than this are evicted.
+    """
+    def __init__(self, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+
+def job_id_of(path: Path) -> str:
+    """
+        Returns the job id an artifact belongs to, from its file name.
+    """
+    return path.name.split(".")[0].split("_")[0]
+
+
+def _tree_stat(path: str) -> tuple:
+    """
+        Returns (last used, size) of a directory's files. The directory's own access time is not used,
+        as listing it updates that.
+    """
+    last_used, size = os.stat(path).st_mtime, 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(root, name), follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            last_used, size = max(last_used, stat.st_atime, stat.st_mtime), size + stat.st_size
+    return last_used, size
+
+
+class StorageManager:
+    """
+        Evicts artifacts to keep directories within their budgets.
+    Args:
+        budgets (dict): Directory to StorageBudget.
+        min_free_bytes (int): Free disk space to keep, new uploads are refused below it.
+        active_jobs (callable, optional): Returns the ids of jobs whose artifacts are in use.
+    """
+    def __init__(self, budgets: Dict[Path, StorageBudget], min_free_bytes: int = 0,
+                 active_jobs: Callable[[], Iterable[str]] = None):
+        self.budgets = {Path(directory): budget for directory, budget in budgets.items()}
+        self.min_free_bytes = min_free_bytes
+        self.active_jobs = active_jobs or (lambda: ())
+        self.pinned = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @contextmanager
+    def pinned_job(self, job_id: str):
+        """
+            Protects a job's artifacts while they are being written, e.g. during an upload.
+        """
+        with self.lock:
+            self.pinned.add(job_id)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.pinned.discard(job_id)
+
+    def touch(self, path) -> None:
+        """
+            Records that an artifact was used, e.g. downloaded.
+        """
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _files(directory: Path, job_id: str = None) -> List[tuple]:
+        """
+            Lists a directory's artifacts as (last used, size, path), least recently used first.
+            Job subdirectories are listed with the total size of their files.
+        """
+        files = []
+        if directory.is_dir():
+            for entry in os.scandir(directory):
+                if job_id is not None and job_id_of(Path(entry.path)) != job_id:
+                    continue
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, Path(entry.path)))
+                    elif entry.is_dir(follow_symlinks=False):
+                        files.append((*_tree_stat(entry.path), Path(entry.path)))
+                except FileNotFoundError:
+                    # Removed while listing, e.g. by a cancelled job
+                    continue
+        return sorted(files)
+
+    def _protected(self) -> set:
+        """
+            Returns the ids of jobs whose artifacts must not be evicted.
+        """
+        with self.lock:
+            return set(self.pinned) | set(self.active_jobs())
+
+    def _remove(self, path: Path) -> bool:
+        """
+            Removes an artifact unless its job became active since the directory was listed.
+        """
+        if job_id_of(path) in self._protected():
+            return False
+        try:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def evict(self, directory: Path = None, extra_bytes: int = 0) -> List[Path]:
+        """
+            Evicts expired artifacts, then the least recently used until each directory is within its budget.
+        Args:
+            directory (Path, optional): Only this directory.
+            extra_bytes (int): Bytes about to be written to the directory, to make room for.
+        Returns:
+            List[Path]: Evicted files.
+        """
+        evicted = []
+        now = time.time()
+        for path, budget in self.budgets.items():
+            if directory is not None and path != Path(directory):
+                continue
+            files = self._files(path)
+            protected = self._protected()
+            total = sum(size for _, size, _ in files) + extra_bytes
+            for last_used, size, file_path in files:
+                if job_id_of(file_path) in protected:
+                    continue
+                expired = budget.max_age_seconds is not None and now - last_used > budget.max_age_seconds
+                over = budget.max_bytes is not None and total > budget.max_bytes
+                if (expired or over) and self._remove(file_path):
+                    total -= size
+                    evicted.append(file_path)
+        return evicted
+
+    def has_room(self, directory: Path, nbytes: int) -> bool:
+        """
+            Evicts to make room for a new artifact and reports whether it fits, within the directory's
+            budget and the free disk space to keep.
+        Args:
+            directory (Path): Directory the artifact will be written to.
+            nbytes (int): Size of the artifact.
+        Returns:
+            bool: True if the artifact can be written.
+        """
+        directory = Path(directory)
+        budget = self.budgets.get(directory, StorageBudget())
+        if budget.max_bytes is not None and nbytes > budget.max_bytes:
+            return False
+        self.evict(directory, extra_bytes=nbytes)
+        used = sum(size for _, size, _ in self._files(directory))
+        if budget.max_bytes is not None and used + nbytes > budget.max_bytes:
+            return False
+        if shutil.disk_usage(directory).free - nbytes < self.min_free_bytes:
+            # Make room in the other directories on the same disk too
+            self.evict()
+        return shutil.disk_usage(directory).free - nbytes >= self.min_free_bytes
+
+    def usage(self) -> dict:
+        """
+            Reports each directory's usage against its budget and the free disk space.
+        Returns:
+            dict: {"directories": {directory: {"bytes", "files", "max_bytes", "max_age_seconds"}},
+                "free_bytes": int, "min_free_bytes": int}
+        """
+        directories = {}
+        for path, budget in self.budgets.items():
+            files = self._files(path)
+            directories[path.name] = {"bytes": sum(size for _, size, _ in files), "files": len(files),
+                                      "max_bytes": budget.max_bytes, "max_age_seconds": budget.max_age_seconds}
+        free = min((shutil.disk_usage(path).free for path in self.budgets if path.is_dir()), default=None)
+        return {"directories": directories, "free_bytes": free, "min_free_bytes": self.min_free_bytes}
+
+    def job_usage(self, job_id: str) -> dict:
+        """
+            Reports the space a job's artifacts take up.
+        Args:
+            job_id (str): Job to report.
+        Returns:
+            dict: Directory name to bytes, for the directories holding any of the job's artifacts.
+        """
+        usage = {}
+        for path in self.budgets:
+            files = self._files(path, job_id)
+            if files:
+                usage[path.name] = sum(size for _, size, _ in files)
+        return usage
+
+    def start(self, interval: float = 60.0) -> None:
+        """
+            Evicts on a background thread every interval seconds until stopped.
+        """
+        def run():
+            while not self.stopped.wait(interval):
+                self.evict()
+
+        if self.thread is None:
+            self.stopped.clear()
+            self.thread = threading.Thread(target=run, daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        """
+            Stops the background eviction thread.
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+"""
+    sweep.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tunes the detection thresholds and interaction rules from one inference pass. A video is
+        recorded once at a low box threshold, keeping every box with its score for each caption
+        token. A grid of box thresholds, text thresholds and rules files is then evaluated by
+        filtering the recording in NumPy and replaying the event tracker for each configuration,
+        in parallel across cores. Each configuration's events are compared with a reference log.
+
+        Usage:
+            python -m lab_monitor.sweep record data/video.mp4 data/video.npz
+            python -m lab_monitor.sweep run data/video.npz --reference data/video_reference.csv \
+                --box-thresholds 0.25 0.3 0.35 0.4 --text-thresholds 0.2 0.25 0.3 --output sweep.csv
+
+    Change History:
+        0.1: Created.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import itertools
+import json
+import os
+from typing import Iterable, List, Optional
+import cv2
+import numpy as np
+from lab_monitor.calibration import DEFAULT_PROFILE, load_transform
+from lab_monitor.event_tracker import OverlapEventTracker
+from lab_monitor.pipeline import group_by_label
+
+# Recording loaded once in each sweep worker
+_RECORDING = None
+TABLE_COLUMNS = ("box_threshold", "text_threshold", "rules", "events", "reference", "matched",
+                 "precision", "recall", "f1")
+
+
+def decode_phrase(tokens: List[str], selected: Iterable[bool]) -> str:
+    """
+        Rebuilds a detection's phrase from its selected caption tokens, as GroundingDINO's
+        get_phrases_from_posmap and the BERT tokenizer's decoding do. The first token, [CLS], is never used.
+    Args:
+        tokens (List[str]): WordPiece caption tokens.
+        selected (Iterable[bool]): Whether each token scored above the text threshold.
+    Returns:
+        str: The phrase, with full stops removed as DinoProcess does.
+    """
+    words = []
+    for position, (token, chosen) in enumerate(zip(tokens, selected)):
+        if not chosen or position == 0:
+            continue
+        if token.startswith("##") and words:
+            words[-1] += token[2:]
+        else:
+            words.append(token)
+    phrase = " ".join(words)
+    for punctuation in (".", ",", "?", "!"):
+        phrase = phrase.replace(f" {punctuation}", punctuation)
+    return phrase.replace(".", "")
+
+
+class Recording:
+    """
+        Every box detected in a video above a low threshold, with its score for each caption token.
+    Args:
+        frames (np.ndarray): B frame numbers, sorted.
+        boxes (np.ndarray): B x 4 normalised (cx, cy, w, h) boxes.
+        token_scores (np.ndarray): B x T token scores.
+        tokens (List[str]): T caption tokens.
+        meta (dict): fps, frame_count, min_box_threshold and group_map, the model's phrase to label mapping.
+    """
+    def __init__(self, frames, boxes, token_scores, tokens, meta: dict):
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.token_scores = np.asarray(token_scores, dtype=np.float32).reshape(len(self.frames), len(tokens))
+        self.tokens = list(tokens)
+        self.meta = meta
+        self.scores = self.token_scores.max(axis=1) if len(self.frames) else np.zeros(0, dtype=np.float32)
+        # Offsets of each frame's boxes, frame n's boxes are offsets[n]:offsets[n + 1]
+        self.offsets = np.searchsorted(self.frames, np.arange(meta["frame_count"] + 1))
+
+    def save(self, path: str) -> None:
+        """
+            Saves the recording as a compressed .npz file.
+        """
+        np.savez_compressed(path, frames=self.frames, boxes=self.boxes, token_scores=self.token_scores,
+                            tokens=np.array(self.tokens), meta=np.array(json.dumps(self.meta)))
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        """
+            Loads a recording saved with save.
+        """
+        with np.load(path) as data:
+            return cls(data["frames"], data["boxes"], data["token_scores"], list(data["tokens"]),
+                       json.loads(str(data["meta"])))
+
+    def labels(self, text_threshold: float) -> np.ndarray:
+        """
+            Returns every box's label at a text threshold, mapped to its group as DinoProcess.map_label does.
+            Each distinct token selection is only decoded once.
+        """
+        group_map = self.meta.get("group_map", {})
+        selections, inverse = np.unique(self.token_scores > text_threshold, axis=0, return_inverse=True)
+        decoded = []
+        for selection in selections:
+            phrase = decode_phrase(self.tokens, selection).strip().lower()
+            decoded.append(group_map.get(phrase, phrase))
+        return np.array(decoded, dtype=object)[inverse.reshape(-1)] if decoded else np.array([], dtype=object)
+
+
+def record_video(video_path: str, output_path: str, network=None,  # pylint: disable=R0917
+                 min_box_threshold: float = 0.05, batch_size: int = 8, camera_profile: str = DEFAULT_PROFILE,
+                 calibration_dir: Optional[str] = None, progress_callback=None) -> Recording:
+    """
+        Runs the model over a video once and saves every box above min_box_threshold.
+    Args:
+        video_path (str): Path to the video.
+        output_path (str): Path to save the recording (.npz).
+        network (optional): DinoProcess with process_raw, loaded when not given.
+        min_box_threshold (float): Lowest box threshold the sweep can use.
+        batch_size (int): Frames per forward pass.
+        camera_profile (str): Camera calibration profile to correct the lens with, as the pipeline does.
+        calibration_dir (str, optional): Directory holding the camera calibration profiles.
+        progress_callback (callable, optional): Called with the percentage of frames processed.
+    Returns:
+        Recording: The recording.
+    """
+    if network is None:
+        # Imported here so sweeping a saved recording does not load torch and GroundingDINO
+        from lab_monitor.dino_functions import DinoProcess  # pylint: disable=C0415
+        network = DinoProcess()
+        network.load_model()
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames, boxes, token_scores, tokens = [], [], [], []
+    frame_number = 0
+
+    def flush(batch):
+        nonlocal tokens
+        results, batch_tokens = network.process_raw(batch, box_threshold=min_box_threshold)
+        tokens = batch_tokens or tokens
+        for offset, (frame_boxes, frame_scores) in enumerate(results):
+            frames.extend([frame_number - len(batch) + offset] * len(frame_boxes))
+            boxes.extend(np.asarray(frame_boxes, dtype=np.float32).reshape(-1, 4))
+            token_scores.extend(np.asarray(frame_scores, dtype=np.float32))
+
+    batch = []
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            batch.append(load_transform(camera_profile, frame.shape, calibration_dir).apply(frame))
+            frame_number += 1
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+                if progress_callback:
+                    progress_callback(int(frame_number / max(frame_count, 1) * 100))
+        if batch:
+            flush(batch)
+    finally:
+        cap.release()
+
+    meta = {"video": os.path.basename(video_path), "fps": fps, "frame_count": frame_number,
+            "min_box_threshold": min_box_threshold, "group_map": dict(getattr(network, "GROUP_MAP", {}))}
+    recording = Recording(frames, np.array(boxes).reshape(-1, 4),
+                          np.array(token_scores).reshape(len(frames), len(tokens)), tokens, meta)
+    recording.save(output_path)
+    return recording
+
+
+def replay(recording: Recording, keep: np.ndarray, labels: np.ndarray, rules_path: Optional[str] = None) -> list:
+    """
+        Runs the event tracker over a recording with a subset of its boxes, as the pipeline would have.
+    Args:
+        recording (Recording): The recording.
+        keep (np.ndarray): B booleans, the boxes that pass the thresholds.
+        labels (np.ndarray): B labels.
+        rules_path (str, optional): Interaction rules file, the bundled lab rules when not given.
+    Returns:
+        list: (frame, timestamp, action) per event.
+    """
+    events = []
+    tracker = OverlapEventTracker(os.devnull, recording.meta["fps"], rules_path=rules_path,
+                                  on_event=lambda frame, timestamp, action: events.append((frame, timestamp, action)))
+    try:
+        offsets = recording.offsets
+        for frame_number in range(recording.meta["frame_count"]):
+            start, end = offsets[frame_number], offsets[frame_number + 1]
+            chosen = keep[start:end]
+            tracker.update(frame_number, group_by_label(recording.boxes[start:end][chosen], labels[start:end][chosen]))
+    finally:
+        tracker.close()
+    return events
+
+
+def read_event_log(path: str) -> list:
+    """
+        Reads an event log written by OverlapEventTracker.
+    Returns:
+        list: (frame, timestamp, action) per event.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [(int(row["frame"]), float(row["timestamp"]), row["action"]) for row in csv.DictReader(f)]
+
+
+def agreement(events: list, reference: list, tolerance: float = 1.0) -> dict:
+    """
+        Matches events to reference events with the same action at most tolerance seconds apart.
+    Args:
+        events (list): (frame, timestamp, action) per event.
+        reference (list): (frame, timestamp, action) per reference event.
+        tolerance (float): Largest time difference of a match, in seconds.
+    Returns:
+        dict: events, reference, matched, precision, recall and f1.
+    """
+    unmatched = list(reference)
+    matched = 0
+    for _, timestamp, action in events:
+        candidates = [ref for ref in unmatched if ref[2] == action and abs(ref[1] - timestamp) <= tolerance]
+        if candidates:
+            unmatched.remove(min(candidates, key=lambda ref, time=timestamp: abs(ref[1] - time)))
+            matched += 1
+    precision = matched / len(events) if events else 0.0
+    recall = matched / len(reference) if reference else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"events": len(events), "reference": len(reference), "matched": matched,
+            "precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4)}
+
+
+def _init_worker(recording_path: str) -> None:
+    """
+        Loads the recording once in a worker process.
+    """
+    global _RECORDING  # pylint: disable=W0603
+    _RECORDING = Recording.load(recording_path)
+
+
+def _evaluate_text_threshold(text_threshold: float, box_thresholds: List[float], rules_paths: list) -> list:
+    """
+        Replays every box threshold and rules file at one text threshold, sharing the decoded labels.
+    Returns:
+        list: (box_threshold, text_threshold, rules_path, events) per configuration.
+    """
+    labels = _RECORDING.labels(text_threshold)
+    # One row of kept boxes per box threshold
+    keep = _RECORDING.scores[None, :] > np.asarray(box_thresholds, dtype=np.float32)[:, None]
+    return [(box_threshold, text_threshold, rules_path, replay(_RECORDING, keep[i], labels, rules_path))
+            for i, box_threshold in enumerate(box_thresholds) for rules_path in rules_paths]
+
+
+def sweep(recording_path: str, reference_path: str, box_thresholds: List[float],  # pylint: disable=R0917
+          text_thresholds: List[float], rules_paths: list = (None,), workers: Optional[int] = None,
+          tolerance: float = 1.0) -> List[dict]:
+    """
+        Evaluates every combination of box threshold, text threshold and rules file against a reference log.
+    Args:
+        recording_path (str): Recording saved by record_video.
+        reference_path (str): Reference event log (CSV with frame, timestamp and action).
+        box_thresholds (List[float]): Box thresholds, not below the recording's min_box_threshold.
+        text_thresholds (List[float]): Text thresholds.
+        rules_paths (list): Interaction rules files, None for the bundled lab rules.
+        workers (int, optional): Worker processes, all cores by default. 0 runs in this process.
+        tolerance (float): Largest time difference between an event and its reference, in seconds.
+    Returns:
+        List[dict]: One row per configuration with the TABLE_COLUMNS, best F1 first.
+    """
+    recording = Recording.load(recording_path)
+    if min(box_thresholds) < recording.meta["min_box_threshold"]:
+        raise ValueError(f"Box thresholds must be at least the recording's {recording.meta['min_box_threshold']}.")
+    reference = read_event_log(reference_path)
+    args = (list(box_thresholds), list(rules_paths))
+
+    if workers == 0:
+        _init_worker(recording_path)
+        results = [_evaluate_text_threshold(text_threshold, *args) for text_threshold in text_thresholds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(recording_path,)) as executor:
+            results = list(executor.map(_evaluate_text_threshold, text_thresholds,
+                                        itertools.repeat(args[0]), itertools.repeat(args[1])))
+
+    rows = []
+    for box_threshold, text_threshold, rules_path, events in itertools.chain.from_iterable(results):
+        rows.append({"box_threshold": box_threshold, "text_threshold": text_threshold,
+                     "rules": os.path.basename(rules_path) if rules_path else "default",
+                     **agreement(events, reference, tolerance)})
+    return sorted(rows, key=lambda row: (-row["f1"], row["box_threshold"], row["text_threshold"]))
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Sweep detection thresholds and interaction rules.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Run the model once over a video and save every box.")
+    record.add_argument("video", help="Video to record.")
+    record.add_argument("recording", help="Recording to save (.npz).")
+    record.add_argument("--min-box-threshold", type=float, default=0.05, help="Lowest box threshold to keep.")
+    record.add_argument("--batch-size", type=int, default=8, help="Frames per forward pass.")
+    record.add_argument("--profile", default=DEFAULT_PROFILE, help="Camera calibration profile.")
+    record.add_argument("--calibration-dir", help="Directory holding the camera profiles.")
+    run = commands.add_parser("run", help="Evaluate a grid of settings against a reference log.")
+    run.add_argument("recording", help="Recording saved by the record command.")
+    run.add_argument("--reference", required=True, help="Reference event log CSV.")
+    run.add_argument("--box-thresholds", type=float, nargs="+", default=[0.25, 0.3, 0.35, 0.4, 0.45])
+    run.add_argument("--text-thresholds", type=float, nargs="+", default=[0.2, 0.25, 0.3])
+    run.add_argument("--rules", nargs="+", default=[None], help="Interaction rules files, the lab rules by default.")
+    run.add_argument("--workers", type=int, default=None, help="Worker processes, all cores by default.")
+    run.add_argument("--tolerance", type=float, default=1.0, help="Seconds an event may be off its reference.")
+    run.add_argument("--output", help="CSV file to save the table.")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        recording = record_video(args.video, args.recording, min_box_threshold=args.min_box_threshold,
+                                 batch_size=args.batch_size, camera_profile=args.profile,
+                                 calibration_dir=args.calibration_dir)
+        print(f"Recorded {len(recording.frames)} boxes over {recording.meta['frame_count']} frames.")
+        return
+
+    rows = sweep(args.recording, args.reference, args.box_thresholds, args.text_thresholds, args.rules,
+                 workers=args.workers, tolerance=args.tolerance)
+    print(",".join(TABLE_COLUMNS))
+    for row in rows:
+        print(",".join(str(row[column]) for column in TABLE_COLUMNS))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""
+    video_index.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Keyframe index for uploaded videos. A single demux pass, without decoding, records
+        the exact frame count, every frame timestamp and the keyframe positions, so a video
+        can be seeked to any frame or time range and progress can be reported accurately,
+        including for variable frame rate phone recordings where CAP_PROP_FRAME_COUNT is wrong.
+
+    Change History:
+        0.1: Created.
+        0.2: Seeking checks the decoded timestamps, so it is frame exact for variable frame rate video.
+"""
+import bisect
+import json
+import os
+from typing import List, Optional, Tuple
+import cv2
+import numpy as np
+
+# Timestamps closer than this are the same frame, well under the gap between frames at any frame rate
+TIMESTAMP_TOLERANCE = 0.0005
+
+
+class VideoIndex:
+    """
+        Frame timestamps and keyframe positions of a video, in display order.
+    Args:
+        timestamps (List[float]): Presentation time of every frame in seconds.
+        keyframes (List[int]): Indices of the frames that can be decoded without earlier frames.
+        fps (float): Average frame rate reported by the container.
+    """
+    def __init__(self, timestamps: List[float], keyframes: List[int], fps: float):
+        self.timestamps = list(timestamps)
+        self.keyframes = sorted(keyframes) or [0]
+        self.fps = fps
+
+    @property
+    def frame_count(self) -> int:
+        """
+            Exact number of frames in the video.
+        """
+        return len(self.timestamps)
+
+    @classmethod
+    def build(cls, video_path: str) -> "VideoIndex":
+        """
+            Indexes a video in one pass over its packets. Packets are read raw, so nothing is decoded.
+        Args:
+            video_path (str): Path to the video file.
+        Returns:
+            VideoIndex: The index.
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError("Failed to read the video file.")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.set(cv2.CAP_PROP_FORMAT, -1)
+        times, key_flags = [], []
+        while cap.grab():
+            times.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+            key_flags.append(bool(cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME)))
+        cap.release()
+        if not times:
+            raise ValueError("Failed to read the video file.")
+
+        # Packets arrive in decode order, which differs from display order when B-frames are used
+        order = np.argsort(times, kind="stable")
+        timestamps = np.asarray(times)[order]
+        keyframes = np.flatnonzero(np.asarray(key_flags)[order])
+        return cls(timestamps.tolist(), keyframes.tolist(), fps)
+
+    def save(self, path: str) -> None:
+        """
+            Writes the index to a JSON sidecar.
+        Args:
+            path (str): Path of the sidecar file.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"frame_count": self.frame_count, "fps": self.fps,
+                       "timestamps": [round(t, 6) for t in self.timestamps], "keyframes": self.keyframes}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "VideoIndex":
+        """
+            Reads an index written by save.
+        Args:
+            path (str): Path of the sidecar file.
+        Returns:
+            VideoIndex: The index.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["timestamps"], data["keyframes"], data["fps"])
+
+    @classmethod
+    def load_or_build(cls, video_path: str, index_path: str) -> "VideoIndex":
+        """
+            Loads the sidecar index if it exists, otherwise builds and saves it.
+        Args:
+            video_path (str): Path to the video file.
+            index_path (str): Path of the sidecar file.
+        Returns:
+            VideoIndex: The index.
+        """
+        if os.path.exists(index_path):
+            return cls.load(index_path)
+        index = cls.build(video_path)
+        index.save(index_path)
+        return index
+
+    def frame_at_time(self, seconds: float) -> int:
+        """
+            Returns the first frame shown at or after the given time.
+        Args:
+            seconds (float): Time from the start of the video.
+        Returns:
+            int: Frame index, frame_count if the time is past the last frame.
+        """
+        return bisect.bisect_left(self.timestamps, seconds - 1e-6)
+
+    def nearest_keyframe(self, frame_number: int) -> int:
+        """
+            Returns the last keyframe at or before a frame, where decoding has to start to reach it.
+        Args:
+            frame_number (int): Target frame.
+        Returns:
+            int: Keyframe index.
+        """
+        position = bisect.bisect_right(self.keyframes, frame_number)
+        return self.keyframes[max(position - 1, 0)]
+
+    def frame_range(self, start_time: Optional[float] = None, end_time: Optional[float] = None) -> Tuple[int, int]:
+        """
+            Converts a time window into a range of frames.
+        Args:
+            start_time (float, optional): Window start in seconds, the start of the video when not given.
+            end_time (float, optional): Window end in seconds, the end of the video when not given.
+        Returns:
+            tuple: (first frame, end frame), the end frame is exclusive.
+        """
+        start = 0 if start_time is None else self.frame_at_time(start_time)
+        end = self.frame_count if end_time is None else self.frame_at_time(end_time)
+        return start, max(start, end)
+
+    def seek(self, cap: cv2.VideoCapture, frame_number: int) -> None:
+        """
+            Positions a capture so the next read returns the given frame. The capture seeks near the
+            frame's keyframe, then grabs forward until the decoded timestamp is the frame before it.
+            OpenCV converts a seek time through the average frame rate, so on variable frame rate video
+            it can land past the frame, in which case the seek is retried from ever earlier keyframes,
+            finally from the start.
+        Args:
+            cap (cv2.VideoCapture): Open capture of the indexed video.
+            frame_number (int): Frame to seek to.
+        """
+        if frame_number <= 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            return
+        previous = self.timestamps[min(frame_number, self.frame_count) - 1]
+        position = bisect.bisect_right(self.keyframes, frame_number) - 1
+        step = 1
+        while position > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, self.timestamps[self.keyframes[position]] * 1000.0)
+            if self._grab_until(cap, previous):
+                return
+            position -= step
+            step *= 2
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._grab_until(cap, previous)
+
+    @staticmethod
+    def _grab_until(cap: cv2.VideoCapture, seconds: float) -> bool:
+        """
+            Grabs frames until the one grabbed is shown at the given time.
+        Returns:
+            bool: False if the capture was already past that time, or the video ended first.
+        """
+        while cap.grab():
+            grabbed = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if grabbed > seconds + TIMESTAMP_TOLERANCE:
+                return False
+            if grabbed >= seconds - TIMESTAMP_TOLERANCE:
+                return True
+        return False
@@ -0,0 +1,412 @@
+#!/usr/bin/env python
+"""
+    video_writers.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.4
+
+    Description:
+        Pluggable video writers for the pipeline output. Frames can be piped to a local
+        ffmpeg process, encoded with PyAV, or written with cv2.VideoWriter as a fallback.
+        Any writer can be wrapped so encoding runs on its own thread alongside inference,
+        or split into segments that are joined once the job is complete.
+
+    Change History:
+        0.1: Created.
+        0.2: All writers accept an on_done callback so pooled frames can be reused.
+        0.3: Added segmented output so checkpointed jobs can resume encoding.
+        0.4: Encoder settings are validated, and odd frame sizes are padded to even for yuv420p.
+"""
+import importlib
+import importlib.util
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from fractions import Fraction
+from pathlib import Path
+import cv2
+import numpy as np
+
+VIDEO_BACKENDS = ("auto", "ffmpeg", "pyav", "opencv")
+# Encoders for the ffmpeg and PyAV backends, both take the x264 style crf and preset options
+VIDEO_CODECS = ("libx264", "libx265")
+ENCODER_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow")
+MAX_CRF = 51
+
+
+def validate_encoder_settings(codec: str = "libx264", crf: int = 23, preset: str = "veryfast") -> None:
+    """
+        Checks encoder settings before a job is started with them.
+    Args:
+        codec (str): One of VIDEO_CODECS.
+        crf (int): Constant rate factor, 0 to MAX_CRF.
+        preset (str): One of ENCODER_PRESETS.
+    Raises:
+        ValueError: If a setting is not supported.
+    """
+    if codec not in VIDEO_CODECS:
+        raise ValueError(f"Unknown codec '{codec}', expected one of {', '.join(VIDEO_CODECS)}.")
+    if not 0 <= crf <= MAX_CRF:
+        raise ValueError(f"crf must be between 0 and {MAX_CRF}, got {crf}.")
+    if preset not in ENCODER_PRESETS:
+        raise ValueError(f"Unknown preset '{preset}', expected one of {', '.join(ENCODER_PRESETS)}.")
+
+
+def even_size(frame_size) -> tuple:
+    """
+        Rounds a (width, height) frame size up to even dimensions, which yuv420p needs.
+    """
+    width, height = frame_size
+    return width + width % 2, height + height % 2
+
+
+class OpenCVVideoWriter:
+    """
+        Writes frames with cv2.VideoWriter.
+    Args:
+        output_path (str): Path of the output video.
+        fps (float): Output frame rate.
+        frame_size (tuple): Frame size (width, height).
+        fourcc (str): Four character codec code.
+    """
+    def __init__(self, output_path: str, fps: float, frame_size, fourcc: str = "mp4v"):
+        self.writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, frame_size)
+
+    def write(self, frame: np.ndarray, on_done=None) -> None:
+        """
+            Writes a single BGR frame.
+        Args:
+            frame (np.ndarray): BGR frame matching frame_size.
+            on_done (callable, optional): Called once the frame has been written and may be reused.
+        """
+        self.writer.write(frame)
+        if on_done:
+            on_done()
+
+    def release(self) -> None:
+        """
+            Finalises the output file.
+        """
+        self.writer.release()
+
+
+class FFmpegVideoWriter:
+    """
+        Pipes raw BGR frames to a local ffmpeg process for encoding. Odd frame sizes are padded by one
+        pixel on the right or bottom, as yuv420p needs even dimensions.
+    Args:
+        output_path (str): Path of the output video.
+        fps (float): Output frame rate.
+        frame_size (tuple): Frame size (width, height).
+        codec (str): Video encoder, one of VIDEO_CODECS.
+        crf (int): Constant rate factor, lower is higher quality.
+        preset (str): Encoder speed preset, e.g. ultrafast, veryfast, medium.
+        ffmpeg_path (str): ffmpeg executable.
+    """
+    def __init__(self, output_path: str, fps: float, frame_size, codec: str = "libx264",  # pylint: disable=R0917
+                 crf: int = 23, preset: str = "veryfast", ffmpeg_path: str = "ffmpeg"):
+        width, height = frame_size
+        self.frame_bytes = width * height * 3
+        self.command = [
+            ffmpeg_path, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", f"{fps}", "-i", "-",
+            "-an", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", codec, "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+            output_path,
+        ]
+        self.process = subprocess.Popen(  # pylint: disable=R1732
+            self.command, stdin=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    def write(self, frame: np.ndarray, on_done=None) -> None:
+        """
+            Writes a single BGR frame.
+        Args:
+            frame (np.ndarray): BGR frame matching frame_size.
+            on_done (callable, optional): Called once the frame has been written and may be reused.
+        """
+        if frame.nbytes != self.frame_bytes:
+            raise ValueError(f"Expected a frame of {self.frame_bytes} bytes, got {frame.nbytes}.")
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError as error:
+            raise RuntimeError(f"ffmpeg exited early: {self._stderr()}") from error
+        if on_done:
+            on_done()
+
+    def release(self) -> None:
+        """
+            Closes the pipe and waits for ffmpeg to finish the file.
+        """
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed with code {self.process.returncode}: {self._stderr()}")
+
+    def _stderr(self) -> str:
+        """
+            Reads whatever ffmpeg has reported on stderr.
+        """
+        return self.process.stderr.read().decode(errors="replace").strip()
+
+
+class PyAVVideoWriter:
+    """
+        Encodes frames in-process with PyAV. Odd frame sizes are padded by one pixel on the right or
+        bottom, as yuv420p needs even dimensions.
+    Args:
+        output_path (str): Path of the output video.
+        fps (float): Output frame rate.
+        frame_size (tuple): Frame size (width, height).
+        codec (str): Video encoder, one of VIDEO_CODECS.
+        crf (int): Constant rate factor, lower is higher quality.
+        preset (str): Encoder speed preset.
+    """
+    def __init__(self, output_path: str, fps: float, frame_size, codec: str = "libx264",  # pylint: disable=R0917
+                 crf: int = 23, preset: str = "veryfast"):
+        self.av = importlib.import_module("av")
+        self.container = self.av.open(output_path, mode="w")
+        self.stream = self.container.add_stream(codec, rate=Fraction(fps).limit_denominator(1001))
+        self.stream.width, self.stream.height = even_size(frame_size)
+        self.stream.pix_fmt = "yuv420p"
+        self.stream.options = {"crf": str(crf), "preset": preset}
+
+    def write(self, frame: np.ndarray, on_done=None) -> None:
+        """
+            Writes a single BGR frame.
+        Args:
+            frame (np.ndarray): BGR frame matching frame_size.
+            on_done (callable, optional): Called once the frame has been written and may be reused.
+        """
+        pad_bottom, pad_right = self.stream.height - frame.shape[0], self.stream.width - frame.shape[1]
+        if pad_bottom or pad_right:
+            frame = cv2.copyMakeBorder(frame, 0, pad_bottom, 0, pad_right, cv2.BORDER_REPLICATE)
+        video_frame = self.av.VideoFrame.from_ndarray(frame, format="bgr24")
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+        if on_done:
+            on_done()
+
+    def release(self) -> None:
+        """
+            Flushes the encoder and closes the file.
+        """
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+
+
+class ThreadedVideoWriter:
+    """
+        Runs another writer on a background thread so encoding overlaps with inference.
+        The queue is bounded, so a slow encoder applies backpressure instead of buffering frames without limit.
+    Args:
+        writer: Writer with write(frame) and release() methods.
+        max_queue (int): Maximum number of frames waiting to be encoded.
+    """
+    _STOP = object()
+
+    def __init__(self, writer, max_queue: int = 8):
+        self.writer = writer
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        """
+            Encodes queued frames until release is called.
+        """
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                break
+            frame, on_done = item
+            try:
+                if self.error is None:
+                    self.writer.write(frame)
+            except Exception as error:  # pylint: disable=W0718
+                self.error = error
+            finally:
+                if on_done:
+                    on_done()
+
+    def write(self, frame: np.ndarray, on_done=None) -> None:
+        """
+            Queues a frame for encoding. The frame must not be modified until on_done is called.
+        Args:
+            frame (np.ndarray): BGR frame.
+            on_done (callable, optional): Called from the writer thread once the frame has been written.
+        """
+        if self.error is not None:
+            raise RuntimeError("Video encoding failed.") from self.error
+        self.queue.put((frame, on_done))
+
+    def release(self) -> None:
+        """
+            Waits for queued frames to be written and finalises the output.
+        """
+        self.queue.put(self._STOP)
+        self.thread.join()
+        self.writer.release()
+        if self.error is not None:
+            raise RuntimeError("Video encoding failed.") from self.error
+
+
+class SegmentedVideoWriter:
+    """
+        Writes the output as a sequence of segment files that are joined on release.
+        Ending a segment leaves a complete, playable file on disk, so a checkpointed job
+        can resume by starting a new segment instead of re-encoding what it already wrote.
+    Args:
+        output_path (str): Path of the final joined video.
+        make_writer (callable): Called with a segment path, returns a writer for it.
+        segments (list, optional): Completed segment paths from an earlier run to carry on from.
+    """
+    def __init__(self, output_path: str, make_writer, segments=None):
+        self.output_path = output_path
+        self.make_writer = make_writer
+        self.segments = list(segments or [])
+        self.writer = None
+        self.current_path = None
+
+    def segment_path(self, index: int) -> str:
+        """
+            Returns the path of a segment, next to the output as <name>.partNNNNN<ext>.
+        Args:
+            index (int): Segment index.
+        Returns:
+            str: Segment path.
+        """
+        path = Path(self.output_path)
+        return str(path.with_name(f"{path.stem}.part{index:05d}{path.suffix}"))
+
+    def write(self, frame: np.ndarray, on_done=None) -> None:
+        """
+            Writes a single BGR frame, starting a new segment if none is open.
+        Args:
+            frame (np.ndarray): BGR frame.
+            on_done (callable, optional): Called once the frame has been written and may be reused.
+        """
+        if self.writer is None:
+            self.current_path = self.segment_path(len(self.segments))
+            self.writer = self.make_writer(self.current_path)
+        self.writer.write(frame, on_done=on_done)
+
+    def end_segment(self) -> None:
+        """
+            Finalises the open segment, if any. Every frame written so far is then on disk.
+        """
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.segments.append(self.current_path)
+        self.writer = None
+
+    def release(self) -> None:
+        """
+            Finalises the last segment, joins all segments into the output and removes them.
+        """
+        self.end_segment()
+        if not self.segments:
+            return
+        concat_videos(self.segments, self.output_path)
+        for path in self.segments:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def concat_videos(paths, output_path: str, ffmpeg_path: str = "ffmpeg") -> None:
+    """
+        Joins video files end to end. Uses the ffmpeg concat demuxer to copy the streams without
+        re-encoding when ffmpeg is available, otherwise decodes and rewrites with OpenCV.
+    Args:
+        paths (list): Video paths in order, all with the same size and frame rate.
+        output_path (str): Path of the joined video.
+        ffmpeg_path (str): ffmpeg executable.
+    """
+    if len(paths) == 1:
+        os.replace(paths[0], output_path)
+        return
+    if shutil.which(ffmpeg_path):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as listing:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                listing.write(f"file '{escaped}'\n")
+        try:
+            subprocess.run([ffmpeg_path, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                            "-i", listing.name, "-c", "copy", "-movflags", "+faststart", output_path],
+                           check=True, capture_output=True)
+        finally:
+            os.remove(listing.name)
+        return
+
+    writer = None
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        ret, frame = cap.read()
+        if writer is None and ret:
+            writer = OpenCVVideoWriter(output_path, cap.get(cv2.CAP_PROP_FPS), (frame.shape[1], frame.shape[0]))
+        while ret:
+            writer.write(frame)
+            ret, frame = cap.read(frame)
+        cap.release()
+    if writer is not None:
+        writer.release()
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """
+        Resolves "auto" to the fastest backend available on this machine.
+    Args:
+        backend (str): One of VIDEO_BACKENDS.
+    Returns:
+        str: The concrete backend name.
+    """
+    if backend not in VIDEO_BACKENDS:
+        raise ValueError(f"Unknown video backend '{backend}', expected one of {VIDEO_BACKENDS}.")
+    if backend != "auto":
+        return backend
+    if shutil.which("ffmpeg"):
+        return "ffmpeg"
+    if importlib.util.find_spec("av") is not None:
+        return "pyav"
+    return "opencv"
+
+
+def create_video_writer(output_path: str, fps: float, frame_size, backend: str = "auto",  # pylint: disable=R0917
+                        codec: str = "libx264", crf: int = 23, preset: str = "veryfast",
+                        threaded: bool = True, max_queue: int = 8):
+    """
+        Creates a video writer for the selected backend.
+    Args:
+        output_path (str): Path of the output video.
+        fps (float): Output frame rate.
+        frame_size (tuple): Frame size (width, height).
+        backend (str): One of VIDEO_BACKENDS. "auto" prefers ffmpeg, then PyAV, then OpenCV.
+        codec (str): One of VIDEO_CODECS, for the ffmpeg and PyAV backends. OpenCV always writes mp4v.
+        crf (int): Constant rate factor for the ffmpeg and PyAV backends.
+        preset (str): Encoder speed preset for the ffmpeg and PyAV backends.
+        threaded (bool): Encode on a background thread.
+        max_queue (int): Maximum number of frames waiting to be encoded when threaded.
+    Returns:
+        A writer with write(frame) and release() methods.
+    Raises:
+        ValueError: If the backend or an encoder setting is not supported.
+    """
+    backend = resolve_backend(backend)
+    validate_encoder_settings(codec, crf, preset)
+    if backend == "ffmpeg":
+        writer = FFmpegVideoWriter(output_path, fps, frame_size, codec=codec, crf=crf, preset=preset)
+    elif backend == "pyav":
+        writer = PyAVVideoWriter(output_path, fps, frame_size, codec=codec, crf=crf, preset=preset)
+    else:
+        writer = OpenCVVideoWriter(output_path, fps, frame_size)
+    return ThreadedVideoWriter(writer, max_queue=max_queue) if threaded else writer
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+    weights.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.3
+
+    Description:
+        Converts a GroundingDINO checkpoint once into a plain state dict that torch can memory-map,
+        so workers load weights lazily from the page cache instead of unpickling the whole
+        checkpoint. Processes on the same host share one physical copy of the weights. Each
+        conversion is checked tensor by tensor and recorded with SHA-256 checksums in a manifest
+        next to the converted file. The manifest also records the original checkpoint's size and
+        modification time, so a checkpoint replaced after conversion is noticed and converted again.
+
+        Usage:
+            python -m lab_monitor.weights weights/groundingdino_swint_ogc.pth
+            python -m lab_monitor.weights weights/groundingdino_swint_ogc.mmap.pt --verify
+
+    Change History:
+        0.1: Created.
+        0.2: The manifest records the source's size and modification time, see source_changed.
+        0.3: Conversions write to unique temporary files, so concurrent conversions do not clash.
+"""
+import argparse
+import hashlib
+import json
+import os
+import uuid
+import torch
+
+CONVERTED_SUFFIX = ".mmap.pt"
+
+
+def converted_path(checkpoint_path: str) -> str:
+    """
+        Returns the path a checkpoint is converted to.
+    Args:
+        checkpoint_path (str): e.g. "weights/groundingdino_swint_ogc.pth".
+    Returns:
+        str: e.g. "weights/groundingdino_swint_ogc.mmap.pt".
+    """
+    if checkpoint_path.endswith(CONVERTED_SUFFIX):
+        return checkpoint_path
+    return os.path.splitext(checkpoint_path)[0] + CONVERTED_SUFFIX
+
+
+def manifest_path(path: str) -> str:
+    """
+        Returns the path of a converted checkpoint's manifest.
+    """
+    return f"{path}.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+        Returns the SHA-256 of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _clean_state_dict(checkpoint: dict) -> dict:
+    """
+        Returns the model weights of a checkpoint, without the "module." prefix of wrapped models,
+        as GroundingDINO's load_model does.
+    """
+    state = checkpoint.get("model", checkpoint)
+    return {(key[len("module."):] if key.startswith("module.") else key): value.contiguous()
+            for key, value in state.items() if isinstance(value, torch.Tensor)}
+
+
+def convert_checkpoint(checkpoint_path: str, output_path: str = None) -> str:
+    """
+        Converts a checkpoint to a memory-mappable state dict, checks it and writes its manifest.
+    Args:
+        checkpoint_path (str): Original .pth checkpoint.
+        output_path (str, optional): Converted file, next to the checkpoint when not given.
+    Returns:
+        str: Path of the converted file.
+    Raises:
+        ValueError: If the converted weights differ from the original.
+    """
+    output_path = output_path or converted_path(checkpoint_path)
+    # Taken before reading, so a checkpoint replaced during conversion is seen as changed next time
+    source = os.stat(checkpoint_path)
+    # The original checkpoint holds more than tensors, so it can only be fully unpickled
+    state = _clean_state_dict(torch.load(checkpoint_path, map_location="cpu", weights_only=False))
+    # Unique per conversion, as other workers may be converting the same checkpoint
+    tmp_path = f"{output_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        torch.save(state, tmp_path)
+        converted = torch.load(tmp_path, map_location="cpu", mmap=True, weights_only=True)
+        if converted.keys() != state.keys() or \
+                not all(torch.equal(converted[key], value) for key, value in state.items()):
+            raise ValueError(f"Converted weights of '{checkpoint_path}' do not match the original.")
+        del converted
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    manifest = {
+        "source": os.path.basename(checkpoint_path),
+        "source_sha256": file_sha256(checkpoint_path),
+        "source_size": source.st_size,
+        "source_mtime_ns": source.st_mtime_ns,
+        "sha256": file_sha256(output_path),
+        "size": os.path.getsize(output_path),
+        "tensors": len(state),
+    }
+    tmp_path = f"{manifest_path(output_path)}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path(output_path))
+    return output_path
+
+
+def verify_checkpoint(path: str, full: bool = False) -> dict:
+    """
+        Checks a converted file against its manifest.
+    Args:
+        path (str): Converted file.
+        full (bool): Also check the SHA-256, which reads the whole file. Only the size is checked otherwise,
+            so loading stays lazy.
+    Returns:
+        dict: The manifest.
+    Raises:
+        ValueError: If the manifest is missing or the file does not match it.
+    """
+    if not os.path.exists(manifest_path(path)):
+        raise ValueError(f"'{path}' has no manifest, convert the checkpoint with lab_monitor.weights.")
+    with open(manifest_path(path), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if os.path.getsize(path) != manifest["size"]:
+        raise ValueError(f"'{path}' is {os.path.getsize(path)} bytes, its manifest says {manifest['size']}.")
+    if full and file_sha256(path) != manifest["sha256"]:
+        raise ValueError(f"'{path}' does not match the checksum in its manifest.")
+    return manifest
+
+
+def source_changed(path: str, checkpoint_path: str) -> bool:
+    """
+        Checks whether the checkpoint a file was converted from has changed since. The checkpoint is only
+        hashed when its size or modification time differ from the manifest's.
+    Args:
+        path (str): Converted file.
+        checkpoint_path (str): Original checkpoint. Nothing is checked if it is the converted file or missing.
+    Returns:
+        bool: True if the checkpoint differs from the one converted, or the manifest is missing.
+    """
+    if os.path.abspath(checkpoint_path) == os.path.abspath(path) or not os.path.exists(checkpoint_path):
+        return False
+    if not os.path.exists(manifest_path(path)):
+        return True
+    with open(manifest_path(path), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    source = os.stat(checkpoint_path)
+    if (manifest.get("source_size"), manifest.get("source_mtime_ns")) == (source.st_size, source.st_mtime_ns):
+        return False
+    return file_sha256(checkpoint_path) != manifest["source_sha256"]
+
+
+def load_state_dict(path: str) -> dict:
+    """
+        Memory-maps a converted file. Tensors are read from the page cache as they are first used.
+    Args:
+        path (str): Converted file.
+    Returns:
+        dict: Parameter name to CPU tensor backed by the file.
+    """
+    verify_checkpoint(path)
+    return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+
+
+def main(argv=None) -> None:
+    """
+        Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Convert a GroundingDINO checkpoint for memory-mapped loading.")
+    parser.add_argument("checkpoint", help="Original .pth checkpoint, or a converted file with --verify.")
+    parser.add_argument("--output", help="Converted file, next to the checkpoint by default.")
+    parser.add_argument("--verify", action="store_true", help="Check a converted file's checksum instead.")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        manifest = verify_checkpoint(converted_path(args.checkpoint), full=True)
+        print(f"OK: {manifest['tensors']} tensors, sha256 {manifest['sha256']}")
+        return
+    output_path = convert_checkpoint(args.checkpoint, args.output)
+    print(f"Converted to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
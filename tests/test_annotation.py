@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+    test_annotation.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the native box annotator.
+
+    Change History:
+        0.1: Created.
+"""
+import cv2
+import numpy as np
+import torch
+from groundingdino.util.inference import annotate
+from lab_monitor.annotation import BoxAnnotator
+
+BOXES = torch.tensor([[0.4, 0.3, 0.2, 0.3], [0.7, 0.6, 0.1, 0.2], [0.05, 0.02, 0.1, 0.04]])
+LOGITS = torch.tensor([0.41, 0.35, 0.5])
+PHRASES = ["bottle", "petri dish", "hand"]
+
+
+def test_matches_groundingdino_annotate():
+    """
+        Tests that the output matches groundingdino's annotate followed by the RGB to BGR conversion
+        the pipeline used to do, including a label clipped by the top of the frame.
+    """
+    frame = cv2.imread("samples/corrected/filling.png")
+    expected = cv2.cvtColor(annotate(image_source=frame.copy(), boxes=BOXES, logits=LOGITS, phrases=PHRASES),
+                            cv2.COLOR_RGB2BGR)
+
+    result = BoxAnnotator().annotate(frame, BOXES, LOGITS, PHRASES)
+
+    assert result is frame
+    assert np.array_equal(result, expected)
+
+
+def test_class_colours_are_stable():
+    """
+        Tests that a class keeps its colour regardless of detection order.
+    """
+    annotator = BoxAnnotator()
+    first = annotator.color_for("hand")
+    annotator.color_for("bottle")
+
+    assert annotator.color_for("hand") == first
+    assert annotator.color_for("bottle") != first
+
+
+def test_labels_are_cached():
+    """
+        Tests that repeated labels reuse the rendered image and the cache stays bounded.
+    """
+    annotator = BoxAnnotator(max_cached_labels=2)
+    patch = annotator.render_label("hand 0.50", (0, 0, 255))
+
+    assert annotator.render_label("hand 0.50", (0, 0, 255)) is patch
+    annotator.render_label("bottle 0.50", (0, 0, 255))
+    annotator.render_label("petri dish 0.50", (0, 0, 255))
+    assert annotator.render_label("hand 0.50", (0, 0, 255)) is not patch
+
+
+def test_box_outside_frame_is_clipped():
+    """
+        Tests that boxes at the frame edges are drawn without errors.
+    """
+    frame = np.zeros((50, 60, 3), dtype=np.uint8)
+    BoxAnnotator().annotate(frame, torch.tensor([[0.98, 0.98, 0.2, 0.2]]), torch.tensor([0.9]), ["hand"])
+
+    assert frame.any()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+    test_async_inference.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the bounded executor used for async inference.
+
+    Change History:
+        0.1: Created.
+"""
+import asyncio
+import threading
+import pytest
+from lab_monitor.async_inference import BoundedExecutor, ExecutorBusy
+
+
+def test_runs_off_the_event_loop():
+    """
+        Tests that calls run on the pool's thread while the event loop keeps running.
+    """
+    executor = BoundedExecutor(name="test")
+    release = threading.Event()
+
+    def blocking():
+        release.wait(5)
+        return threading.current_thread().name
+
+    async def main():
+        task = asyncio.ensure_future(executor.run(blocking))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        release.set()
+        return await task
+
+    assert asyncio.run(main()).startswith("test")
+    executor.shutdown()
+
+
+def test_refuses_when_full():
+    """
+        Tests that calls beyond max_pending are refused and slots are freed as calls finish.
+    """
+    executor = BoundedExecutor(max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def main():
+        tasks = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorBusy):
+            await executor.run(release.wait, 5)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert executor.pending == 0
+        return await executor.run(lambda value: value * 2, 21)
+
+    assert asyncio.run(main()) == 42
+    executor.shutdown()
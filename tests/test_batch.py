@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+    test_batch.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the batch image processing API.
+
+    Change History:
+        0.1: Created.
+"""
+import json
+import cv2
+import numpy as np
+import pytest
+import torch
+from lab_monitor import batch
+from lab_monitor.cv_functions import BarrelUndistortTransform
+
+
+class _StubNetwork:
+    """
+        Returns one detection per image and records the batch sizes it was given.
+    """
+    batches = []
+
+    def __init__(self, text_prompt=None):
+        self.text_prompt = text_prompt
+
+    def load_model(self, **_):
+        """
+            Nothing to load.
+        """
+
+    def process_batch(self, cv_images, box_threshold=0.35, text_threshold=0.25):
+        """
+            Returns a fixed detection for every image.
+        """
+        _StubNetwork.batches.append(len(cv_images))
+        return [(torch.tensor([[0.5, 0.5, 0.2, 0.2]]), torch.tensor([0.9]), ["glass bottle"]) for _ in cv_images]
+
+    def map_label(self, phrase):
+        """
+            Maps the detected phrase like DinoProcess.
+        """
+        return {"glass bottle": "bottle"}.get(phrase, phrase)
+
+
+@pytest.fixture(name="images")
+def fixture_images(tmp_path):
+    """
+        Writes three images at two resolutions, in a nested folder, plus a file that is not an image.
+    """
+    rng = np.random.default_rng(0)
+    folder = tmp_path / "stills"
+    (folder / "nested").mkdir(parents=True)
+    shapes = {"a.png": (40, 60, 3), "b.png": (40, 60, 3), "nested/c.bmp": (30, 50, 3)}
+    for name, shape in shapes.items():
+        cv2.imwrite(str(folder / name), rng.integers(0, 255, shape, dtype=np.uint8))
+    (folder / "notes.txt").write_text("not an image", encoding="utf-8")
+    return folder
+
+
+@pytest.fixture(autouse=True)
+def reset_worker_state(monkeypatch):
+    """
+        Gives each test a fresh in-process worker state.
+    """
+    monkeypatch.setattr(batch, "_TRANSFORMS", {})
+    monkeypatch.setattr(batch, "_NETWORK", None)
+
+
+def test_find_images(images):
+    """
+        Tests that a directory lists its own images and a glob can search recursively.
+    """
+    assert [p.rsplit("/", 1)[-1] for p in batch.find_images(str(images))] == ["a.png", "b.png"]
+    assert len(batch.find_images(str(images / "**" / "*.*"))) == 3
+
+
+def test_corrects_images_and_shares_maps(images, tmp_path):
+    """
+        Tests that corrected images match a per-image transform, and maps are built once per resolution.
+    """
+    output_dir = tmp_path / "corrected"
+    count = batch.process_images(str(images / "**" / "*.*"), output_dir=str(output_dir), k1=-0.2, k2=0.01,
+                                 workers=0)
+
+    assert count == 3
+    assert len(batch._TRANSFORMS) == 2  # pylint: disable=W0212
+    original = cv2.imread(str(images / "nested" / "c.bmp"))
+    expected = BarrelUndistortTransform(original.shape, k1=-0.2, k2=0.01).apply(original)
+    np.testing.assert_array_equal(cv2.imread(str(output_dir / "nested" / "c.bmp")), expected)
+
+
+def test_process_pool_writes_detections(images, tmp_path):
+    """
+        Tests that a process pool writes one record per image.
+    """
+    detections_path = tmp_path / "detections.ndjson"
+    progress = []
+    count = batch.process_images(str(images), detections_path=str(detections_path), workers=2,
+                                 progress_callback=progress.append)
+
+    records = [json.loads(line) for line in detections_path.read_text(encoding="utf-8").splitlines()]
+    assert count == 2
+    assert sorted(record["image"] for record in records) == ["a.png", "b.png"]
+    assert progress[-1] == 100
+
+
+def test_detects_in_batches_by_resolution(images, tmp_path, monkeypatch):
+    """
+        Tests that detection runs once per chunk of same-resolution images and labels are mapped.
+    """
+    monkeypatch.setattr("lab_monitor.dino_functions.DinoProcess", _StubNetwork)
+    _StubNetwork.batches = []
+    detections_path = tmp_path / "detections.ndjson"
+    batch.process_images(str(images / "**" / "*.*"), detections_path=str(detections_path), workers=0,
+                         detect=True, batch_size=8)
+
+    records = [json.loads(line) for line in detections_path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(_StubNetwork.batches) == [1, 2]
+    assert all(record["labels"] == ["bottle"] for record in records)
+    assert records[0]["boxes"] == [[0.5, 0.5, 0.2, 0.2]]
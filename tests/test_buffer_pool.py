@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+    test_buffer_pool.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the frame buffer pool and the pipeline's steady-state allocations.
+
+    Change History:
+        0.1: Created.
+"""
+import tracemalloc
+from unittest.mock import patch
+import cv2
+import numpy as np
+import pytest
+import torch
+from lab_monitor.buffer_pool import FramePool
+from lab_monitor.pipeline import process_video
+from lab_monitor.video_writers import ThreadedVideoWriter
+
+SHAPE = (480, 640, 3)
+FRAMES = 150
+WARMUP = 30
+
+
+class _StubCapture:
+    """
+        Decodes synthetic frames into the caller's buffer, like cv2.VideoCapture.read(image).
+    """
+    def __init__(self, *_):
+        self.source = np.random.default_rng(0).integers(0, 255, SHAPE, dtype=np.uint8)
+        self.remaining = FRAMES
+
+    def read(self, image=None):
+        """
+            Returns the next frame, written into image when given.
+        """
+        if self.remaining == 0:
+            return False, None
+        self.remaining -= 1
+        if image is None:
+            return True, self.source.copy()
+        np.copyto(image, self.source)
+        return True, image
+
+    def get(self, prop):
+        """
+            Returns the frame count or frame rate.
+        """
+        return {cv2.CAP_PROP_FRAME_COUNT: FRAMES, cv2.CAP_PROP_FPS: 30.0}[prop]
+
+    def release(self):
+        """
+            Nothing to release.
+        """
+
+
+class _StubNetwork:
+    """
+        Returns the same detection for every frame without running a model.
+    """
+    boxes = torch.tensor([[0.5, 0.5, 0.2, 0.2]])
+    logits = torch.tensor([0.5])
+
+    def load_model(self):
+        """
+            Nothing to load.
+        """
+
+    def process_image(self, _image):
+        """
+            Returns a fixed hand detection.
+        """
+        return self.boxes, self.logits, ["hand"]
+
+    def map_label(self, phrase):
+        """
+            Returns the phrase unchanged.
+        """
+        return phrase
+
+    def annotate_image(self, image, boxes, logits, phrases):
+        """
+            Draws a box in place.
+        """
+        cv2.rectangle(image, (10, 10), (50, 50), (0, 255, 0), 2)
+        return image
+
+
+class _NullWriter:
+    """
+        Discards frames.
+    """
+    def write(self, frame, on_done=None):
+        """
+            Discards the frame.
+        """
+        if on_done:
+            on_done()
+
+    def release(self):
+        """
+            Nothing to release.
+        """
+
+
+def test_acquire_and_release():
+    """
+        Tests that buffers are reused and foreign buffers are rejected.
+    """
+    pool = FramePool((4, 4, 3), size=2)
+    first = pool.acquire()
+    pool.acquire()
+
+    assert pool.available == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=0.01)
+    pool.release(first)
+    assert pool.acquire() is first
+    with pytest.raises(ValueError):
+        pool.release(np.empty((2, 2, 3), dtype=np.uint8))
+
+
+@patch("lab_monitor.pipeline.create_video_writer", lambda *args, **kwargs: ThreadedVideoWriter(_NullWriter()))
+@patch("lab_monitor.pipeline.load_network", _StubNetwork)
+@patch("lab_monitor.pipeline.cv2.VideoCapture", _StubCapture)
+def test_steady_state_allocation_per_frame(tmp_path):
+    """
+        Tests that after warm-up the frame loop allocates no full frames: the peak traced memory over
+        the remaining frames stays well below the size of a single frame.
+    """
+    frame_bytes = int(np.prod(SHAPE))
+    marks = {}
+
+    def on_progress(_percent):
+        marks["frames"] = marks.get("frames", 0) + 1
+        if marks["frames"] == WARMUP:
+            tracemalloc.reset_peak()
+            marks["start"] = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.start()
+    try:
+        process_video("input.mp4", str(tmp_path / "out.mp4"), str(tmp_path / "log.csv"),
+                      progress_callback=on_progress)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    per_frame = (peak - marks["start"]) / (FRAMES - WARMUP)
+    assert peak - marks["start"] < frame_bytes / 4
+    assert per_frame < 1024
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+    test_calibration.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the camera calibration profiles.
+
+    Change History:
+        0.1: Created.
+        0.2: Added test for transforms cached before a profile is saved again.
+"""
+import numpy as np
+import pytest
+from lab_monitor.calibration import CameraProfile, list_profiles, load_transform
+from lab_monitor.cv_functions import BarrelUndistortTransform
+
+
+def test_builtin_profile_matches_direct_transform(tmp_path):
+    """
+        Tests that the built-in profile is saved on first use and its memory-mapped maps match building them directly.
+    """
+    shape = (120, 160, 3)
+    image = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+
+    transform = CameraProfile.load("lab_camera", str(tmp_path)).transform(shape, str(tmp_path))
+    expected = BarrelUndistortTransform(shape, k1=-0.182, k2=0.0032)
+
+    assert isinstance(transform.map1, np.memmap) and not transform.map1.flags.writeable
+    assert (tmp_path / "lab_camera" / "map1_160x120.npy").exists()
+    assert np.array_equal(transform.apply(image), expected.apply(image))
+
+
+def test_saved_profile_scales_intrinsics(tmp_path):
+    """
+        Tests that a saved profile's camera matrix is scaled to the frame size and the profile is listed.
+    """
+    matrix = [[400, 0, 160], [0, 400, 120], [0, 0, 1]]
+    profile = CameraProfile("bench_camera", [-0.1, 0.01, 0, 0, 0], camera_matrix=matrix, image_size=(320, 240))
+    profile.save(str(tmp_path))
+
+    transform = load_transform("bench_camera", (120, 160), str(tmp_path))
+
+    assert transform.camera_matrix.tolist() == [[200, 0, 80], [0, 200, 60], [0, 0, 1]]
+    assert transform.k1 == pytest.approx(-0.1)
+    assert load_transform("bench_camera", (120, 160), str(tmp_path)) is transform
+    assert list_profiles(str(tmp_path)) == ["bench_camera", "lab_camera"]
+
+
+def test_saving_profile_replaces_cached_transform(tmp_path):
+    """
+        Tests that a transform cached before its profile is saved again is rebuilt from the new coefficients.
+    """
+    CameraProfile("bench_camera", [-0.1, 0, 0, 0, 0]).save(str(tmp_path))
+    before = load_transform("bench_camera", (120, 160), str(tmp_path))
+
+    CameraProfile("bench_camera", [-0.2, 0, 0, 0, 0]).save(str(tmp_path))
+    after = load_transform("bench_camera", (120, 160), str(tmp_path))
+
+    expected = BarrelUndistortTransform((120, 160), k1=-0.2, k2=0.0)
+    assert after is not before and after.k1 == pytest.approx(-0.2)
+    assert np.array_equal(after.map1, expected.map1)
+    assert (tmp_path / "bench_camera" / "map1_160x120.npy").exists()
+
+
+def test_unknown_profile(tmp_path):
+    """
+        Tests that unknown and unsafe profile names are rejected.
+    """
+    with pytest.raises(ValueError, match="Unknown"):
+        CameraProfile.load("phone", str(tmp_path))
+    with pytest.raises(ValueError, match="Invalid"):
+        CameraProfile.load("../secrets", str(tmp_path))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+    test_checkpoint.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for job checkpoints and for resuming an interrupted pipeline run.
+
+    Change History:
+        0.1: Created.
+"""
+from unittest.mock import patch
+import cv2
+import numpy as np
+import pytest
+import torch
+from lab_monitor.annotation import BoxAnnotator
+from lab_monitor.checkpoint import JobCheckpoint, open_log
+from lab_monitor.pipeline import process_video
+from lab_monitor.video_writers import OpenCVVideoWriter
+
+FRAMES = 25
+SHAPE = (96, 128, 3)
+
+
+class _StubNetwork:
+    """
+        Returns detections that change over the video, so events open and close around the checkpoints.
+    """
+    def __init__(self):
+        self.annotator = BoxAnnotator()
+        self.calls = 0
+
+    def load_model(self):
+        """
+            Nothing to load.
+        """
+
+    def process_image(self, image):
+        """
+            Moves a hand across a bottle, using the frame brightness as the frame number.
+        """
+        step = round(float(image[image.shape[0] // 2, image.shape[1] // 2, 0]) / 8)
+        self.calls += 1
+        x = 0.03 * step
+        boxes = torch.tensor([[x, 0.3, x + 0.1, 0.4], [0.3, 0.3, 0.6, 0.6]])
+        return boxes, torch.tensor([0.8, 0.6]), ["hand", "bottle"]
+
+    def map_label(self, phrase):
+        """
+            Returns the phrase unchanged.
+        """
+        return phrase
+
+    def annotate_image(self, image, boxes, logits, phrases):
+        """
+            Draws the detections in place.
+        """
+        return self.annotator.annotate(image, boxes, logits, phrases)
+
+
+class _Interrupted(Exception):
+    """
+        Raised from the progress callback to simulate the server stopping.
+    """
+
+
+@pytest.fixture(name="video_path")
+def fixture_video_path(tmp_path):
+    """
+        Writes a short test video whose frame brightness encodes the frame number.
+    """
+    path = tmp_path / "input.mp4"
+    writer = OpenCVVideoWriter(str(path), 10.0, (SHAPE[1], SHAPE[0]))
+    for index in range(FRAMES):
+        writer.write(np.full(SHAPE, index * 8, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def _run(video_path, directory, checkpoint_path=None, stop_at=None):
+    """
+        Runs the pipeline into the given directory, optionally stopping after stop_at frames.
+    """
+    def on_progress(_percent):
+        on_progress.frames += 1
+        if on_progress.frames == stop_at:
+            raise _Interrupted()
+    on_progress.frames = 0
+
+    process_video(video_path, str(directory / "out.mp4"), str(directory / "log.csv"),
+                  progress_callback=on_progress, fill_log_path=str(directory / "fill.csv"),
+                  encoder_settings={"backend": "opencv", "threaded": False},
+                  detections_path=str(directory / "det.ndjson"),
+                  checkpoint_path=checkpoint_path, checkpoint_interval=8)
+
+
+def _frames(path):
+    """
+        Decodes every frame of a video.
+    """
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    ret, frame = cap.read()
+    while ret:
+        frames.append(frame)
+        ret, frame = cap.read()
+    cap.release()
+    return frames
+
+
+def test_open_log_truncates_to_offset(tmp_path):
+    """
+        Tests that resuming a log drops anything written after the checkpoint.
+    """
+    path = tmp_path / "log.csv"
+    with open_log(str(path)) as log_file:
+        log_file.write("header\nkept\n")
+        offset = log_file.tell()
+        log_file.write("lost\n")
+
+    with open_log(str(path), resume_offset=offset) as log_file:
+        log_file.write("new\n")
+
+    assert path.read_text(encoding="utf-8") == "header\nkept\nnew\n"
+
+
+def test_job_checkpoint_round_trip(tmp_path):
+    """
+        Tests saving, loading and deleting a checkpoint.
+    """
+    checkpoint = JobCheckpoint(str(tmp_path / "job.json"))
+    assert checkpoint.load() is None
+
+    checkpoint.save({"frame_number": 300})
+    checkpoint.save({"frame_number": 600})
+    assert checkpoint.load() == {"frame_number": 600}
+
+    checkpoint.delete()
+    assert checkpoint.load() is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path, video_path):
+    """
+        Tests that a job interrupted mid-segment and resumed from its checkpoint produces the same logs,
+        detections and video as a job that ran straight through, without reprocessing checkpointed frames.
+    """
+    reference = tmp_path / "reference"
+    resumed = tmp_path / "resumed"
+    reference.mkdir()
+    resumed.mkdir()
+    checkpoint_path = str(resumed / "checkpoint.json")
+
+    with patch("lab_monitor.pipeline.load_network", _StubNetwork):
+        _run(video_path, reference, checkpoint_path=str(reference / "checkpoint.json"))
+
+    first = _StubNetwork()
+    second = _StubNetwork()
+    with patch("lab_monitor.pipeline.load_network", lambda: first):
+        with pytest.raises(_Interrupted):
+            _run(video_path, resumed, checkpoint_path=checkpoint_path, stop_at=19)
+    assert JobCheckpoint(checkpoint_path).load()["frame_number"] == 16
+    with patch("lab_monitor.pipeline.load_network", lambda: second):
+        _run(video_path, resumed, checkpoint_path=checkpoint_path)
+
+    assert second.calls == FRAMES - 16
+    for name in ("log.csv", "fill.csv", "det.ndjson"):
+        assert (resumed / name).read_bytes() == (reference / name).read_bytes()
+    log = (reference / "log.csv").read_text(encoding="utf-8")
+    assert "hand touches bottle" in log and "hand releases bottle" in log
+
+    reference_frames = _frames(reference / "out.mp4")
+    assert len(reference_frames) == FRAMES
+    for expected, actual in zip(reference_frames, _frames(resumed / "out.mp4")):
+        np.testing.assert_array_equal(actual, expected)
+    assert sorted(path.name for path in resumed.iterdir()) == sorted(path.name for path in reference.iterdir())
+    assert not (resumed / "checkpoint.json").exists()
@@ -18,7 +18,7 @@
 """
 import numpy as np
 import cv2
-from lab_monitor.cv_functions import BarrelUndistortTransform
+from lab_monitor.cv_functions import BarrelUndistortTransform, boxes_to_pixels
 
 
 def test_barrel_undistort_transform_apply():
@@ -44,3 +44,29 @@ def test_barrel_undistort_transform_apply():
 
     # Optional: verify that some distortion occurred (non-equality)
     assert not np.array_equal(img, result)
+
+
+def test_boxes_to_pixels():
+    """
+        Tests conversion of normalised centre boxes to clipped pixel corner boxes.
+    """
+    boxes = np.array([[0.5, 0.5, 0.25, 0.5], [0.0, 0.0, 0.5, 0.5]])
+
+    result = boxes_to_pixels(boxes, (100, 200, 3))
+
+    assert result.tolist() == [[75, 25, 125, 75], [0, 0, 50, 25]]
+    assert boxes_to_pixels([], (100, 200)).shape == (0, 4)
+
+
+def test_barrel_undistort_transform_apply_into_dst():
+    """
+        Tests that the precomputed maps match cv2.undistort and that dst is written in place.
+    """
+    img = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    transform = BarrelUndistortTransform(image_shape=img.shape, k1=-0.2, k2=0.01)
+    dst = np.empty_like(img)
+
+    result = transform.apply(img, dst=dst)
+
+    assert result is dst
+    assert np.array_equal(result, cv2.undistort(img, transform.camera_matrix, transform.dist_coeffs))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+    test_detection_cache.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the perceptual hash detection cache.
+
+    Change History:
+        0.1: Created.
+        0.2: Lookups use frame fingerprints, added moving object test.
+"""
+import cv2
+import numpy as np
+from lab_monitor.detection_cache import DetectionCache, fingerprint, perceptual_hash
+
+
+def _scene(seed: int) -> np.ndarray:
+    """
+        A smooth random BGR frame, the same for the same seed.
+    """
+    rng = np.random.default_rng(seed)
+    cells = rng.integers(0, 255, (9, 16, 3), dtype=np.uint8)
+    return np.repeat(np.repeat(cells, 40, axis=0), 40, axis=1)
+
+
+def test_hash_tolerates_noise_and_separates_scenes():
+    """
+        Tests that sensor noise moves the hash a few bits at most, while another scene moves it far.
+    """
+    scene = _scene(1)
+    noisy = np.clip(scene.astype(np.int16) + np.random.default_rng(2).integers(-2, 3, scene.shape), 0, 255)
+    base = perceptual_hash(scene)
+
+    assert base.bit_length() <= 256
+    assert (base ^ perceptual_hash(noisy.astype(np.uint8))).bit_count() <= 8
+    assert (base ^ perceptual_hash(_scene(3))).bit_count() > 40
+
+
+# A plain, softly lit 720p bench
+BENCH = (np.linspace(80, 140, 1280)[None, :, None] + np.linspace(0, 30, 720)[:, None, None]
+         + np.zeros(3)).astype(np.uint8)
+
+
+def _bench(x: int) -> np.ndarray:
+    """
+        The bench with a 119 px object whose left edge is at x, with sensor noise.
+    """
+    frame = BENCH.copy()
+    cv2.rectangle(frame, (x, 150), (x + 118, 268), (30, 90, 220), -1)
+    noise = np.random.default_rng(x).integers(-2, 3, frame.shape, dtype=np.int16)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def test_near_matches_hit_and_keys_are_separate():
+    """
+        Tests that a noisy repeat of a frame returns the cached detections only for the same key.
+    """
+    cache = DetectionCache(max_entries=4)
+    cache.put("prompt", fingerprint(_bench(100)), "detections")
+    repeat = _bench(100)
+    repeat[::2] = np.clip(repeat[::2].astype(np.int16) + 1, 0, 255)
+
+    assert cache.get("prompt", fingerprint(repeat)) == "detections"
+    assert cache.get("prompt", fingerprint(_scene(3))) is None
+    assert cache.get("other prompt", fingerprint(repeat)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, round(1 / 3, 4))
+
+
+def test_moving_object_does_not_hit():
+    """
+        Tests that an object moving across a plain bench never gets boxes cached from where it was,
+        although the hash hardly changes as it moves.
+    """
+    cache = DetectionCache(max_entries=4096)
+    close_hashes = 0
+    for x in range(0, 600, 4):
+        frame = fingerprint(_bench(x))
+        close_hashes += any((frame[0] ^ cached).bit_count() <= cache.max_distance
+                            for cached in cache.hashes.get("prompt", ()))
+        assert cache.get("prompt", frame) is None, f"object at {x} px reused cached boxes"
+        cache.put("prompt", frame, x)
+
+    assert close_hashes > 100
+    assert cache.stats()["hits"] == 0
+
+
+def test_least_recently_used_evicted_and_memory_reported():
+    """
+        Tests that the cache is bounded, dropping the least recently used frame, and tracks its memory.
+    """
+    cache = DetectionCache(max_entries=2, max_distance=0)
+    result = (np.zeros((3, 4), dtype=np.float32), np.zeros(3, dtype=np.float32), ["hand"] * 3)
+    frames = [fingerprint(_scene(seed)) for seed in range(3)]
+    cache.put("key", frames[0], result)
+    cache.put("key", frames[1], result)
+    cache.get("key", frames[0])
+    cache.put("key", frames[2], result)
+
+    assert cache.get("key", frames[1]) is None
+    assert cache.get("key", frames[0]) is result and cache.get("key", frames[2]) is result
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] >= 2 * (48 + 12 + frames[0][1].nbytes)
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+    test_detections.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the detections sidecar.
+
+    Change History:
+        0.1: Created.
+        0.2: Added delta encoding tests.
+"""
+import json
+import numpy as np
+import torch
+from lab_monitor.detections import DetectionsWriter, read_detections
+
+
+def test_writer_records_each_frame(tmp_path):
+    """
+        Tests that each frame is written as one JSON line with rounded values.
+    """
+    path = tmp_path / "detections.ndjson"
+    writer = DetectionsWriter(str(path))
+    writer.update(0, torch.tensor([[0.5, 0.5, 0.123456, 0.2]]), torch.tensor([0.91234]), ["hand"])
+    writer.update(1, np.zeros((0, 4)), [], [])
+    writer.close()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+
+    assert records[0] == {"frame": 0, "boxes": [[0.5, 0.5, 0.1235, 0.2]], "scores": [0.9123], "labels": ["hand"]}
+    assert records[1] == {"frame": 1, "boxes": [], "scores": [], "labels": []}
+
+
+def test_unchanged_frames_are_delta_encoded(tmp_path):
+    """
+        Tests that repeated detections are written as just the frame number and expanded again when read.
+    """
+    path = tmp_path / "detections.ndjson"
+    writer = DetectionsWriter(str(path))
+    writer.update(0, [[0.5, 0.5, 0.1, 0.2]], [0.9], ["hand"])
+    writer.update(1, [[0.5, 0.5, 0.1, 0.2]], [0.9], ["hand"])
+    state = writer.get_state()
+    writer.close()
+
+    resumed = DetectionsWriter(str(path), resume_state=state)
+    resumed.update(2, [[0.5, 0.5, 0.1, 0.2]], [0.9], ["hand"])
+    resumed.update(3, [], [], [])
+    resumed.close()
+
+    assert [json.loads(line) for line in path.read_text().splitlines()][1:3] == [{"frame": 1}, {"frame": 2}]
+    hand = {"boxes": [[0.5, 0.5, 0.1, 0.2]], "scores": [0.9], "labels": ["hand"]}
+    assert list(read_detections(str(path), end_frame=3)) == [(0, hand), (1, hand), (2, hand)]
+    assert list(read_detections(str(path)))[3] == (3, {"boxes": [], "scores": [], "labels": []})
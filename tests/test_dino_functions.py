@@ -8,18 +8,26 @@
 
     Created: 24/06/2025
 
-    Version: 0.1
+    Version: 0.8
 
     Description:
         Tests for dino functions library
 
     Change History:
         0.1: Created.
+        0.2: annotate_image draws in place.
+        0.3: Added batched detection test.
+        0.4: Added converted checkpoint loading test.
+        0.5: Added raw token scores test.
+        0.6: Added detection cache tests.
+        0.7: Added replaced checkpoint test.
+        0.8: Added input size test.
 """
 from unittest.mock import patch, MagicMock
 import pytest
 import numpy as np
 import torch
+from lab_monitor.detection_cache import DetectionCache
 from lab_monitor.dino_functions import DinoProcess
 
 
@@ -62,6 +70,44 @@ def test_load_model_sets_model(mock_load_model):
     mock_load_model.assert_called_once()
 
 
+@patch("lab_monitor.dino_functions.load_model")
+@patch("lab_monitor.dino_functions.load_state_dict")
+@patch("lab_monitor.dino_functions.build_model")
+@patch("lab_monitor.dino_functions.SLConfig.fromfile")
+def test_load_model_prefers_converted_checkpoint(_mock_config, mock_build, mock_state, mock_load_model, tmp_path):
+    """
+        Tests that a converted checkpoint next to the original is memory-mapped instead of unpickled.
+    """
+    (tmp_path / "dino.mmap.pt").write_bytes(b"")
+    dp = DinoProcess(device="cpu")
+    dp.load_model(model_config_path="config.py", model_checkpoint_path=str(tmp_path / "dino.pth"))
+
+    mock_load_model.assert_not_called()
+    mock_state.assert_called_once_with(str(tmp_path / "dino.mmap.pt"))
+    mock_build.return_value.load_state_dict.assert_called_once_with(mock_state.return_value, strict=False,
+                                                                    assign=True)
+    assert dp.model == mock_build.return_value.eval.return_value
+
+
+@patch("lab_monitor.dino_functions.convert_checkpoint")
+@patch("lab_monitor.dino_functions.source_changed", return_value=True)
+@patch("lab_monitor.dino_functions.load_state_dict")
+@patch("lab_monitor.dino_functions.build_model")
+@patch("lab_monitor.dino_functions.SLConfig.fromfile")
+def test_load_model_reconverts_replaced_checkpoint(_mock_config, _mock_build, mock_state, mock_changed, mock_convert,
+                                                   tmp_path):
+    """
+        Tests that a checkpoint replaced since it was converted is converted again before loading.
+    """
+    (tmp_path / "dino.mmap.pt").write_bytes(b"")
+    dp = DinoProcess(device="cpu")
+    dp.load_model(model_config_path="config.py", model_checkpoint_path=str(tmp_path / "dino.pth"))
+
+    mock_changed.assert_called_once_with(str(tmp_path / "dino.mmap.pt"), str(tmp_path / "dino.pth"))
+    mock_convert.assert_called_once_with(str(tmp_path / "dino.pth"), str(tmp_path / "dino.mmap.pt"))
+    mock_state.assert_called_once_with(str(tmp_path / "dino.mmap.pt"))
+
+
 @patch("lab_monitor.dino_functions.T.Compose")
 @patch("lab_monitor.dino_functions.cv2.cvtColor")
 @patch("lab_monitor.dino_functions.Image.fromarray")
@@ -88,6 +134,20 @@ def test_transform_calls_pipeline(mock_fromarray, mock_cvtColor, mock_compose, d
     assert isinstance(transformed, torch.Tensor)
 
 
+@patch("lab_monitor.dino_functions.T.Compose")
+@patch("lab_monitor.dino_functions.T.RandomResize")
+def test_transform_resizes_to_input_size(mock_resize, mock_compose, dummy_cv_image):
+    """
+        Tests that frames are resized to the input size, with the long side capped in proportion.
+    """
+    mock_compose.return_value = MagicMock(return_value=(torch.rand(3, 4, 4), None))
+    DinoProcess()._transform(dummy_cv_image)  # pylint: disable=W0212
+    mock_resize.assert_called_with([800], max_size=1333)
+
+    DinoProcess(input_size=400)._transform(dummy_cv_image)  # pylint: disable=W0212
+    mock_resize.assert_called_with([400], max_size=666)
+
+
 def test_process_image_raises_if_model_not_loaded():
     """
         Tests that process_image raises an error if the model is not loaded.
@@ -117,29 +177,108 @@ def test_process_image_runs_with_model(mock_predict):
     mock_predict.assert_called_once()
 
 
-@patch("lab_monitor.dino_functions.annotate")
-def test_annotate_image_calls_annotate(mock_annotate, dummy_cv_image):
+@patch("lab_monitor.dino_functions.get_phrases_from_posmap", return_value="glass bottle.")
+def test_process_batch_splits_outputs_per_image(_mock_phrases):
+    """
+        Tests that a batch runs one forward pass and applies the box threshold to each image separately.
+    Args:
+        _mock_phrases (MagicMock): Mock for the phrase decoding.
+    """
+    pred_logits = torch.full((2, 3, 256), -10.0)
+    pred_logits[0, 1, 0] = 10.0
+    pred_logits[1, :2, 0] = 10.0
+    mock_model = MagicMock()
+    mock_model.to.return_value = mock_model
+    mock_model.return_value = {"pred_logits": pred_logits, "pred_boxes": torch.rand(2, 3, 4)}
+
+    dp = DinoProcess(device="cpu")
+    dp.model = mock_model
+    results = dp.process_batch([np.zeros((100, 100, 3), dtype=np.uint8)] * 2)
+
+    mock_model.assert_called_once()
+    images = mock_model.call_args[0][0]
+    assert len(images) == 2 and len(mock_model.call_args.kwargs["captions"]) == 2
+    assert [len(boxes) for boxes, _, _ in results] == [1, 2]
+    assert results[1][2] == ["glass bottle", "glass bottle"]
+    assert dp.process_batch([]) == []
+
+
+def test_process_raw_keeps_token_scores():
+    """
+        Tests that raw output keeps every box above the threshold with its caption token scores.
+    """
+    pred_logits = torch.zeros((1, 3, 256))
+    pred_logits[0, 0, 1] = 0.6
+    pred_logits[0, 2, 2] = 0.3
+    mock_model = MagicMock()
+    mock_model.to.return_value = mock_model
+    mock_model.return_value = {"pred_logits": torch.logit(pred_logits.clamp(1e-6, 1 - 1e-6)),
+                               "pred_boxes": torch.rand(1, 3, 4)}
+    mock_model.tokenizer.convert_ids_to_tokens.return_value = ["[CLS]", "hand", "bottle", "[SEP]"]
+
+    dp = DinoProcess(device="cpu")
+    dp.model = mock_model
+    results, tokens = dp.process_raw([np.zeros((100, 100, 3), dtype=np.uint8)], box_threshold=0.2)
+
+    assert tokens == ["[CLS]", "hand", "bottle", "[SEP]"]
+    boxes, scores = results[0]
+    assert boxes.shape == (2, 4) and scores.shape == (2, 4)
+    assert scores[:, 1:3] == pytest.approx(np.array([[0.6, 0.0], [0.0, 0.3]]), abs=1e-4)
+
+
+@patch("lab_monitor.dino_functions.predict")
+def test_process_image_reuses_cached_detections(mock_predict, dummy_cv_image):
+    """
+        Tests that a recurring frame is not run through the model again with the same thresholds.
+    Args:
+        mock_predict (MagicMock): Mock for the predict function.
+    """
+    mock_predict.return_value = ("boxes", "logits", ["hand"])
+    dp = DinoProcess(cache=DetectionCache(max_distance=0))
+    dp.model = MagicMock()
+
+    assert dp.process_image(dummy_cv_image) == ("boxes", "logits", ["hand"])
+    assert dp.process_image(dummy_cv_image.copy()) == ("boxes", "logits", ["hand"])
+    assert mock_predict.call_count == 1
+    dp.process_image(dummy_cv_image, box_threshold=0.5)
+    assert mock_predict.call_count == 2
+    assert dp.cache.stats()["hits"] == 1
+
+
+def test_process_batch_only_runs_uncached_frames(dummy_cv_image):
+    """
+        Tests that cached frames in a batch are answered from the cache and the rest run in one forward pass.
+    """
+    dp = DinoProcess(device="cpu", cache=DetectionCache(max_distance=0))
+    dp.model = MagicMock()
+    cached = ("boxes", "logits", ["hand"])
+    key = dp._cache_key(dummy_cv_image, 0.35, 0.25)  # pylint: disable=W0212
+    dp.cache.put(key, dp.cache.fingerprint(dummy_cv_image), cached)
+    other = np.zeros_like(dummy_cv_image)
+
+    with patch.object(dp, "_predict_batch", return_value=[("new", "new", [])]) as mock_batch:
+        results = dp.process_batch([dummy_cv_image, other])
+
+    assert results == [cached, ("new", "new", [])]
+    assert len(mock_batch.call_args.args[0]) == 1 and mock_batch.call_args.args[0][0] is other
+
+
+def test_annotate_image_draws_in_place(dummy_cv_image):
     """
-        Tests that annotate_image calls the annotate function with correct parameters.
+        Tests that annotate_image draws onto the given BGR image instead of returning a copy.
     Args:
-        mock_annotate (MagicMock): Mock for the annotate function.
         dummy_cv_image (np.ndarray): A dummy OpenCV image.
     """
-    dummy_boxes = np.array([[0, 0, 10, 10]])
-    dummy_logits = np.array([0.9])
+    dummy_boxes = torch.tensor([[0.5, 0.5, 0.4, 0.4]])
+    dummy_logits = torch.tensor([0.9])
     dummy_phrases = ["bottle"]
-    mock_annotate.return_value = dummy_cv_image
+    original = dummy_cv_image.copy()
 
     dp = DinoProcess()
     result = dp.annotate_image(dummy_cv_image, dummy_boxes, dummy_logits, dummy_phrases)
 
-    mock_annotate.assert_called_once_with(
-        image_source=dummy_cv_image,
-        boxes=dummy_boxes,
-        logits=dummy_logits,
-        phrases=dummy_phrases
-    )
-    assert np.array_equal(result, dummy_cv_image)
+    assert result is dummy_cv_image
+    assert not np.array_equal(result, original)
 
 
 @pytest.mark.parametrize("input_phrase, expected_output", [
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+    test_event_media.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the event thumbnail and clip recorder.
+
+    Change History:
+        0.1: Created.
+        0.2: Added portrait source test.
+"""
+from unittest.mock import patch
+import cv2
+import numpy as np
+from lab_monitor.event_media import EventMediaRecorder, media_name
+
+
+def test_media_name():
+    """
+        Tests that event media names sort by frame and are safe file names.
+    """
+    assert media_name(42, "bottle is poured into petri dish") == "00000042_bottle_is_poured_into_petri_dish"
+
+
+def test_thumbnail_is_downscaled(tmp_path):
+    """
+        Tests that only marked frames get a thumbnail, downscaled to the maximum width.
+    """
+    recorder = EventMediaRecorder(tmp_path, fps=10, max_width=160)
+    recorder.update(0, np.zeros((480, 640, 3), dtype=np.uint8))
+    recorder.mark(1, 0.1, "hand touches bottle")
+    recorder.update(1, np.zeros((480, 640, 3), dtype=np.uint8))
+    recorder.close()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["00000001_hand_touches_bottle.jpg"]
+    assert cv2.imread(str(tmp_path / "00000001_hand_touches_bottle.jpg")).shape == (120, 160, 3)
+
+
+def test_downscaled_portrait_frames_have_even_dimensions(tmp_path):
+    """
+        Tests that frames are downscaled to even dimensions, which clips encoded as yuv420p need.
+    """
+    recorder = EventMediaRecorder(tmp_path, fps=10)
+
+    assert recorder.downscale(np.zeros((1920, 1080, 3), dtype=np.uint8)).shape == (568, 320, 3)
+    assert recorder.downscale(np.zeros((101, 75, 3), dtype=np.uint8)).shape == (100, 74, 3)
+    assert recorder.downscale(np.zeros((4, 4, 3), dtype=np.uint8)).shape == (4, 4, 3)
+
+
+@patch("lab_monitor.event_media.create_video_writer")
+def test_clip_spans_the_event(mock_writer, tmp_path):
+    """
+        Tests that a clip holds the frames either side of its event and is closed once complete.
+    """
+    recorder = EventMediaRecorder(tmp_path, fps=10, clip_seconds=0.4, encoder_settings={"backend": "opencv"})
+    for frame_number in range(10):
+        if frame_number == 5:
+            recorder.mark(frame_number, 0.5, "bottle stops pouring")
+        recorder.update(frame_number, np.full((4, 4, 3), frame_number, dtype=np.uint8))
+    recorder.close()
+
+    args, kwargs = mock_writer.call_args
+    assert args == (str(tmp_path / "00000005_bottle_stops_pouring.mp4"), 10, (4, 4))
+    assert kwargs == {"backend": "opencv", "threaded": False}
+    written = [call.args[0][0, 0, 0] for call in mock_writer.return_value.write.call_args_list]
+    assert written == [3, 4, 5, 6, 7]
+    mock_writer.return_value.release.assert_called_once()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+    test_event_rules.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the interaction rules config and the spatial grid.
+
+    Change History:
+        0.1: Created.
+        0.2: Added tests for inverted and outsized boxes.
+"""
+import itertools
+import json
+import random
+import time
+import pytest
+from lab_monitor.event_rules import candidate_pairs, load_rules
+
+
+def test_bundled_rules():
+    """
+        Tests that the bundled rules are the four lab interactions, in order.
+    """
+    rules = load_rules()
+
+    assert [rule["pair"] for rule in rules] == [("hand", "petri dish"), ("hand", "bottle"),
+                                                ("bottle cap", "bottle"), ("bottle", "petri dish")]
+    assert rules[3] == {"pair": ("bottle", "petri dish"), "start": "bottle is poured into petri dish", "end": None}
+
+
+def test_invalid_rules(tmp_path):
+    """
+        Tests that rules without two objects and a start message, or repeated rules, are rejected.
+    """
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"objects": ["glove"], "start": "glove"}]}), encoding="utf-8")
+    with pytest.raises(ValueError, match="two objects"):
+        load_rules(str(path))
+
+    rule = {"objects": ["Glove", "flask"], "start": "glove touches flask"}
+    path.write_text(json.dumps({"rules": [rule, rule]}), encoding="utf-8")
+    with pytest.raises(ValueError, match="Duplicate"):
+        load_rules(str(path))
+
+
+def _intersect(box1, box2):
+    """
+        Brute force positive area intersection test.
+    """
+    return min(box1[2], box2[2]) > max(box1[0], box2[0]) and min(box1[3], box2[3]) > max(box1[1], box2[1])
+
+
+def test_candidate_pairs_include_every_overlap():
+    """
+        Tests that the grid never misses an overlapping pair and prunes distant ones.
+    """
+    rng = random.Random(0)
+    for _ in range(50):
+        boxes = []
+        for _ in range(rng.randint(0, 40)):
+            x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+            boxes.append((x, y, x + rng.uniform(0, 120), y + rng.uniform(0, 120)))
+        pairs = candidate_pairs(boxes)
+        overlapping = {(i, j) for i, j in itertools.combinations(range(len(boxes)), 2)
+                       if _intersect(boxes[i], boxes[j])}
+        assert overlapping <= pairs
+
+    assert candidate_pairs([(0, 0, 10, 10), (500, 500, 510, 510)]) == set()
+
+
+def test_grid_ignores_inverted_boxes():
+    """
+        Tests that inverted boxes, e.g. (cx, cy, w, h) passed as corners, do not shrink the grid cells.
+    """
+    start = time.perf_counter()
+
+    assert candidate_pairs([(0.5, 0.5, 0.2, 0.2), (0.1, 0.1, 0.4001, 0.4001)]) == set()
+    assert candidate_pairs([(0.5, 0.5, 0.2, 0.2), (0.1, 0.1, 0.401, 0.401), (0.3, 0.3, 0.5, 0.5)]) == {(1, 2)}
+    assert time.perf_counter() - start < 1.0
+
+
+def test_grid_bounds_cells_of_large_boxes():
+    """
+        Tests that a box far larger than the rest spans a bounded number of cells and still pairs with them.
+    """
+    boxes = [(0.0, 0.0, 1e6, 1e6)] + [(x * 10.0, 5.0, x * 10.0 + 1, 6.0) for x in range(100)]
+    start = time.perf_counter()
+
+    pairs = candidate_pairs(boxes)
+
+    assert time.perf_counter() - start < 1.0
+    assert {(0, j) for j in range(1, len(boxes))} <= pairs
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+    test_event_store.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the indexed cross-job event store.
+
+    Change History:
+        0.1: Created.
+"""
+import pytest
+from lab_monitor.event_store import EventStore
+
+
+@pytest.fixture
+def store():
+    """
+        Fixture with events from two jobs recorded at known times.
+    """
+    events = EventStore(":memory:")
+    events.add("job-a", 0, 0.0, "hand touches petri dish", created_at=100.0)
+    events.add("job-a", 10, 1.0, "bottle is poured into petri dish", created_at=110.0)
+    events.add("job-b", 5, 0.5, "bottle is poured into petri dish", created_at=200.0)
+    events.add("job-b", 20, 2.0, "bottle stops pouring", created_at=210.0)
+    yield events
+    events.close()
+
+
+def test_query_filters_and_pages(store):
+    """
+        Tests filtering by job, action and time, and paging through the results oldest first.
+    """
+    assert [e["frame"] for e in store.query(job_id="job-a")] == [0, 10]
+    pours = store.query(action="bottle is poured into petri dish")
+    assert [e["job_id"] for e in pours] == ["job-a", "job-b"]
+    assert [e["created_at"] for e in store.query(since=110.0, until=210.0)] == [110.0, 200.0]
+    assert [e["frame"] for e in store.query(limit=2, offset=1)] == [10, 5]
+    assert store.count(action="bottle is poured into petri dish", since=150.0) == 1
+
+
+def test_counts_per_action_and_job(store):
+    """
+        Tests aggregate counts grouped by action and by job.
+    """
+    assert store.counts("action") == {"bottle is poured into petri dish": 2, "bottle stops pouring": 1,
+                                      "hand touches petri dish": 1}
+    assert store.counts("job", since=200.0) == {"job-b": 2}
+    with pytest.raises(ValueError):
+        store.counts("frame")
+
+
+def test_delete_job_from_frame(store):
+    """
+        Tests that only a job's events from the given frame onwards are removed.
+    """
+    store.delete_job("job-b", from_frame=10)
+
+    assert store.counts("job") == {"job-a": 2, "job-b": 1}
@@ -8,18 +8,23 @@
 
     Created: 23/06/2025
 
-    Version: 0.1
+    Version: 0.3
 
     Description:
         Tests for event tracker functionality.
 
     Change History:
         0.1: Created.
+        0.2: Added event callback test.
+        0.3: Added config driven rules test.
 """
+import json
 import tempfile
 import os
+import numpy as np
 import pytest
 from lab_monitor.event_tracker import OverlapEventTracker
+from lab_monitor.rle_mask import RLEMask
 
 
 @pytest.fixture
@@ -141,3 +146,103 @@ def test_no_log_for_untracked_pair(temp_log_file):
     # Should only contain header
     assert len(lines) == 1
     assert lines[0].startswith("frame,timestamp,action")
+
+
+def test_mask_overlap_overrides_box_overlap(temp_log_file):
+    """
+        Tests that masks are used instead of boxes when both objects have one.
+        The boxes overlap but the masks do not, so no event should be logged.
+    Args:
+        temp_log_file (str): Path to the temporary log file created by the fixture.
+    """
+    hand = np.zeros((20, 20), dtype=bool)
+    dish = np.zeros((20, 20), dtype=bool)
+    hand[0:5, 0:5] = True
+    dish[8:15, 8:15] = True
+
+    tracker = OverlapEventTracker(log_path=temp_log_file, fps=10.0)
+    tracker.update(0, {
+        "hand": [(0, 0, 10, 10)],
+        "petri dish": [(5, 5, 15, 15)]
+    }, {
+        "hand": [RLEMask.from_dense(hand)],
+        "petri dish": [RLEMask.from_dense(dish)]
+    })
+
+    hand[5:10, 5:10] = True
+    tracker.update(1, {
+        "hand": [(0, 0, 10, 10)],
+        "petri dish": [(5, 5, 15, 15)]
+    }, {
+        "hand": [RLEMask.from_dense(hand)],
+        "petri dish": [RLEMask.from_dense(dish)]
+    })
+    tracker.close()
+
+    with open(temp_log_file, "r") as f:
+        lines = [line.strip() for line in f.readlines()]
+
+    assert lines[1:] == ["1,0.100,hand touches petri dish"]
+
+
+def test_missing_mask_falls_back_to_boxes(temp_log_file):
+    """
+        Tests that box overlap is used when only one of the objects has a mask.
+    Args:
+        temp_log_file (str): Path to the temporary log file created by the fixture.
+    """
+    hand = np.zeros((20, 20), dtype=bool)
+    hand[0:2, 0:2] = True
+
+    tracker = OverlapEventTracker(log_path=temp_log_file, fps=10.0)
+    tracker.update(0, {
+        "hand": [(0, 0, 10, 10)],
+        "petri dish": [(5, 5, 15, 15)]
+    }, {
+        "hand": [RLEMask.from_dense(hand)],
+        "petri dish": [None]
+    })
+    tracker.close()
+
+    with open(temp_log_file, "r") as f:
+        lines = [line.strip() for line in f.readlines()]
+
+    assert lines[1:] == ["0,0.000,hand touches petri dish"]
+
+
+def test_events_passed_to_callback(temp_log_file):
+    """
+        Tests that every logged event is also passed to the on_event callback.
+    """
+    events = []
+    tracker = OverlapEventTracker(log_path=temp_log_file, fps=10.0,
+                                  on_event=lambda *event: events.append(event))
+
+    tracker.update(0, {"hand": [(0, 0, 10, 10)], "petri dish": [(5, 5, 15, 15)]})
+    tracker.update(3, {"hand": [(0, 0, 4, 4)], "petri dish": [(5, 5, 15, 15)]})
+    tracker.close()
+
+    assert events == [(0, 0.0, "hand touches petri dish"), (3, 0.3, "hand releases petri dish")]
+
+
+def test_rules_from_config(temp_log_file, tmp_path):
+    """
+        Tests that rules come from the config file, including rules between two objects of the same class,
+        and that simultaneous events are logged in rule order.
+    """
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps({"rules": [
+        {"objects": ["pipette", "flask"], "start": "pipette enters flask", "end": "pipette leaves flask"},
+        {"objects": ["glove", "glove"], "start": "gloves touch"},
+    ]}), encoding="utf-8")
+    tracker = OverlapEventTracker(log_path=temp_log_file, fps=10.0, rules_path=str(rules_path))
+
+    tracker.update(0, {"glove": [(0, 0, 10, 10)], "flask": [(40, 40, 60, 60)], "pipette": [(45, 0, 50, 45)],
+                       "hand": [(0, 0, 100, 100)], "petri dish": [(0, 0, 100, 100)]})
+    tracker.update(1, {"glove": [(0, 0, 10, 10), (5, 5, 15, 15)], "flask": [(40, 40, 60, 60)]})
+    tracker.close()
+
+    with open(temp_log_file, "r") as f:
+        lines = [line.strip() for line in f.readlines()]
+
+    assert lines[1:] == ["0,0.000,pipette enters flask", "1,0.100,gloves touch", "1,0.100,pipette leaves flask"]
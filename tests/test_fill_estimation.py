@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+    test_fill_estimation.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for liquid fill estimation.
+
+    Change History:
+        0.1: Created.
+"""
+import tempfile
+import os
+import math
+import numpy as np
+import pytest
+from lab_monitor.fill_estimation import FillLevelEstimator, beer_lambert_depth
+
+YELLOW = (30, 100, 100)  # BGR, hue 30, darker than the background
+GREY = (150, 150, 150)
+
+
+@pytest.fixture
+def temp_log_file():
+    """
+        Fixture to create a temporary log file for testing.
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tf:
+        path = tf.name
+    yield path
+    os.remove(path)
+
+
+def test_beer_lambert_depth():
+    """
+        Tests the attenuation depth formula and its degenerate cases.
+    """
+    assert beer_lambert_depth(50.0, 100.0, k=2.0) == pytest.approx(math.log(2) / 2)
+    assert beer_lambert_depth(100.0, 100.0) == 0.0
+    assert beer_lambert_depth(0.0, 100.0) == 0.0
+
+
+def test_petri_dish_fill(temp_log_file):
+    """
+        Tests that a dish half covered by liquid reports roughly half of its ellipse filled.
+    """
+    frame = np.full((100, 100, 3), GREY, dtype=np.uint8)
+    frame[20:50, 20:80] = YELLOW
+    estimator = FillLevelEstimator(log_path=temp_log_file, fps=10.0)
+
+    fill_pct, depth = estimator.measure(frame, (20, 20, 80, 80), "petri dish")
+    estimator.close()
+
+    assert fill_pct == pytest.approx(50.0, abs=3.0)
+    assert depth > 0.0
+
+
+def test_bottle_fill_level(temp_log_file):
+    """
+        Tests that a bottle with liquid in its lower quarter reports a 25% fill level.
+    """
+    frame = np.full((100, 100, 3), GREY, dtype=np.uint8)
+    frame[75:100, 40:60] = YELLOW
+    estimator = FillLevelEstimator(log_path=temp_log_file, fps=10.0)
+
+    fill_pct, _ = estimator.measure(frame, (40, 0, 60, 100), "bottle")
+    estimator.close()
+
+    assert fill_pct == pytest.approx(25.0)
+
+
+def test_hue_range_wraps(temp_log_file):
+    """
+        Tests that a lower hue bound above the upper bound wraps around red.
+    """
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    frame[:] = (0, 0, 200)  # red, hue 0
+    estimator = FillLevelEstimator(log_path=temp_log_file, fps=10.0,
+                                   hsv_ranges={"petri dish": ((170, 50, 50), (10, 255, 255))})
+
+    fill_pct, _ = estimator.measure(frame, (0, 0, 10, 10), "petri dish")
+    estimator.close()
+
+    assert fill_pct == pytest.approx(100.0)
+
+
+def test_update_logs_time_series(temp_log_file):
+    """
+        Tests that update writes one row per measured object and skips untracked labels.
+    """
+    frame = np.full((100, 100, 3), GREY, dtype=np.uint8)
+    estimator = FillLevelEstimator(log_path=temp_log_file, fps=10.0)
+
+    estimator.update(3, frame, {
+        "petri dish": [(0, 0, 50, 50), (50, 50, 100, 100)],
+        "hand": [(0, 0, 10, 10)]
+    })
+    estimator.close()
+
+    with open(temp_log_file, "r") as f:
+        lines = [line.strip() for line in f.readlines()]
+
+    assert lines[0] == "frame,timestamp,object,index,fill_pct,depth"
+    assert lines[1:] == ["3,0.300,petri dish,0,0.00,0.0000", "3,0.300,petri dish,1,0.00,0.0000"]
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+    test_inference_scheduler.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.5
+
+    Description:
+        Tests for the cross-job dynamic batching scheduler, with the model stubbed out.
+
+    Change History:
+        0.1: Created.
+        0.2: Added async detection test.
+        0.3: Added job priority test.
+        0.4: Added thread budget test.
+        0.5: Added tests for the waiting bound and for batching callers without a client.
+"""
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from lab_monitor.async_inference import ExecutorBusy
+from lab_monitor.inference_scheduler import InferenceScheduler
+
+
+class _StubNetwork:
+    """
+        Returns each image's first pixel value as its label and records the batches it was given.
+    """
+    def __init__(self, gate: threading.Event = None):
+        self.batches = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def process_batch(self, images, box_threshold, text_threshold):
+        """
+            Optionally waits for the gate, then labels each image.
+        """
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append([int(image[0, 0, 0]) for image in images])
+        return [(np.zeros((0, 4)), np.zeros(0), [str(int(image[0, 0, 0]))]) for image in images]
+
+    def map_label(self, phrase):
+        """
+            Upper cases the phrase.
+        """
+        return phrase.upper()
+
+
+def _frame(value):
+    """
+        A small frame filled with value.
+    """
+    return np.full((4, 4, 3), value, dtype=np.uint8)
+
+
+def test_frames_from_jobs_are_batched_and_routed():
+    """
+        Tests that concurrent jobs share batches and each gets its own results back.
+    """
+    network = _StubNetwork()
+    scheduler = InferenceScheduler(network, max_batch_size=4, max_wait_ms=200)
+    clients = [scheduler.client(f"job{i}") for i in range(3)]
+    results = {}
+
+    def run(index, client):
+        results[index] = [client.process_image(_frame(index * 10 + n))[2] for n in range(5)]
+        client.close()
+    threads = [threading.Thread(target=run, args=(i, client)) for i, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    scheduler.stop()
+
+    assert results == {i: [[str(i * 10 + n)] for n in range(5)] for i in range(3)}
+    assert max(len(batch) for batch in network.batches) == 3
+    assert set(scheduler.stats()["jobs"]) == {"job0", "job1", "job2"}
+    assert scheduler.stats("job1")["jobs"]["job1"]["frames"] == 5
+
+
+def test_jobs_are_served_round_robin():
+    """
+        Tests that a job with a backlog does not hold up another job's frame.
+    """
+    gate = threading.Event()
+    network = _StubNetwork(gate)
+    scheduler = InferenceScheduler(network, max_batch_size=2, max_wait_ms=0)
+    first = scheduler.submit("long", _frame(0))
+    assert network.entered.wait(5)
+    backlog = [scheduler.submit("long", _frame(n)) for n in range(1, 5)]
+    other = scheduler.submit("short", _frame(100))
+    gate.set()
+    for future in [first, *backlog, other]:
+        future.result(5)
+    scheduler.stop()
+
+    assert network.batches[:2] == [[0], [1, 100]]
+    assert scheduler.client("short").map_label("hand") == "HAND"
+
+
+def test_higher_priority_jobs_are_served_first():
+    """
+        Tests that an urgent job's frame overtakes a lower priority job's backlog.
+    """
+    gate = threading.Event()
+    network = _StubNetwork(gate)
+    scheduler = InferenceScheduler(network, max_batch_size=1, max_wait_ms=0)
+    scheduler.client("batch", priority=0)
+    scheduler.client("urgent", priority=2)
+    first = scheduler.submit("batch", _frame(0))
+    assert network.entered.wait(5)
+    backlog = [scheduler.submit("batch", _frame(n)) for n in range(1, 4)]
+    urgent = scheduler.submit("urgent", _frame(100))
+    gate.set()
+    for future in [first, *backlog, urgent]:
+        future.result(5)
+    scheduler.stop()
+
+    assert network.batches[:2] == [[0], [100]]
+
+
+def test_thread_budget_applied_on_batching_thread():
+    """
+        Tests that a new thread count is set on the model from the thread that runs it, once per change.
+    """
+    class _Threaded(_StubNetwork):
+        def __init__(self):
+            super().__init__()
+            self.threads = []
+
+        def set_num_threads(self, threads):
+            self.threads.append((threads, threading.current_thread()))
+
+    network = _Threaded()
+    scheduler = InferenceScheduler(network, max_wait_ms=0)
+    scheduler.set_num_threads(3)
+    scheduler.submit("job", _frame(1)).result(5)
+    scheduler.submit("job", _frame(2)).result(5)
+    scheduler.set_num_threads(5)
+    scheduler.submit("job", _frame(3)).result(5)
+    scheduler.stop()
+
+    assert [threads for threads, _ in network.threads] == [3, 5]
+    assert all(thread is scheduler.thread for _, thread in network.threads)
+
+
+def test_errors_reach_every_frame_in_the_batch():
+    """
+        Tests that a model failure is raised in each job waiting on the batch.
+    """
+    class _Failing(_StubNetwork):
+        def process_batch(self, images, box_threshold, text_threshold):
+            raise RuntimeError("out of memory")
+
+    scheduler = InferenceScheduler(_Failing(), max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        scheduler.client("job").process_image(_frame(1))
+    scheduler.stop()
+    with pytest.raises(RuntimeError, match="stopped"):
+        scheduler.submit("job", _frame(1))
+
+
+def test_async_detect_and_backpressure():
+    """
+        Tests that async callers await results from the batching thread and are refused when too many wait.
+    """
+    network = _StubNetwork()
+    scheduler = InferenceScheduler(network, max_batch_size=4, max_wait_ms=1.0)
+
+    async def detect_all():
+        return await asyncio.gather(*(scheduler.detect("api", _frame(value)) for value in (1, 2, 3)))
+
+    results = asyncio.run(detect_all())
+    assert [phrases for _, _, phrases in results] == [["1"], ["2"], ["3"]]
+
+    scheduler.max_pending = 0
+    with pytest.raises(ExecutorBusy):
+        asyncio.run(scheduler.detect("api", _frame(4)))
+    scheduler.stop()
+
+
+def test_waiting_bound_is_checked_when_queued():
+    """
+        Tests that bounded frames are refused once max_pending are queued, while jobs' frames are not.
+    """
+    gate = threading.Event()
+    network = _StubNetwork(gate)
+    scheduler = InferenceScheduler(network, max_batch_size=1, max_wait_ms=0, max_pending=1)
+    running = scheduler.submit("job", _frame(0))
+    assert network.entered.wait(5)
+
+    queued = scheduler.submit("api", _frame(1), bounded=True)
+    with pytest.raises(ExecutorBusy):
+        scheduler.submit("api", _frame(2), bounded=True)
+    unbounded = scheduler.submit("job", _frame(3))
+    gate.set()
+    assert [future.result(5)[2] for future in (running, queued, unbounded)] == [["0"], ["1"], ["3"]]
+    scheduler.stop()
+
+
+def test_callers_without_a_client_are_batched():
+    """
+        Tests that frames from callers without a client wait for others to arrive rather than running alone.
+    """
+    network = _StubNetwork()
+    scheduler = InferenceScheduler(network, max_batch_size=4, max_wait_ms=500)
+    futures = []
+    for value in range(3):
+        futures.append(scheduler.submit("api", _frame(value)))
+        time.sleep(0.02)
+    for future in futures:
+        future.result(5)
+    scheduler.stop()
+
+    assert network.batches == [[0, 1, 2]]
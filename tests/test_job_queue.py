@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+    test_job_queue.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the job queue's priorities, preemption and cancellation.
+
+    Change History:
+        0.1: Created.
+"""
+import threading
+import time
+from lab_monitor.job_queue import CANCEL, PRIORITIES, JobQueue
+
+
+class _Jobs:
+    """
+        Runs jobs that wait until released or stopped, recording the order they start in.
+    """
+    def __init__(self):
+        self.starts = []
+        self.controls = {}
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def run(self, job_id, control):
+        """
+            Waits for the release or a stop request, returns True if stopped.
+        """
+        with self.lock:
+            self.starts.append(job_id)
+            self.controls[job_id] = control
+        while not self.release.is_set():
+            if control.should_stop():
+                return True
+            time.sleep(0.005)
+        return False
+
+    def wait_for(self, count, timeout=5.0):
+        """
+            Waits until count jobs have started.
+        """
+        deadline = time.monotonic() + timeout
+        while len(self.starts) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return len(self.starts) >= count
+
+
+def test_queued_jobs_run_by_priority():
+    """
+        Tests that waiting jobs start highest priority first, then in submission order.
+    """
+    jobs = _Jobs()
+    queue = JobQueue(jobs.run, max_running=1)
+    queue.submit("first", PRIORITIES["high"])
+    assert jobs.wait_for(1)
+    for job_id, priority in (("low", "low"), ("normal1", "normal"), ("normal2", "normal")):
+        queue.submit(job_id, PRIORITIES[priority])
+    assert queue.state("normal1") == "queued"
+    jobs.release.set()
+
+    assert jobs.wait_for(4)
+    assert jobs.starts == ["first", "normal1", "normal2", "low"]
+
+
+def test_higher_priority_preempts_and_preempted_job_resumes():
+    """
+        Tests that an urgent job stops a lower priority running job, which runs again afterwards.
+    """
+    jobs = _Jobs()
+    queue = JobQueue(jobs.run, max_running=1)
+    queue.submit("long", PRIORITIES["low"])
+    assert jobs.wait_for(1)
+    queue.submit("urgent", PRIORITIES["high"])
+    assert jobs.wait_for(2)
+    jobs.release.set()
+
+    assert jobs.wait_for(3)
+    assert jobs.starts == ["long", "urgent", "long"]
+
+
+def test_equal_priority_does_not_preempt():
+    """
+        Tests that a job only preempts jobs of a lower priority.
+    """
+    jobs = _Jobs()
+    queue = JobQueue(jobs.run, max_running=1)
+    queue.submit("a")
+    assert jobs.wait_for(1)
+    queue.submit("b")
+    time.sleep(0.05)
+
+    assert not jobs.controls["a"].should_stop()
+    jobs.release.set()
+    assert jobs.wait_for(2)
+
+
+def test_cancel_queued_and_running_jobs():
+    """
+        Tests that a queued job is dropped, and a running job is stopped and not run again.
+    """
+    jobs = _Jobs()
+    queue = JobQueue(jobs.run, max_running=1)
+    queue.submit("running")
+    assert jobs.wait_for(1)
+    queue.submit("waiting")
+
+    assert queue.cancel("waiting") == "queued"
+    assert queue.cancel("running") == "running"
+    assert jobs.controls["running"].reason == CANCEL
+    deadline = time.monotonic() + 5
+    while queue.state("running") is not None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert queue.state("running") is None
+    assert queue.cancel("unknown") is None
+    assert jobs.starts == ["running"]
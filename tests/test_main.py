@@ -0,0 +1,461 @@
+#!/usr/bin/env python
+"""
+    test_main.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.12
+
+    Description:
+        Tests for the FastAPI service, with video processing mocked out.
+
+    Change History:
+        0.1: Created.
+        0.2: Added job manifest and resume tests.
+        0.3: Added event query tests.
+        0.4: Added event media tests.
+        0.5: Added range rendering tests.
+        0.6: Added camera profile tests.
+        0.7: Added a test that the service starts without the model libraries.
+        0.8: Added storage budget tests.
+        0.9: Added still image detection tests.
+        0.10: Added job cancellation tests, preempted jobs resume on startup.
+        0.11: Added CPU budget test.
+        0.12: Added upload indexing tests, job status reports the job's storage.
+"""
+import importlib
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from lab_monitor.event_store import EventStore
+from lab_monitor.inference_scheduler import InferenceScheduler
+from lab_monitor.job_queue import JobQueue
+from lab_monitor.render import RenderCache
+from lab_monitor.storage import StorageBudget, StorageManager
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """
+        Imports the service with its data directories redirected to a temporary folder.
+    Returns:
+        tuple: The main module and a TestClient for its app.
+    """
+    monkeypatch.chdir(tmp_path)
+    main = importlib.import_module("main")
+    for name in ("UPLOAD_DIR", "OUTPUT_DIR", "LOG_DIR", "JOBS_DIR", "CHECKPOINT_DIR", "MEDIA_DIR", "RENDER_DIR",
+                 "CALIBRATION_DIR"):
+        directory = tmp_path / name.lower()
+        directory.mkdir()
+        monkeypatch.setattr(main, name, directory)
+    monkeypatch.setattr(main, "PROGRESS", {})
+    monkeypatch.setattr(main, "JOBS", {})
+    monkeypatch.setattr(main, "process_video", MagicMock())
+    monkeypatch.setattr(main, "VideoIndex", MagicMock())
+    monkeypatch.setattr(main, "JOB_QUEUE", JobQueue(main.run_job, max_running=main.MAX_RUNNING_JOBS))
+    monkeypatch.setattr(main, "EVENTS", EventStore(":memory:"))
+    monkeypatch.setattr(main, "RENDERS", RenderCache(tmp_path / "render_cache"))
+    monkeypatch.setattr(main, "STORAGE", StorageManager({main.UPLOAD_DIR: StorageBudget(max_bytes=100)},
+                                                        active_jobs=main.active_jobs))
+    return main, TestClient(main.app)
+
+
+def _wait_for(main, job_id, timeout=5.0):
+    """
+        Waits for a background job to report completion.
+    """
+    deadline = time.monotonic() + timeout
+    while main.PROGRESS.get(job_id) != 100 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_upload_runs_job(api):
+    """
+        Tests that an upload starts processing with the requested options and reports progress.
+    """
+    main, client = api
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                           params={"encoder": "opencv", "crf": 30})
+    job_id = response.json()["job_id"]
+    _wait_for(main, job_id)
+
+    kwargs = main.process_video.call_args.kwargs
+    assert kwargs["encoder_settings"]["backend"] == "opencv"
+    assert kwargs["encoder_settings"]["crf"] == 30
+    assert kwargs["output_mode"] == "video"
+    assert client.get(f"/status/{job_id}").json() == {"job_id": job_id, "status": "complete", "progress": 100,
+                                                      "eta_seconds": 0.0, "storage_bytes": {"upload_dir": 4}}
+
+
+def test_upload_rejects_bad_options(api):
+    """
+        Tests that unknown encoders, encoder settings and output modes are rejected.
+    """
+    _, client = api
+
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"encoder": "gstreamer"}).status_code == 400
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"output_mode": "gif"}).status_code == 400
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"crf": 60}).status_code == 400
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"codec": "rawvideo"}).status_code == 400
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"preset": "instant"}).status_code == 400
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"start_time": 10, "end_time": 5}).status_code == 400
+
+
+def test_upload_time_window(api):
+    """
+        Tests that a time window is passed through with the upload's keyframe index.
+    """
+    main, client = api
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                           params={"start_time": 60, "end_time": 90.5})
+    job_id = response.json()["job_id"]
+    _wait_for(main, job_id)
+
+    kwargs = main.process_video.call_args.kwargs
+    assert (kwargs["start_time"], kwargs["end_time"]) == (60, 90.5)
+    assert kwargs["index_path"] == str(main.UPLOAD_DIR / f"{job_id}.index.json")
+    main.VideoIndex.load_or_build.assert_called_once_with(str(main.UPLOAD_DIR / f"{job_id}.mp4"),
+                                                          kwargs["index_path"])
+
+
+def test_upload_rejects_unreadable_video(api):
+    """
+        Tests that an upload that cannot be indexed is rejected and removed without starting a job.
+    """
+    main, client = api
+    main.VideoIndex.load_or_build.side_effect = ValueError("Failed to read the video file.")
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")})
+
+    assert response.status_code == 400
+    assert not list(main.UPLOAD_DIR.iterdir())
+    assert not main.JOBS
+    main.process_video.assert_not_called()
+
+
+def test_eta_from_progress_rate(api, monkeypatch):
+    """
+        Tests that the ETA extrapolates the progress made since the job started.
+    """
+    main, _ = api
+    monkeypatch.setattr(main, "STARTED", {"job": (100.0, 10)})
+    monkeypatch.setattr(main.time, "monotonic", lambda: 160.0)
+
+    assert main.estimate_eta("job", 40) == 120.0
+    assert main.estimate_eta("job", 10) is None
+    assert main.estimate_eta("other", 50) is None
+
+
+def test_log_only_job_has_no_video(api):
+    """
+        Tests that a log-only job skips the video and the video download reports a conflict.
+    """
+    main, client = api
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                           params={"output_mode": "log_only"})
+    job_id = response.json()["job_id"]
+    _wait_for(main, job_id)
+
+    kwargs = main.process_video.call_args.kwargs
+    assert kwargs["output_mode"] == "log_only"
+    assert kwargs["detections_path"].endswith(f"{job_id}_detections.ndjson")
+    assert client.get(f"/download/video/{job_id}").status_code == 409
+    assert client.get("/download/video/unknown").status_code == 404
+
+
+def test_job_manifest_tracks_status(api):
+    """
+        Tests that a job is persisted with its options and marked complete once processed.
+    """
+    main, client = api
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")}, params={"output_mode": "log_only"})
+    job_id = response.json()["job_id"]
+    _wait_for(main, job_id)
+
+    manifest = json.loads((main.JOBS_DIR / f"{job_id}.json").read_text(encoding="utf-8"))
+    assert manifest["status"] == "complete"
+    assert manifest["output_mode"] == "log_only"
+    assert main.process_video.call_args.kwargs["checkpoint_path"] == str(main.CHECKPOINT_DIR / f"{job_id}.json")
+
+
+def test_unfinished_jobs_resume_on_startup(api):
+    """
+        Tests that queued, running and preempted jobs are restarted when the server starts, and finished jobs are not.
+    """
+    main, _ = api
+    options = {"output_mode": "video", "encoder_settings": {"backend": "opencv"}}
+    for job_id, status in (("queued", "queued"), ("running", "running"), ("paused", "preempted"),
+                           ("done", "complete"), ("bad", "failed")):
+        (main.JOBS_DIR / f"{job_id}.json").write_text(json.dumps({"status": status, **options}), encoding="utf-8")
+
+    with TestClient(main.app) as client:
+        _wait_for(main, "queued")
+        _wait_for(main, "running")
+        _wait_for(main, "paused")
+        assert client.get("/status/done").json()["progress"] == 100
+
+    resumed = sorted(call.args[0] for call in main.process_video.call_args_list)
+    assert resumed == [str(main.UPLOAD_DIR / name) for name in ("paused.mp4", "queued.mp4", "running.mp4")]
+    assert main.JOBS["running"]["status"] == "complete"
+
+
+def test_job_events_are_queryable(api):
+    """
+        Tests that events emitted by a job are stored and can be filtered, paged and counted.
+    """
+    main, client = api
+
+    def emit_events(*_, event_callback, **__):
+        event_callback(0, 0.0, "hand touches petri dish")
+        event_callback(30, 1.0, "bottle is poured into petri dish")
+    main.process_video.side_effect = emit_events
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")})
+    job_id = response.json()["job_id"]
+    _wait_for(main, job_id)
+
+    page = client.get("/events", params={"job_id": job_id, "limit": 1, "offset": 1}).json()
+    assert page["total"] == 2
+    assert [(e["frame"], e["action"]) for e in page["events"]] == [(30, "bottle is poured into petri dish")]
+    assert client.get("/events", params={"job_id": "other"}).json()["total"] == 0
+    assert client.get("/events/counts", params={"group_by": "job"}).json()["counts"] == {job_id: 2}
+    assert client.get("/events/counts", params={"group_by": "frame"}).status_code == 400
+
+
+def test_event_media_listed_and_served(api):
+    """
+        Tests that a job's events are listed with the media saved for them, which can then be downloaded.
+    """
+    main, client = api
+
+    def save_thumbnail(*_, event_callback, media_dir, **__):
+        event_callback(12, 0.4, "hand touches bottle")
+        event_callback(40, 1.333, "hand releases bottle")
+        Path(media_dir).mkdir()
+        (Path(media_dir) / "00000012_hand_touches_bottle.jpg").write_bytes(b"jpeg")
+    main.process_video.side_effect = save_thumbnail
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")}, params={"clips": True})
+    job_id = response.json()["job_id"]
+    _wait_for(main, job_id)
+
+    assert main.process_video.call_args.kwargs["clip_seconds"] == main.CLIP_SECONDS
+    events = client.get(f"/media/{job_id}").json()["events"]
+    assert [(e["thumbnail"], e["clip"]) for e in events] == [("00000012_hand_touches_bottle.jpg", None),
+                                                             (None, None)]
+    assert client.get(f"/media/{job_id}/00000012_hand_touches_bottle.jpg").content == b"jpeg"
+    assert client.get(f"/media/{job_id}/00000040_hand_releases_bottle.jpg").status_code == 404
+    assert client.get("/media/unknown").status_code == 404
+    with pytest.raises(main.HTTPException):
+        main.download_media("..", f"{job_id}.mp4")
+
+
+def test_render_range_on_demand(api, monkeypatch):
+    """
+        Tests that a time range of a finished job is rendered once from its detections and then served from the cache.
+    """
+    main, client = api
+    render = MagicMock(side_effect=lambda *args, **kwargs: open(args[2], "wb").close())
+    monkeypatch.setattr(main, "render_range", render)
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")}, params={"output_mode": "log_only"})
+    job_id = response.json()["job_id"]
+    _wait_for(main, job_id)
+    assert client.get(f"/render/{job_id}", params={"end_time": 5}).status_code == 404
+
+    (main.LOG_DIR / f"{job_id}_detections.ndjson").write_text("", encoding="utf-8")
+    for _ in range(2):
+        assert client.get(f"/render/{job_id}", params={"start_time": 5, "end_time": 15}).status_code == 200
+
+    render.assert_called_once()
+    assert render.call_args.args[1] == str(main.LOG_DIR / f"{job_id}_detections.ndjson")
+    assert (render.call_args.kwargs["start_time"], render.call_args.kwargs["end_time"]) == (5, 15)
+    assert client.get(f"/render/{job_id}", params={"start_time": 5, "end_time": 5}).status_code == 400
+    assert client.get(f"/render/{job_id}", params={"end_time": 1000}).status_code == 400
+    assert client.get("/render/unknown", params={"end_time": 5}).status_code == 404
+
+
+def test_upload_camera_profile(api):
+    """
+        Tests that the camera profile is validated against the saved profiles and passed to the pipeline.
+    """
+    main, client = api
+    (main.CALIBRATION_DIR / "bench_camera").mkdir()
+    (main.CALIBRATION_DIR / "bench_camera" / "profile.json").write_text('{"dist_coeffs": [0, 0, 0, 0, 0]}')
+
+    assert client.get("/profiles").json() == {"profiles": ["bench_camera", "lab_camera"], "default": "lab_camera"}
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"camera_profile": "phone"}).status_code == 400
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")}, params={"camera_profile": "bench_camera"})
+    _wait_for(main, response.json()["job_id"])
+
+    kwargs = main.process_video.call_args.kwargs
+    assert kwargs["camera_profile"] == "bench_camera"
+    assert kwargs["calibration_dir"] == str(main.CALIBRATION_DIR)
+
+
+def test_import_does_not_load_model_libraries(tmp_path):
+    """
+        Tests that importing the service leaves torch and GroundingDINO unimported until inference starts.
+    """
+    code = "import sys, main; print(sorted(m for m in ('torch', 'groundingdino') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True,
+                            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+    assert result.stdout.strip() == "[]"
+
+
+def test_storage_budget(api):
+    """
+        Tests that uploads over budget are refused, usage is reported and evicted uploads are not rendered.
+    """
+    main, client = api
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"x" * 101)}).status_code == 507
+
+    job_id = client.post("/upload/", files={"file": ("clip.mp4", b"x" * 60)},
+                         params={"output_mode": "log_only"}).json()["job_id"]
+    _wait_for(main, job_id)
+    assert client.get("/storage").json()["directories"]["upload_dir"] == {
+        "bytes": 60, "files": 1, "max_bytes": 100, "max_age_seconds": None}
+
+    # The finished job's upload is evicted to make room for the next
+    (main.LOG_DIR / f"{job_id}_detections.ndjson").write_text("", encoding="utf-8")
+    client.post("/upload/", files={"file": ("clip.mp4", b"x" * 60)})
+    assert not (main.UPLOAD_DIR / f"{job_id}.mp4").exists()
+    assert client.get(f"/render/{job_id}", params={"end_time": 5}).status_code == 410
+
+
+def test_job_runs_within_cpu_budget(api):
+    """
+        Tests that a running job has a CPU budget, which is released when it finishes.
+    """
+    main, client = api
+    budgets = []
+    main.process_video.side_effect = lambda *_, **__: budgets.append(client.get("/resources").json())
+    job_id = client.post("/upload/", files={"file": ("clip.mp4", b"data")}).json()["job_id"]
+    _wait_for(main, job_id)
+
+    assert budgets[0]["jobs"][job_id]["threads"] >= 1
+    assert budgets[0]["inference"]["threads"] >= 1
+    assert client.get("/resources").json()["jobs"] == {}
+
+
+class _StubNetwork:
+    """
+        Detects one box per image, labelled with the image's width, and records the batch sizes.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def process_batch(self, images, box_threshold, text_threshold):  # pylint: disable=W0613
+        """
+            Detects each image.
+        """
+        self.batches.append(len(images))
+        time.sleep(0.05)
+        return [(np.array([[0.5, 0.5, 0.2, 0.2]]), np.array([box_threshold]), [str(image.shape[1])])
+                for image in images]
+
+    def map_label(self, phrase):
+        """
+            Prefixes the phrase.
+        """
+        return f"w{phrase}"
+
+
+def test_detect_batches_concurrent_requests(api, monkeypatch):
+    """
+        Tests that still images are detected through the shared scheduler, batched when they arrive together.
+    """
+    main, client = api
+    network = _StubNetwork()
+    monkeypatch.setattr(main, "SCHEDULER", InferenceScheduler(network, max_wait_ms=20.0))
+    _, png = cv2.imencode(".png", np.zeros((30, 40, 3), dtype=np.uint8))
+
+    response = client.post("/detect", files={"file": ("still.png", png.tobytes())}, params={"box_threshold": 0.5})
+    assert response.status_code == 200
+    assert response.json() == {"width": 40, "height": 30, "boxes": [[0.5, 0.5, 0.2, 0.2]], "scores": [0.5],
+                               "labels": ["w40"]}
+    assert client.post("/detect", files={"file": ("still.png", b"not an image")}).status_code == 400
+
+    threads = [threading.Thread(target=client.post, args=("/detect",),
+                                kwargs={"files": {"file": ("still.png", png.tobytes())}}) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert sum(network.batches) == 7
+    assert max(network.batches) > 1
+    main.SCHEDULER.stop()
+
+
+def test_detect_refused_when_busy(api, monkeypatch):
+    """
+        Tests that detection is refused with 503 once too many frames are waiting.
+    """
+    main, client = api
+    monkeypatch.setattr(main, "SCHEDULER", InferenceScheduler(_StubNetwork(), max_pending=0))
+    _, png = cv2.imencode(".png", np.zeros((30, 40, 3), dtype=np.uint8))
+    response = client.post("/detect", files={"file": ("still.png", png.tobytes())})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_cancel_running_job(api):
+    """
+        Tests that a running job stops when cancelled and its partial outputs and upload are removed.
+    """
+    main, client = api
+    started = threading.Event()
+
+    def process(video_path, output_path, log_path, *_, should_stop, **__):  # pylint: disable=W0613
+        Path(log_path).write_text("partial", encoding="utf-8")
+        started.set()
+        while not should_stop():
+            time.sleep(0.01)
+        raise main.JobStopped(1)
+
+    main.process_video.side_effect = process
+    job_id = client.post("/upload/", files={"file": ("clip.mp4", b"data")}).json()["job_id"]
+    assert started.wait(5)
+
+    assert client.post(f"/cancel/{job_id}").json() == {"job_id": job_id, "status": "cancelling"}
+    deadline = time.monotonic() + 5
+    while main.JOBS[job_id]["status"] != "cancelled" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.get(f"/status/{job_id}").json()["status"] == "cancelled"
+    assert not list(main.LOG_DIR.iterdir())
+    assert not list(main.UPLOAD_DIR.iterdir())
+    assert client.post(f"/cancel/{job_id}").status_code == 409
+    assert client.post("/cancel/unknown").status_code == 404
+
+
+def test_cancel_queued_job(api, monkeypatch):
+    """
+        Tests that a job waiting for a slot is cancelled without running, and priorities are validated.
+    """
+    main, client = api
+    monkeypatch.setattr(main, "JOB_QUEUE", JobQueue(main.run_job, max_running=0))
+    response = client.post("/upload/", files={"file": ("clip.mp4", b"data")}, params={"priority": "high"})
+    job_id = response.json()["job_id"]
+
+    assert client.post(f"/cancel/{job_id}").json() == {"job_id": job_id, "status": "cancelled"}
+    assert main.JOBS[job_id]["status"] == "cancelled"
+    assert not (main.UPLOAD_DIR / f"{job_id}.mp4").exists()
+    main.process_video.assert_not_called()
+    assert client.post("/upload/", files={"file": ("clip.mp4", b"data")},
+                       params={"priority": "urgent"}).status_code == 400
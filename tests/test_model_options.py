@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""
+    test_model_options.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the shared model path command line options.
+
+    Change History:
+        0.1: Created.
+"""
+import argparse
+from lab_monitor.model_options import add_model_arguments, parse_model_paths
+
+
+def test_only_given_paths_are_passed():
+    """
+        Tests that paths not given on the command line are left to DinoProcess.load_model's defaults.
+    """
+    parser = argparse.ArgumentParser()
+    add_model_arguments(parser)
+
+    assert parse_model_paths(parser.parse_args([])) == {}
+    assert parse_model_paths(parser.parse_args(["--model-checkpoint", "dino.pth"])) == {
+        "model_checkpoint_path": "dino.pth"}
+    assert parse_model_paths(parser.parse_args(["--model-config", "c.py", "--model-checkpoint", "d.pth"])) == {
+        "model_config_path": "c.py", "model_checkpoint_path": "d.pth"}
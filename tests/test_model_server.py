@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""
+    test_model_server.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.3
+
+    Description:
+        Tests for the model server and its shared memory client, with the model stubbed out.
+
+    Change History:
+        0.1: Created.
+        0.2: Added tests for the shared secret setting.
+        0.3: Added malformed message test.
+"""
+import os
+import threading
+from multiprocessing.connection import Client
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pytest
+from lab_monitor.inference_scheduler import InferenceScheduler
+from lab_monitor.model_client import ModelServerClient, parse_address, resolve_authkey
+from lab_monitor.model_server import ModelServer
+
+AUTHKEY = b"test"
+
+
+class _StubNetwork:
+    """
+        Returns one box per image whose width is the image's first pixel value and whose label is its shape.
+    """
+    GROUP_MAP = {"glass petri dish": "petri dish"}
+
+    def process_batch(self, images, box_threshold, text_threshold):  # pylint: disable=W0613
+        """
+            Labels each image.
+        """
+        return [(np.array([[0.5, 0.5, float(image[0, 0, 0]), 0.1]]), np.array([box_threshold]),
+                 ["x".join(str(v) for v in image.shape)]) for image in images]
+
+
+@pytest.fixture(name="server")
+def fixture_server(tmp_path):
+    """
+        A model server on a Unix socket, serving on a background thread.
+    """
+    server = ModelServer(str(tmp_path / "model.sock"), InferenceScheduler(_StubNetwork(), max_wait_ms=1.0),
+                         authkey=AUTHKEY)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.close()
+    thread.join(5)
+
+
+def test_parse_address():
+    """
+        Tests that host:port is TCP and anything else a socket path.
+    """
+    assert parse_address("127.0.0.1:8765") == ("127.0.0.1", 8765)
+    assert parse_address("/tmp/model.sock") == "/tmp/model.sock"
+
+
+def test_shared_secret_is_required(tmp_path, monkeypatch):
+    """
+        Tests that the secret comes from LAB_MONITOR_MODEL_KEY and there is no default to fall back on.
+    """
+    monkeypatch.delenv("LAB_MONITOR_MODEL_KEY", raising=False)
+    with pytest.raises(ValueError, match="LAB_MONITOR_MODEL_KEY"):
+        ModelServer(str(tmp_path / "model.sock"), InferenceScheduler(_StubNetwork()))
+    assert not (tmp_path / "model.sock").exists()
+
+    monkeypatch.setenv("LAB_MONITOR_MODEL_KEY", "from-env")
+    assert resolve_authkey() == b"from-env"
+    assert resolve_authkey(AUTHKEY) == AUTHKEY
+
+
+def test_client_with_key_from_environment(server, monkeypatch):
+    """
+        Tests that clients authenticate with LAB_MONITOR_MODEL_KEY when no key is passed.
+    """
+    monkeypatch.setenv("LAB_MONITOR_MODEL_KEY", AUTHKEY.decode("utf-8"))
+    client = ModelServerClient(server.address)
+    try:
+        assert client.process_image(np.full((2, 2, 3), 5, dtype=np.uint8))[0][0, 2] == 5
+    finally:
+        client.close()
+
+
+def test_frames_round_trip_through_shared_memory(server):
+    """
+        Tests that detections come back for frames sent through the ring, including after it grows.
+    """
+    client = ModelServerClient(server.address, authkey=AUTHKEY, slots=2)
+    try:
+        for value in range(3):
+            boxes, logits, phrases = client.process_image(np.full((4, 6, 3), value, dtype=np.uint8), 0.4, 0.25)
+            assert boxes[0, 2] == value
+            assert logits[0] == pytest.approx(0.4)
+            assert phrases == ["4x6x3"]
+        small_ring = client.slot_bytes
+        boxes, _, phrases = client.process_image(np.full((8, 8, 3), 7, dtype=np.uint8))
+        assert client.slot_bytes > small_ring
+        assert boxes[0, 2] == 7
+        assert phrases == ["8x8x3"]
+    finally:
+        client.close()
+
+
+def test_client_maps_labels_with_server_model(server):
+    """
+        Tests that labels are mapped with the server model's group map.
+    """
+    client = ModelServerClient(server.address, authkey=AUTHKEY)
+    try:
+        client.process_image(np.zeros((2, 2, 3), dtype=np.uint8))
+        assert client.map_label(" Glass Petri Dish ") == "petri dish"
+        assert client.map_label("hand") == "hand"
+    finally:
+        client.close()
+
+
+def test_clients_share_the_model(server):
+    """
+        Tests that concurrent clients each get their own results.
+    """
+    results = {}
+
+    def run(value):
+        client = ModelServerClient(server.address, authkey=AUTHKEY)
+        try:
+            results[value] = [float(client.process_image(np.full((3, 3, 3), value, dtype=np.uint8))[0][0, 2])
+                              for _ in range(5)]
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=run, args=(value,)) for value in (10, 20, 30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert results == {value: [float(value)] * 5 for value in (10, 20, 30)}
+
+
+def test_malformed_messages_get_errors(server):
+    """
+        Tests that detections before attaching or outside the shared memory are answered with errors,
+        and the connection keeps serving.
+    """
+    conn = Client(server.address, authkey=AUTHKEY)
+    shm = SharedMemory(create=True, size=2 * 48)
+    try:
+        conn.send(("detect", 0, (4, 4, 3), "|u1", 0.35, 0.25))
+        assert conn.recv()[0] == "error"
+        conn.send(("attach", shm.name, 48, os.getpid()))
+        assert conn.recv()[0] == "ok"
+        for slot, shape in ((-1, (4, 4, 3)), (2, (4, 4, 3)), (0, (8, 8, 3))):
+            conn.send(("detect", slot, shape, "|u1", 0.35, 0.25))
+            assert conn.recv()[0] == "error"
+
+        shm.buf[48:96] = bytes([9]) * 48
+        conn.send(("detect", 1, (4, 4, 3), "|u1", 0.35, 0.25))
+        reply = conn.recv()
+        assert reply[0] == "ok" and reply[1][0, 2] == 9
+        conn.send(("close",))
+    finally:
+        conn.close()
+        shm.close()
+        shm.unlink()
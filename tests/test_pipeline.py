@@ -1,22 +1,25 @@
 from unittest.mock import MagicMock, patch
+import pytest
 import numpy as np
 import cv2
-from lab_monitor.pipeline import process_video
+from lab_monitor.pipeline import JobStopped, process_video
 
 
 @patch("lab_monitor.pipeline.cv2.VideoCapture")
-@patch("lab_monitor.pipeline.cv2.VideoWriter")
-@patch("lab_monitor.pipeline.BarrelUndistortTransform")
-@patch("lab_monitor.pipeline.DinoProcess")
+@patch("lab_monitor.pipeline.create_video_writer")
+@patch("lab_monitor.pipeline.load_transform")
+@patch("lab_monitor.pipeline.load_network")
 @patch("lab_monitor.pipeline.OverlapEventTracker")
-def test_process_video_success(mock_tracker, mock_dino, mock_transform, mock_writer, mock_capture):
+@patch("lab_monitor.pipeline.DetectionsWriter")
+def test_process_video_success(mock_detections, mock_tracker, mock_dino, mock_transform, mock_writer, mock_capture):
     """
         Test the process_video function with mocked components to ensure it processes a video correctly.
     Args:
+        mock_detections: Mock for DetectionsWriter.
         mock_tracker: Mock for OverlapEventTracker.
-        mock_dino: Mock for DinoProcess.
-        mock_transform: Mock for BarrelUndistortTransform.
-        mock_writer: Mock for cv2.VideoWriter.
+        mock_dino: Mock for load_network.
+        mock_transform: Mock for load_transform.
+        mock_writer: Mock for create_video_writer.
         mock_capture: Mock for cv2.VideoCapture.
     """
     mock_cap = MagicMock()
@@ -44,3 +47,149 @@ def test_process_video_success(mock_tracker, mock_dino, mock_transform, mock_wri
     assert mock_writer_instance.write.call_count == 3
     assert mock_tracker.return_value.update.call_count == 3
     mock_tracker.return_value.close.assert_called_once()
+    mock_detections.assert_called_once_with("log_detections.ndjson", resume_state=None)
+    assert mock_detections.return_value.update.call_count == 3
+
+
+@patch("lab_monitor.pipeline.cv2.VideoCapture")
+@patch("lab_monitor.pipeline.create_video_writer")
+@patch("lab_monitor.pipeline.load_network")
+@patch("lab_monitor.pipeline.OverlapEventTracker")
+@patch("lab_monitor.pipeline.FillLevelEstimator")
+@patch("lab_monitor.pipeline.DetectionsWriter")
+def test_process_video_fill_estimation(_, mock_fill, mock_tracker, mock_dino, mock_writer, mock_capture):
+    """
+        Test that the fill estimation stage receives pixel boxes for every frame when a fill log is requested.
+    """
+    mock_cap = MagicMock()
+    mock_cap.read.side_effect = [(True, np.zeros((100, 200, 3), dtype=np.uint8))] * 2 + [(False, None)]
+    mock_cap.get.side_effect = lambda x: {cv2.CAP_PROP_FRAME_COUNT: 2, cv2.CAP_PROP_FPS: 10}[x]
+    mock_capture.return_value = mock_cap
+
+    mock_dino_instance = mock_dino.return_value
+    mock_dino_instance.process_image.return_value = (np.array([[0.5, 0.5, 0.25, 0.5]]), [0.9], ["glass petri dish"])
+    mock_dino_instance.annotate_image.return_value = np.zeros((100, 200, 3), dtype=np.uint8)
+    mock_dino_instance.map_label.return_value = "petri dish"
+
+    process_video("input.mp4", "output.mp4", "log.csv", fill_log_path="fill.csv")
+
+    mock_fill.assert_called_once_with(log_path="fill.csv", fps=10, resume_state=None)
+    assert mock_fill.return_value.update.call_count == 2
+    _, _, pixel_objects = mock_fill.return_value.update.call_args[0]
+    assert [box.tolist() for box in pixel_objects["petri dish"]] == [[75, 25, 125, 75]]
+    mock_fill.return_value.close.assert_called_once()
+
+
+@patch("lab_monitor.pipeline.cv2.VideoCapture")
+@patch("lab_monitor.pipeline.create_video_writer")
+@patch("lab_monitor.pipeline.load_network")
+@patch("lab_monitor.pipeline.OverlapEventTracker")
+@patch("lab_monitor.pipeline.DetectionsWriter")
+def test_process_video_log_only(mock_detections, mock_tracker, mock_dino, mock_writer, mock_capture):
+    """
+        Test that log-only mode skips annotation and encoding but still tracks events and writes detections.
+    """
+    mock_cap = MagicMock()
+    mock_cap.read.side_effect = [(True, np.zeros((100, 200, 3), dtype=np.uint8))] * 2 + [(False, None)]
+    mock_cap.get.side_effect = lambda x: {cv2.CAP_PROP_FRAME_COUNT: 2, cv2.CAP_PROP_FPS: 10}[x]
+    mock_capture.return_value = mock_cap
+    mock_dino.return_value.process_image.return_value = (np.zeros((0, 4)), [], [])
+
+    process_video("input.mp4", "output.mp4", "log.csv", output_mode="log_only", detections_path="det.ndjson")
+
+    mock_writer.assert_not_called()
+    mock_dino.return_value.annotate_image.assert_not_called()
+    assert mock_tracker.return_value.update.call_count == 2
+    mock_detections.assert_called_once_with("det.ndjson", resume_state=None)
+    assert mock_detections.return_value.update.call_count == 2
+    mock_detections.return_value.close.assert_called_once()
+
+
+def test_process_video_rejects_unknown_mode():
+    """
+        Test that an unknown output mode is rejected before any work is done.
+    """
+    with pytest.raises(ValueError, match="output mode"):
+        process_video("input.mp4", "output.mp4", "log.csv", output_mode="thumbnails")
+
+
+@patch("lab_monitor.pipeline.cv2.VideoCapture")
+@patch("lab_monitor.pipeline.load_network")
+@patch("lab_monitor.pipeline.OverlapEventTracker")
+@patch("lab_monitor.pipeline.EventMediaRecorder")
+@patch("lab_monitor.pipeline.DetectionsWriter")
+def test_process_video_event_media(_, mock_media, mock_tracker, mock_dino, mock_capture):
+    """
+        Test that events are marked for the media recorder as well as passed to the event callback,
+        and that every processed frame is offered to the recorder.
+    """
+    mock_cap = MagicMock()
+    mock_cap.read.side_effect = [(True, np.zeros((100, 200, 3), dtype=np.uint8))] * 2 + [(False, None)]
+    mock_cap.get.side_effect = lambda x: {cv2.CAP_PROP_FRAME_COUNT: 2, cv2.CAP_PROP_FPS: 10}[x]
+    mock_capture.return_value = mock_cap
+    mock_dino.return_value.process_image.return_value = (np.zeros((0, 4)), [], [])
+    events = []
+
+    process_video("input.mp4", "output.mp4", "log.csv", output_mode="log_only", event_callback=events.append,
+                  media_dir="media", clip_seconds=2)
+
+    mock_media.assert_called_once_with("media", 10, clip_seconds=2, encoder_settings=None)
+    mock_tracker.call_args.kwargs["on_event"]("event")
+    mock_media.return_value.mark.assert_called_once_with("event")
+    assert events == ["event"]
+    assert mock_media.return_value.update.call_count == 2
+    mock_media.return_value.close.assert_called_once()
+
+
+@patch("lab_monitor.pipeline.cv2.VideoCapture")
+@patch("lab_monitor.pipeline.load_network")
+@patch("lab_monitor.pipeline.OverlapEventTracker")
+@patch("lab_monitor.pipeline.DetectionsWriter")
+def test_process_video_shared_network(_, mock_tracker, mock_dino, mock_capture):
+    """
+        Test that a network passed in, such as a scheduler client, is used instead of loading a model.
+    """
+    mock_cap = MagicMock()
+    mock_cap.read.side_effect = [(True, np.zeros((100, 200, 3), dtype=np.uint8))] * 2 + [(False, None)]
+    mock_cap.get.side_effect = lambda x: {cv2.CAP_PROP_FRAME_COUNT: 2, cv2.CAP_PROP_FPS: 10}[x]
+    mock_capture.return_value = mock_cap
+    network = MagicMock()
+    network.process_image.return_value = (np.zeros((0, 4)), [], [])
+
+    process_video("input.mp4", "output.mp4", "log.csv", output_mode="log_only", network=network)
+
+    mock_dino.assert_not_called()
+    network.load_model.assert_not_called()
+    assert network.process_image.call_count == 2
+    assert mock_tracker.return_value.update.call_count == 2
+
+
+@patch("lab_monitor.pipeline.cv2.VideoCapture")
+@patch("lab_monitor.pipeline.JobCheckpoint")
+@patch("lab_monitor.pipeline.OverlapEventTracker")
+@patch("lab_monitor.pipeline.DetectionsWriter")
+def test_process_video_stops_between_frames(mock_detections, mock_tracker, mock_checkpoint, mock_capture):
+    """
+        Test that a job asked to stop checkpoints at the next frame, closes its files and raises JobStopped,
+        keeping the checkpoint so it can resume.
+    """
+    mock_cap = MagicMock()
+    mock_cap.read.side_effect = [(True, np.zeros((100, 200, 3), dtype=np.uint8))] * 3 + [(False, None)]
+    mock_cap.get.side_effect = lambda x: {cv2.CAP_PROP_FRAME_COUNT: 3, cv2.CAP_PROP_FPS: 10}[x]
+    mock_capture.return_value = mock_cap
+    mock_checkpoint.return_value.load.return_value = None
+    network = MagicMock()
+    network.process_image.return_value = (np.zeros((0, 4)), [], [])
+    network.annotator.class_colors = {}
+
+    with pytest.raises(JobStopped) as stopped:
+        process_video("input.mp4", "output.mp4", "log.csv", output_mode="log_only", checkpoint_path="job.json",
+                      network=network, should_stop=lambda: network.process_image.call_count >= 1)
+
+    assert stopped.value.frame_number == 1
+    assert network.process_image.call_count == 1
+    assert mock_checkpoint.return_value.save.call_args.args[0]["frame_number"] == 1
+    mock_checkpoint.return_value.delete.assert_not_called()
+    mock_tracker.return_value.close.assert_called_once()
+    mock_detections.return_value.close.assert_called_once()
+    mock_cap.release.assert_called_once()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+    test_regression.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the speed against accuracy harness. The harness runs on a stub model, and on
+        GroundingDINO when its weights are available.
+
+    Change History:
+        0.1: Created.
+        0.2: Candidates set the model's input size.
+"""
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pytest
+from lab_monitor.regression import Candidate, evaluate, iou_matrix, load_corpus, record_goldens, score
+
+SAMPLE_DIRS = [str(Path(__file__).resolve().parents[1] / "samples" / name) for name in ("raw", "corrected")]
+WEIGHTS = os.environ.get("LAB_MONITOR_WEIGHTS", "weights/groundingdino_swint_ogc.pth")
+
+
+class _StubNetwork:
+    """
+        Detects one centred box per frame, scored by the frame's brightness and labelled by its dominant channel.
+        Records the input size of every call.
+    """
+    def __init__(self):
+        self.input_size = 800
+        self.sizes = []
+
+    def process_image(self, image, box_threshold=0.35, text_threshold=0.25):  # pylint: disable=W0613
+        """
+            Detects the box if its score passes the threshold.
+        """
+        self.sizes.append(self.input_size)
+        score = float(image.mean()) / 255.0
+        if score <= box_threshold:
+            return np.zeros((0, 4)), np.zeros(0), []
+        label = ("blue", "green", "red")[int(np.argmax(image.reshape(-1, 3).mean(axis=0)))]
+        return np.array([[0.5, 0.5, 0.4, 0.4]]), np.array([score]), [label]
+
+    def process_batch(self, images, box_threshold=0.35, text_threshold=0.25):
+        """
+            Detects each frame in turn.
+        """
+        return [self.process_image(image, box_threshold, text_threshold) for image in images]
+
+    def map_label(self, phrase):
+        """
+            Labels are already grouped.
+        """
+        return phrase
+
+
+def _corpus():
+    """
+        Frames of increasing brightness.
+    """
+    return {f"synthetic/{value}.png": np.full((40, 60, 3), (value, value // 2, value // 4), dtype=np.uint8)
+            for value in (60, 120, 180, 240)}
+
+
+def test_candidate_parse():
+    """
+        Tests that candidates are parsed from the command line form.
+    """
+    candidate = Candidate.parse("small:input_size=400,batch_size=4")
+    assert candidate.name == "small"
+    assert candidate.config() == {"input_size": 400, "box_threshold": 0.35, "text_threshold": 0.25, "batch_size": 4}
+    with pytest.raises(ValueError):
+        Candidate.parse("fast:quantize=1")
+
+
+def test_iou_matrix():
+    """
+        Tests IoU of normalised centre format boxes.
+    """
+    ious = iou_matrix([[0.5, 0.5, 0.2, 0.2]], [[0.5, 0.5, 0.2, 0.2], [0.6, 0.5, 0.2, 0.2], [0.9, 0.9, 0.1, 0.1]])
+    assert ious[0] == pytest.approx([1.0, 1 / 3, 0.0])
+
+
+def test_score_counts_missed_extra_and_relabelled_boxes():
+    """
+        Tests box recall, precision and label agreement over several frames.
+    """
+    goldens = {"a": {"boxes": [[0.5, 0.5, 0.2, 0.2], [0.2, 0.2, 0.1, 0.1]], "labels": ["hand", "bottle"]},
+               "b": {"boxes": [[0.5, 0.5, 0.2, 0.2]], "labels": ["hand"]}}
+    records = {"a": {"boxes": [[0.5, 0.5, 0.2, 0.2]], "labels": ["hand"]},
+               "b": {"boxes": [[0.5, 0.5, 0.2, 0.2], [0.8, 0.8, 0.1, 0.1]], "labels": ["bottle", "hand"]}}
+    assert score(goldens, records) == {"box_recall": 0.6667, "box_precision": 0.6667, "label_agreement": 0.5}
+
+
+def test_report_against_goldens(tmp_path):
+    """
+        Tests that candidates are reported with speed and accuracy against the baseline goldens.
+    """
+    network, corpus = _StubNetwork(), _corpus()
+    goldens = record_goldens(network, corpus, str(tmp_path / "goldens.json"))
+    assert len(goldens["images"]) == 4
+
+    network.sizes.clear()
+    candidates = [Candidate("baseline"), Candidate("small", input_size=400, batch_size=2),
+                  Candidate("strict", box_threshold=0.5)]
+    report = evaluate(network, corpus, goldens, candidates, str(tmp_path / "report.json"))
+
+    with open(tmp_path / "report.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == report
+    results = {result["name"]: result for result in report["candidates"]}
+    assert report["frames"] == 4
+    # Each candidate warms up on its first batch then runs the corpus, the small candidate at its own input size
+    assert network.sizes == [800] * 5 + [400] * 6 + [800] * 5
+    assert network.input_size == 800
+    assert results["baseline"]["box_recall"] == results["small"]["box_recall"] == 1.0
+    assert results["strict"]["box_recall"] == 0.5
+    assert results["strict"]["box_precision"] == 1.0
+    for result in results.values():
+        assert result["latency_ms_p95"] >= result["latency_ms_p50"] >= 0
+        assert result["label_agreement"] == 1.0
+
+
+def test_sample_corpus_with_stub():
+    """
+        Tests that the bundled sample frames load and run through the harness.
+    """
+    corpus = load_corpus(SAMPLE_DIRS)
+    assert len(corpus) == 30
+    assert "raw/cal.png" in corpus and "corrected/cal.png" in corpus
+    goldens = {"images": {name: {"boxes": [], "labels": []} for name in corpus}}
+    report = evaluate(_StubNetwork(), corpus, goldens, [Candidate("baseline")])
+    assert report["candidates"][0]["throughput_fps"] > 0
+
+
+@pytest.mark.skipif(not os.path.exists(WEIGHTS), reason="GroundingDINO weights not available")
+def test_sample_corpus_with_model(tmp_path):
+    """
+        Tests the baseline against its own goldens, and a lower resolution candidate, with the real model.
+    """
+    dino_functions = pytest.importorskip("lab_monitor.dino_functions")
+    network = dino_functions.DinoProcess()
+    network.load_model(model_checkpoint_path=WEIGHTS)
+    corpus = load_corpus(SAMPLE_DIRS)
+    goldens = record_goldens(network, corpus, str(tmp_path / "goldens.json"))
+
+    report = evaluate(network, corpus, goldens, [Candidate("baseline"), Candidate("small", input_size=400)])
+
+    baseline, small = report["candidates"]
+    assert baseline["box_recall"] == baseline["box_precision"] == 1.0
+    assert 0.0 <= small["box_recall"] <= 1.0
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+    test_render.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.3
+
+    Description:
+        Tests for on demand rendering of annotated time ranges.
+
+    Change History:
+        0.1: Created.
+        0.2: Added test for renders left by a previous run.
+        0.3: Added concurrent and failed render tests.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import time
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pytest
+from lab_monitor.detections import DetectionsWriter
+from lab_monitor.render import RenderCache, render_range
+from lab_monitor.video_writers import OpenCVVideoWriter
+
+FRAMES = 30
+FPS = 10.0
+SHAPE = (48, 64, 3)
+
+
+@pytest.fixture(name="job")
+def fixture_job(tmp_path):
+    """
+        Writes a short video whose frame brightness encodes the frame number, and a detections sidecar
+        with a box on frames 14 and 15 only.
+    """
+    video_path = tmp_path / "input.mp4"
+    writer = OpenCVVideoWriter(str(video_path), FPS, (SHAPE[1], SHAPE[0]))
+    for index in range(FRAMES):
+        writer.write(np.full(SHAPE, index * 8, dtype=np.uint8))
+    writer.release()
+
+    detections_path = tmp_path / "log_detections.ndjson"
+    detections = DetectionsWriter(str(detections_path))
+    for index in range(FRAMES):
+        if index in (14, 15):
+            detections.update(index, [[0.5, 0.5, 0.5, 0.5]], [0.9], ["bottle"])
+        else:
+            detections.update(index, np.zeros((0, 4)), [], [])
+    detections.close()
+    return str(video_path), str(detections_path)
+
+
+@patch("lab_monitor.render.create_video_writer")
+def test_render_range_annotates_requested_frames(mock_writer, job, tmp_path):
+    """
+        Tests that only the frames in the range are rendered and the detections are drawn on the right frames.
+    """
+    frames = []
+    mock_writer.return_value.write.side_effect = lambda frame: frames.append(frame.copy())
+
+    render_range(*job, str(tmp_path / "range.mp4"), start_time=1.2, end_time=2.0,
+                 index_path=str(tmp_path / "index.json"), encoder_settings={"backend": "opencv"})
+
+    assert mock_writer.call_args.kwargs == {"backend": "opencv", "threaded": False}
+    assert len(frames) == 8
+    centres = [int(frame[SHAPE[0] // 2, SHAPE[1] // 2, 0]) for frame in frames]
+    assert centres == sorted(centres)
+    # The box edge is drawn in the first palette colour on frames 14 and 15 only
+    annotated = [bool((frame == (230, 25, 75)).all(axis=2).any()) for frame in frames]
+    assert annotated == [False, False, True, True, False, False, False, False]
+    mock_writer.return_value.release.assert_called_once()
+
+
+def test_render_range_rejects_empty_range(job, tmp_path):
+    """
+        Tests that a range without frames is rejected.
+    """
+    with pytest.raises(ValueError, match="no frames"):
+        render_range(*job, str(tmp_path / "range.mp4"), start_time=10, end_time=12)
+
+
+def test_cache_reuses_and_evicts(tmp_path):
+    """
+        Tests that a cached range is not rendered again and the least recently used render is deleted.
+    """
+    cache = RenderCache(tmp_path, max_entries=2)
+    render = MagicMock(side_effect=lambda path: open(path, "wb").close())
+
+    first = cache.get(("job", 0, 10), render)
+    assert cache.get(("job", 0, 10), render) == first
+    assert render.call_count == 1
+
+    second = cache.get(("job", 10, 20), render)
+    cache.get(("job", 0, 10), render)
+    cache.get(("job", 20, 30), render)
+
+    assert render.call_count == 3
+    assert not (tmp_path / second).exists() and (tmp_path / first).exists()
+
+
+def test_cache_clears_renders_from_previous_run(tmp_path):
+    """
+        Tests that renders left in the directory by a previous run, which the cache cannot track, are deleted.
+    """
+    (tmp_path / "job_0_10.mp4").write_bytes(b"old")
+    (tmp_path / "job_0_10.mp4.tmp.mp4").write_bytes(b"partial")
+    (tmp_path / "notes.txt").write_text("kept")
+
+    RenderCache(tmp_path)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["notes.txt"]
+
+
+def test_cache_renders_concurrent_requests_once(tmp_path):
+    """
+        Tests that concurrent requests for the same range share a single render.
+    """
+    cache = RenderCache(tmp_path)
+
+    def slow_render(path):
+        time.sleep(0.05)
+        with open(path, "wb") as f:
+            f.write(b"video")
+
+    render = MagicMock(side_effect=slow_render)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        paths = list(pool.map(lambda _: cache.get(("job", 0, 10), render), range(4)))
+
+    assert render.call_count == 1
+    assert len(set(paths)) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["job_0_10.mp4"]
+
+
+def test_cache_removes_failed_render(tmp_path):
+    """
+        Tests that a render that raises leaves no partial file and is retried on the next request.
+    """
+    cache = RenderCache(tmp_path)
+
+    def render(path):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise RuntimeError("encoding failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get(("job", 0, 10), render)
+    assert not list(tmp_path.iterdir())
+
+    cache.get(("job", 0, 10), lambda path: open(path, "wb").close())
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["job_0_10.mp4"]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+    test_resources.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the CPU budgets of jobs and the shared model.
+
+    Change History:
+        0.1: Created.
+"""
+import threading
+from unittest.mock import MagicMock
+from lab_monitor import resources
+from lab_monitor.resources import ResourceManager, allocate
+
+
+def test_allocate_splits_cores():
+    """
+        Tests that jobs get a share of the cores each and the model the rest.
+    """
+    cores = list(range(16))
+    budgets, inference = allocate(cores, 2, job_share=0.25)
+    assert [budget.cores for budget in budgets] == [[0, 1], [2, 3]]
+    assert (inference.threads, inference.cores) == (12, list(range(4, 16)))
+
+    budgets, inference = allocate(cores, 0)
+    assert budgets == [] and inference.threads == 16
+
+    budgets, inference = allocate(list(range(4)), 6)
+    assert all(budget.threads == 1 for budget in budgets)
+    assert [budget.cores[0] for budget in budgets] == [0, 1, 2, 3, 0, 1]
+    assert (inference.threads, inference.cores) == (1, [0, 1, 2, 3])
+
+    budgets, inference = allocate(cores, 3, inference=False)
+    assert inference is None and [budget.threads for budget in budgets] == [5, 5, 5]
+
+
+def test_budgets_rebalance_as_jobs_start_and_finish(monkeypatch):
+    """
+        Tests that OpenCV and the model's threads follow the number of running jobs.
+    """
+    set_num_threads = MagicMock()
+    monkeypatch.setattr(resources.cv2, "setNumThreads", set_num_threads)
+    scheduler = MagicMock()
+    manager = ResourceManager(scheduler, cores=range(8), job_share=0.5)
+
+    with manager.job("a") as budget:
+        assert budget.threads == 4
+        scheduler.set_num_threads.assert_called_with(4, None)
+        started = threading.Event()
+        finish = threading.Event()
+
+        def other():
+            with manager.job("b"):
+                started.set()
+                finish.wait(5)
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        assert started.wait(5)
+        assert set_num_threads.call_args.args == (2,)
+        assert manager.usage()["jobs"] == {"a": {"threads": 2, "cores": [0, 1]}, "b": {"threads": 2, "cores": [2, 3]}}
+        assert manager.usage()["inference"]["threads"] == 4
+        finish.set()
+        thread.join()
+        assert set_num_threads.call_args.args == (4,)
+
+    assert set_num_threads.call_args.args == (-1,)
+    scheduler.set_num_threads.assert_called_with(8, None)
+    assert manager.usage()["jobs"] == {}
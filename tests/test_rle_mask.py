@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+    test_rle_mask.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for run-length encoded masks.
+
+    Change History:
+        0.1: Created.
+"""
+import numpy as np
+import pytest
+from lab_monitor.rle_mask import RLEMask
+
+
+@pytest.fixture
+def random_masks():
+    """
+        Creates a pair of random dense masks with blobby structure.
+    Returns:
+        tuple: Two boolean arrays of shape (40, 50).
+    """
+    rng = np.random.default_rng(0)
+    mask1 = rng.random((40, 50)) > 0.6
+    mask2 = rng.random((40, 50)) > 0.4
+    return mask1, mask2
+
+
+def test_round_trip(random_masks):
+    """
+        Tests that encoding then decoding returns the original mask.
+    """
+    mask, _ = random_masks
+    rle = RLEMask.from_dense(mask)
+
+    assert np.array_equal(rle.to_dense(), mask)
+    assert rle.area == int(mask.sum())
+    assert np.array_equal(RLEMask.from_dict(rle.to_dict()).to_dense(), mask)
+
+
+def test_intersection_area_matches_dense(random_masks):
+    """
+        Tests that run based intersection agrees with dense logical and.
+    """
+    mask1, mask2 = random_masks
+    rle1 = RLEMask.from_dense(mask1)
+    rle2 = RLEMask.from_dense(mask2)
+
+    assert rle1.intersection_area(rle2) == int(np.logical_and(mask1, mask2).sum())
+    assert rle2.intersection_area(rle1) == rle1.intersection_area(rle2)
+
+
+@pytest.mark.parametrize("y1, y2, x1, x2", [
+    (5, 10, 3, 7),
+    (0, 1, 0, 50),
+    (3, 8, 0, 50),
+    (20, 21, 49, 50),
+])
+def test_bbox(y1, y2, x1, x2):
+    """
+        Tests bounding boxes for single row, full width and wrapped runs.
+    """
+    mask = np.zeros((40, 50), dtype=bool)
+    mask[y1:y2, x1:x2] = True
+
+    assert RLEMask.from_dense(mask).bbox() == (x1, y1, x2, y2)
+
+
+def test_empty_mask():
+    """
+        Tests that an empty mask has no area, no bbox and intersects nothing.
+    """
+    empty = RLEMask.from_dense(np.zeros((10, 10), dtype=bool))
+    full = RLEMask.from_dense(np.ones((10, 10), dtype=bool))
+
+    assert empty.area == 0
+    assert empty.bbox() is None
+    assert empty.intersection_area(full) == 0
+    assert not empty.intersects(full)
+
+
+def test_intersects_with_touching_boxes():
+    """
+        Tests that masks whose boxes overlap but whose pixels do not are not intersecting.
+    """
+    mask1 = np.zeros((20, 20), dtype=bool)
+    mask2 = np.zeros((20, 20), dtype=bool)
+    mask1[np.arange(20), np.arange(20)] = True
+    mask2[np.arange(19), np.arange(1, 20)] = True
+
+    assert not RLEMask.from_dense(mask1).intersects(RLEMask.from_dense(mask2))
+    with pytest.raises(ValueError):
+        RLEMask.from_dense(mask1).intersection_area(RLEMask.from_dense(np.zeros((5, 5))))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+    test_storage.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the storage budget manager.
+
+    Change History:
+        0.1: Created.
+        0.2: Added job subdirectory and per-job usage tests.
+"""
+import os
+import time
+from lab_monitor.storage import StorageBudget, StorageManager, job_id_of
+
+
+def _artifact(directory, name, size, age):
+    """
+        Writes an artifact last used age seconds ago.
+    """
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    used = time.time() - age
+    os.utime(path, (used, used))
+    return path
+
+
+def test_job_id_of(tmp_path):
+    """
+        Tests that artifacts are matched to their job by file name.
+    """
+    assert job_id_of(tmp_path / "abc-1.mp4") == "abc-1"
+    assert job_id_of(tmp_path / "abc-1_fill.csv") == "abc-1"
+    assert job_id_of(tmp_path / "abc-1.index.json") == "abc-1"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    """
+        Tests that the least recently used artifacts are evicted first, where downloading counts as use.
+    """
+    old = _artifact(tmp_path, "a.mp4", 40, 300)
+    downloaded = _artifact(tmp_path, "b.mp4", 40, 200)
+    new = _artifact(tmp_path, "c.mp4", 40, 100)
+    manager = StorageManager({tmp_path: StorageBudget(max_bytes=100)})
+    manager.touch(downloaded)
+
+    assert manager.evict() == [old]
+    assert downloaded.exists() and new.exists()
+    assert manager.usage()["directories"][tmp_path.name]["bytes"] == 80
+
+
+def test_evicts_expired_but_not_active(tmp_path):
+    """
+        Tests that artifacts past the age budget are evicted unless their job is active or pinned.
+    """
+    running = _artifact(tmp_path, "run.mp4", 10, 1000)
+    uploading = _artifact(tmp_path, "up.mp4", 10, 1000)
+    expired = _artifact(tmp_path, "old_fill.csv", 10, 1000)
+    fresh = _artifact(tmp_path, "new.mp4", 10, 0)
+    manager = StorageManager({tmp_path: StorageBudget(max_age_seconds=500)}, active_jobs=lambda: ["run"])
+
+    with manager.pinned_job("up"):
+        assert manager.evict() == [expired]
+    assert running.exists() and uploading.exists() and fresh.exists()
+    assert manager.evict() == [uploading]
+
+
+def test_has_room(tmp_path):
+    """
+        Tests that room is made by evicting, and refused when active artifacts fill the budget.
+    """
+    _artifact(tmp_path, "done.mp4", 60, 100)
+    _artifact(tmp_path, "run.mp4", 30, 100)
+    manager = StorageManager({tmp_path: StorageBudget(max_bytes=100)}, active_jobs=lambda: ["run"])
+
+    assert not manager.has_room(tmp_path, 101)
+    assert manager.has_room(tmp_path, 60)
+    assert not (tmp_path / "done.mp4").exists()
+    assert not manager.has_room(tmp_path, 80)
+    assert not StorageManager({tmp_path: StorageBudget()}, min_free_bytes=1 << 62).has_room(tmp_path, 1)
+
+
+def test_job_subdirectories_are_artifacts(tmp_path):
+    """
+        Tests that a job's subdirectory is sized and evicted as one artifact, last used by its newest file.
+    """
+    media, outputs = tmp_path / "media", tmp_path / "outputs"
+    for directory in (media, outputs, media / "old", media / "new"):
+        directory.mkdir()
+    for name in ("1.jpg", "2.jpg"):
+        _artifact(media / "old", name, 30, 1000)
+    _artifact(media / "new", "1.jpg", 30, 1000)
+    _artifact(media / "new", "2.jpg", 30, 0)
+    _artifact(outputs, "new.mp4", 50, 0)
+    os.utime(media / "old", (time.time() - 1000,) * 2)
+    manager = StorageManager({media: StorageBudget(max_age_seconds=500), outputs: StorageBudget()})
+
+    assert manager.usage()["directories"]["media"] == {"bytes": 120, "files": 2, "max_bytes": None,
+                                                       "max_age_seconds": 500}
+    assert manager.evict() == [media / "old"]
+    assert not (media / "old").exists()
+    assert manager.job_usage("new") == {"media": 60, "outputs": 50}
+    assert manager.job_usage("old") == {}
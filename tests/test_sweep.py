@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+    test_sweep.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.1
+
+    Description:
+        Tests for the threshold and rules sweep, on synthetic recordings.
+
+    Change History:
+        0.1: Created.
+"""
+from unittest.mock import MagicMock, patch
+import cv2
+import numpy as np
+from lab_monitor.sweep import Recording, agreement, decode_phrase, record_video, sweep
+
+TOKENS = ["[CLS]", "hand", ",", "glass", "bottle", "[SEP]"]
+GROUP_MAP = {"hand": "hand", "glass bottle": "bottle"}
+HAND = (0.1, 0.1, 0.5, 0.5)
+BOTTLE = (0.4, 0.4, 0.8, 0.8)
+
+
+def _recording():
+    """
+        A hand in every frame, touched by a weakly detected bottle in frames 5 to 9 and a strongly
+        detected one in frames 12 to 14.
+    """
+    frames, boxes, scores = [], [], []
+    for frame in range(20):
+        frames.append(frame)
+        boxes.append(HAND)
+        scores.append([0, 0.9, 0, 0, 0, 0])
+        if 5 <= frame <= 9 or 12 <= frame <= 14:
+            score = 0.3 if frame <= 9 else 0.6
+            frames.append(frame)
+            boxes.append(BOTTLE)
+            scores.append([0, 0, 0, score, score, 0])
+    return Recording(frames, boxes, scores, TOKENS, {"fps": 10.0, "frame_count": 20, "min_box_threshold": 0.1,
+                                                     "group_map": GROUP_MAP})
+
+
+def test_decode_phrase():
+    """
+        Tests that phrases are rebuilt from WordPiece tokens without the [CLS] token or full stops.
+    """
+    tokens = ["[CLS]", "petri", "dish", "##es", ".", "hand"]
+    assert decode_phrase(tokens, [True, True, True, True, True, False]) == "petri dishes"
+    assert decode_phrase(tokens, [False, False, False, False, False, True]) == "hand"
+    assert decode_phrase(tokens, [False] * 6) == ""
+
+
+def test_labels_per_text_threshold():
+    """
+        Tests that labels are decoded and mapped for each text threshold.
+    """
+    recording = _recording()
+    assert set(recording.labels(0.2)) == {"hand", "bottle"}
+    labels = recording.labels(0.4)
+    assert set(labels[recording.scores < 0.4]) == {""}
+    assert set(labels[recording.scores >= 0.4]) == {"hand", "bottle"}
+
+
+def test_agreement():
+    """
+        Tests that events match reference events of the same action within the tolerance.
+    """
+    reference = [(10, 1.0, "a"), (20, 2.0, "b")]
+    assert agreement([(11, 1.1, "a"), (30, 3.0, "b")], reference, tolerance=0.5) == {
+        "events": 2, "reference": 2, "matched": 1, "precision": 0.5, "recall": 0.5, "f1": 0.5}
+    assert agreement([], reference)["f1"] == 0.0
+
+
+def test_sweep_table(tmp_path):
+    """
+        Tests that every configuration is replayed from the one recording and ranked by agreement.
+    """
+    recording_path = str(tmp_path / "recording.npz")
+    _recording().save(recording_path)
+    reference_path = tmp_path / "reference.csv"
+    reference_path.write_text("frame,timestamp,action\n12,1.200,hand touches bottle\n15,1.500,hand releases bottle\n",
+                              encoding="utf-8")
+
+    rows = sweep(recording_path, str(reference_path), [0.2, 0.4], [0.2, 0.4], workers=0)
+
+    table = {(row["box_threshold"], row["text_threshold"]): row for row in rows}
+    assert len(rows) == 4
+    assert table[(0.2, 0.2)]["events"] == 4
+    assert table[(0.2, 0.2)]["f1"] == 0.6667
+    for config in ((0.4, 0.2), (0.2, 0.4), (0.4, 0.4)):
+        assert table[config]["events"] == 2
+        assert table[config]["f1"] == 1.0
+    assert rows[-1] is table[(0.2, 0.2)]
+
+
+@patch("lab_monitor.sweep.load_transform")
+@patch("lab_monitor.sweep.cv2.VideoCapture")
+def test_record_video(mock_capture, mock_transform, tmp_path):
+    """
+        Tests that recording runs the model in batches and saves each frame's boxes.
+    """
+    cap = MagicMock()
+    cap.read.side_effect = [(True, np.full((4, 4, 3), i, dtype=np.uint8)) for i in range(3)] + [(False, None)]
+    cap.get.side_effect = lambda prop: {cv2.CAP_PROP_FPS: 10.0, cv2.CAP_PROP_FRAME_COUNT: 3}[prop]
+    mock_capture.return_value = cap
+    mock_transform.return_value.apply.side_effect = lambda frame: frame
+    network = MagicMock(GROUP_MAP=GROUP_MAP)
+    network.process_raw.side_effect = lambda images, box_threshold: (
+        [(np.array([HAND] * int(image[0, 0, 0])), np.full((int(image[0, 0, 0]), len(TOKENS)), 0.5))
+         for image in images], TOKENS)
+
+    record_video("video.mp4", str(tmp_path / "recording.npz"), network=network, batch_size=2)
+
+    recording = Recording.load(str(tmp_path / "recording.npz"))
+    assert network.process_raw.call_count == 2
+    assert recording.frames.tolist() == [1, 2, 2]
+    assert recording.tokens == TOKENS
+    assert recording.meta["frame_count"] == 3
+    assert recording.meta["group_map"] == GROUP_MAP
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""
+    test_video_index.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.2
+
+    Description:
+        Tests for the keyframe index and time window processing.
+
+    Change History:
+        0.1: Created.
+        0.2: Added variable frame rate seek test.
+"""
+from fractions import Fraction
+from unittest.mock import patch
+import cv2
+import numpy as np
+import pytest
+import torch
+from lab_monitor.pipeline import process_video
+from lab_monitor.video_index import VideoIndex
+from lab_monitor.video_writers import OpenCVVideoWriter
+
+FRAMES = 30
+FPS = 10.0
+SHAPE = (48, 64, 3)
+# Milliseconds between frames of the variable frame rate video, bursts and pauses
+VFR_GAPS = (20, 20, 20, 150)
+
+
+class _StubNetwork:
+    """
+        Records the brightness of every frame it is given, which identifies the frame.
+    """
+    instances = []
+
+    def __init__(self):
+        self.seen = []
+        _StubNetwork.instances.append(self)
+
+    def load_model(self):
+        """
+            Nothing to load.
+        """
+
+    def process_image(self, image):
+        """
+            Records the frame and returns no detections.
+        """
+        self.seen.append(int(image[SHAPE[0] // 2, SHAPE[1] // 2, 0]))
+        return torch.zeros((0, 4)), torch.zeros(0), []
+
+    def map_label(self, phrase):
+        """
+            Returns the phrase unchanged.
+        """
+        return phrase
+
+
+@pytest.fixture(name="video_path")
+def fixture_video_path(tmp_path):
+    """
+        Writes a short test video whose frame brightness encodes the frame number.
+    """
+    path = tmp_path / "input.mp4"
+    writer = OpenCVVideoWriter(str(path), FPS, (SHAPE[1], SHAPE[0]))
+    for index in range(FRAMES):
+        writer.write(np.full(SHAPE, index * 8, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+@pytest.fixture(name="vfr_video_path")
+def fixture_vfr_video_path(tmp_path):
+    """
+        Writes a variable frame rate video whose frame brightness encodes the frame number.
+    """
+    av = pytest.importorskip("av")
+    path = tmp_path / "vfr.mp4"
+    container = av.open(str(path), mode="w")
+    stream = container.add_stream("libx264", rate=30)
+    stream.width, stream.height = SHAPE[1], SHAPE[0]
+    stream.pix_fmt = "yuv420p"
+    stream.codec_context.time_base = Fraction(1, 1000)
+    stream.options = {"g": "12", "bf": "0"}
+    pts = 0
+    for index in range(60):
+        frame = av.VideoFrame.from_ndarray(np.full(SHAPE, index * 4, dtype=np.uint8), format="bgr24")
+        frame.pts = pts
+        frame.time_base = Fraction(1, 1000)
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        pts += VFR_GAPS[index % len(VFR_GAPS)]
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+    return str(path)
+
+
+def test_build_records_every_frame(video_path, tmp_path):
+    """
+        Tests that the index has the exact frame count and timestamps, and survives a save and load.
+    """
+    index = VideoIndex.build(video_path)
+
+    assert index.frame_count == FRAMES
+    assert index.keyframes[0] == 0
+    np.testing.assert_allclose(index.timestamps, np.arange(FRAMES) / FPS)
+
+    path = str(tmp_path / "index.json")
+    index.save(path)
+    loaded = VideoIndex.load(path)
+    assert loaded.frame_count == FRAMES
+    assert loaded.keyframes == index.keyframes
+    assert loaded.fps == pytest.approx(FPS)
+
+
+def test_time_lookups():
+    """
+        Tests time to frame conversion and keyframe lookup on a variable frame rate index.
+    """
+    index = VideoIndex([0.0, 0.1, 0.15, 0.4, 0.5, 0.9], keyframes=[0, 3], fps=10.0)
+
+    assert index.frame_at_time(0.15) == 2
+    assert index.frame_at_time(0.2) == 3
+    assert index.frame_at_time(5.0) == 6
+    assert index.frame_range(0.1, 0.5) == (1, 4)
+    assert index.frame_range() == (0, 6)
+    assert index.nearest_keyframe(2) == 0
+    assert index.nearest_keyframe(5) == 3
+
+
+def test_seek_matches_sequential_decode(video_path):
+    """
+        Tests that seeking to a frame returns the same image as decoding up to it.
+    """
+    index = VideoIndex.build(video_path)
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    ret, frame = cap.read()
+    while ret:
+        frames.append(frame)
+        ret, frame = cap.read()
+
+    for target in (0, 7, 18, FRAMES - 1):
+        index.seek(cap, target)
+        ret, frame = cap.read()
+        assert ret
+        np.testing.assert_array_equal(frame, frames[target])
+    cap.release()
+
+
+def test_seek_is_frame_exact_on_variable_frame_rate(vfr_video_path):
+    """
+        Tests that seeking to every frame of a variable frame rate video returns that frame.
+    """
+    index = VideoIndex.build(vfr_video_path)
+    cap = cv2.VideoCapture(vfr_video_path)
+    frames = []
+    ret, frame = cap.read()
+    while ret:
+        frames.append(frame)
+        ret, frame = cap.read()
+    assert index.frame_count == len(frames) == 60
+    assert len(index.keyframes) > 1
+
+    for target in reversed(range(len(frames))):
+        index.seek(cap, target)
+        ret, frame = cap.read()
+        assert ret
+        np.testing.assert_array_equal(frame, frames[target])
+    cap.release()
+
+
+@patch("lab_monitor.pipeline.load_network", _StubNetwork)
+def test_process_time_window(video_path, tmp_path):
+    """
+        Tests that only the frames in the requested window are processed and progress reaches 100.
+    """
+    progress = []
+    index_path = tmp_path / "index.json"
+    process_video(video_path, str(tmp_path / "out.mp4"), str(tmp_path / "log.csv"),
+                  progress_callback=progress.append, output_mode="log_only",
+                  index_path=str(index_path), start_time=1.2, end_time=2.0)
+
+    cap = cv2.VideoCapture(video_path)
+    brightness = []
+    ret, frame = cap.read()
+    while ret:
+        brightness.append(int(frame[SHAPE[0] // 2, SHAPE[1] // 2, 0]))
+        ret, frame = cap.read()
+    cap.release()
+
+    assert _StubNetwork.instances[-1].seen == brightness[12:20]
+    assert progress[-1] == 100
+    assert index_path.exists()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+    test_video_writers.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.3
+
+    Description:
+        Tests for the video writer backends.
+
+    Change History:
+        0.1: Created.
+        0.2: Added segmented writer tests.
+        0.3: Added encoder setting validation and odd frame size tests.
+"""
+import importlib.util
+import shutil
+from unittest.mock import MagicMock, patch
+import cv2
+import numpy as np
+import pytest
+from lab_monitor.video_writers import (FFmpegVideoWriter, OpenCVVideoWriter, PyAVVideoWriter, SegmentedVideoWriter,
+                                       ThreadedVideoWriter, create_video_writer, resolve_backend,
+                                       validate_encoder_settings)
+
+
+def _count_frames(path):
+    """
+        Counts the frames in a video file by decoding it.
+    """
+    cap = cv2.VideoCapture(str(path))
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+
+def test_opencv_writer_writes_file(tmp_path):
+    """
+        Tests that the OpenCV fallback produces a readable video.
+    """
+    path = tmp_path / "out.mp4"
+    writer = OpenCVVideoWriter(str(path), 10.0, (64, 48))
+    for value in range(5):
+        writer.write(np.full((48, 64, 3), value * 40, dtype=np.uint8))
+    writer.release()
+
+    assert _count_frames(path) == 5
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_ffmpeg_writer_writes_file(tmp_path):
+    """
+        Tests that frames piped to ffmpeg produce a readable video.
+    """
+    path = tmp_path / "out.mp4"
+    writer = FFmpegVideoWriter(str(path), 10.0, (64, 48), preset="ultrafast")
+    for value in range(5):
+        writer.write(np.full((48, 64, 3), value * 40, dtype=np.uint8))
+    writer.release()
+
+    assert _count_frames(path) == 5
+
+
+@pytest.mark.skipif(importlib.util.find_spec("av") is None, reason="PyAV not installed")
+def test_pyav_writer_pads_odd_frame_size(tmp_path):
+    """
+        Tests that PyAV encodes frames with odd dimensions by padding them to even.
+    """
+    path = tmp_path / "out.mp4"
+    writer = PyAVVideoWriter(str(path), 10.0, (63, 47), preset="ultrafast")
+    for value in range(5):
+        writer.write(np.full((47, 63, 3), value * 40, dtype=np.uint8))
+    writer.release()
+
+    cap = cv2.VideoCapture(str(path))
+    assert (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (64, 48)
+    cap.release()
+    assert _count_frames(path) == 5
+
+
+@patch("lab_monitor.video_writers.subprocess.Popen")
+def test_ffmpeg_writer_command(mock_popen):
+    """
+        Tests the ffmpeg command line and that mismatched frames are rejected.
+    """
+    writer = FFmpegVideoWriter("out.mp4", 30.0, (64, 48), codec="libx265", crf=28, preset="fast")
+    command = mock_popen.call_args[0][0]
+
+    assert command[command.index("-s") + 1] == "64x48"
+    assert command[command.index("-c:v") + 1] == "libx265"
+    assert command[command.index("-crf") + 1] == "28"
+    assert command[command.index("-preset") + 1] == "fast"
+    assert command[command.index("-vf") + 1] == "pad=ceil(iw/2)*2:ceil(ih/2)*2"
+    assert command[-1] == "out.mp4"
+    with pytest.raises(ValueError):
+        writer.write(np.zeros((10, 10, 3), dtype=np.uint8))
+
+
+def test_threaded_writer_writes_in_order_and_calls_back():
+    """
+        Tests that the threaded writer forwards every frame in order and signals completion.
+    """
+    inner = MagicMock()
+    done = []
+    writer = ThreadedVideoWriter(inner, max_queue=2)
+    frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(6)]
+    for i, frame in enumerate(frames):
+        writer.write(frame, on_done=lambda i=i: done.append(i))
+    writer.release()
+
+    assert [call.args[0][0, 0, 0] for call in inner.write.call_args_list] == list(range(6))
+    assert done == list(range(6))
+    inner.release.assert_called_once()
+
+
+def test_threaded_writer_reports_errors():
+    """
+        Tests that an encoding failure on the writer thread is raised to the caller.
+    """
+    inner = MagicMock()
+    inner.write.side_effect = OSError("disk full")
+    writer = ThreadedVideoWriter(inner)
+    writer.write(np.zeros((4, 4, 3), dtype=np.uint8))
+
+    with pytest.raises(RuntimeError, match="encoding failed"):
+        writer.release()
+
+
+@patch("lab_monitor.video_writers.importlib.util.find_spec", return_value=None)
+@patch("lab_monitor.video_writers.shutil.which")
+def test_resolve_backend(mock_which, _mock_find_spec):
+    """
+        Tests backend selection and validation.
+    """
+    mock_which.return_value = "/usr/bin/ffmpeg"
+    assert resolve_backend("auto") == "ffmpeg"
+    mock_which.return_value = None
+    assert resolve_backend("auto") == "opencv"
+    assert resolve_backend("pyav") == "pyav"
+    with pytest.raises(ValueError):
+        resolve_backend("gstreamer")
+
+
+def test_validate_encoder_settings():
+    """
+        Tests that unknown codecs and presets and out of range crf values are rejected.
+    """
+    validate_encoder_settings("libx265", 0, "veryslow")
+    with pytest.raises(ValueError, match="codec"):
+        validate_encoder_settings("rawvideo", 23, "veryfast")
+    with pytest.raises(ValueError, match="crf"):
+        validate_encoder_settings("libx264", 52, "veryfast")
+    with pytest.raises(ValueError, match="preset"):
+        validate_encoder_settings("libx264", 23, "-y")
+
+
+@patch("lab_monitor.video_writers.OpenCVVideoWriter")
+def test_create_video_writer_unthreaded(mock_opencv):
+    """
+        Tests that the factory returns the bare backend writer when threading is disabled.
+    """
+    writer = create_video_writer("out.mp4", 30.0, (64, 48), backend="opencv", threaded=False)
+
+    assert writer is mock_opencv.return_value
+    mock_opencv.assert_called_once_with("out.mp4", 30.0, (64, 48))
+
+
+@patch("lab_monitor.video_writers.shutil.which", return_value=None)
+def test_segmented_writer_joins_segments(_mock_which, tmp_path):
+    """
+        Tests that segments are written next to the output, joined in order on release and then removed.
+    """
+    path = tmp_path / "out.mp4"
+    writer = SegmentedVideoWriter(str(path), lambda segment: OpenCVVideoWriter(segment, 10.0, (64, 48)))
+    for value in range(6):
+        writer.write(np.full((48, 64, 3), value * 40, dtype=np.uint8))
+        if value == 3:
+            writer.end_segment()
+    assert writer.segments == [str(tmp_path / "out.part00000.mp4")]
+    writer.release()
+
+    assert _count_frames(path) == 6
+    assert [p.name for p in tmp_path.iterdir()] == ["out.mp4"]
+
+
+def test_segmented_writer_continues_after_existing_segments(tmp_path):
+    """
+        Tests that a resumed writer starts the next segment after the ones it was given.
+    """
+    make_writer = MagicMock()
+    writer = SegmentedVideoWriter(str(tmp_path / "out.mp4"), make_writer, segments=["a.mp4", "b.mp4"])
+    writer.write(np.zeros((4, 4, 3), dtype=np.uint8))
+
+    make_writer.assert_called_once_with(str(tmp_path / "out.part00002.mp4"))
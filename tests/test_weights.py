@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+    test_weights.py:
+
+    Author: Matt Freeland
+
+    Email: matthew_freeland@yahoo.co.uk
+
+    Created: 19/10/2026
+
+    Version: 0.3
+
+    Description:
+        Tests for checkpoint conversion and memory-mapped weight loading.
+
+    Change History:
+        0.1: Created.
+        0.2: Added replaced checkpoint test.
+        0.3: Added concurrent conversion test.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import pytest
+import torch
+from lab_monitor.weights import (convert_checkpoint, converted_path, file_sha256, load_state_dict, source_changed,
+                                 verify_checkpoint)
+
+
+@pytest.fixture(name="checkpoint")
+def fixture_checkpoint(tmp_path):
+    """
+        A small checkpoint in GroundingDINO's layout, with a wrapped model and training state.
+    """
+    path = tmp_path / "dino.pth"
+    torch.save({"model": {"module.backbone.weight": torch.arange(12.0).reshape(3, 4).t(),
+                          "module.head.bias": torch.ones(2)},
+                "epoch": 3}, path)
+    return str(path)
+
+
+def test_converted_path():
+    """
+        Tests that converted files sit next to the checkpoint.
+    """
+    assert converted_path("weights/dino.pth") == "weights/dino.mmap.pt"
+    assert converted_path("weights/dino.mmap.pt") == "weights/dino.mmap.pt"
+
+
+def test_convert_and_load(checkpoint):
+    """
+        Tests that the converted weights load memory-mapped and match the original.
+    """
+    path = convert_checkpoint(checkpoint)
+    with open(f"{path}.json", "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["tensors"] == 2
+    assert manifest["sha256"] == file_sha256(path)
+    assert manifest["source_sha256"] == file_sha256(checkpoint)
+
+    state = load_state_dict(path)
+    assert set(state) == {"backbone.weight", "head.bias"}
+    assert torch.equal(state["backbone.weight"], torch.arange(12.0).reshape(3, 4).t())
+    assert torch.equal(state["head.bias"], torch.ones(2))
+
+
+def test_concurrent_conversions(checkpoint):
+    """
+        Tests that workers converting the same checkpoint at once produce a valid file and leave no temporary files.
+    """
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        paths = list(pool.map(lambda _: convert_checkpoint(checkpoint), range(4)))
+
+    assert len(set(paths)) == 1
+    assert verify_checkpoint(paths[0], full=True)
+    assert not [name for name in os.listdir(os.path.dirname(checkpoint)) if name.endswith(".tmp")]
+
+
+def test_verify_detects_changes(checkpoint):
+    """
+        Tests that a converted file that no longer matches its manifest is rejected.
+    """
+    path = convert_checkpoint(checkpoint)
+    verify_checkpoint(path, full=True)
+
+    with open(path, "r+b") as f:
+        f.seek(-1, 2)
+        last = f.read(1)
+        f.seek(-1, 2)
+        f.write(bytes([last[0] ^ 0xFF]))
+    verify_checkpoint(path)
+    with pytest.raises(ValueError, match="checksum"):
+        verify_checkpoint(path, full=True)
+
+    with open(path, "ab") as f:
+        f.write(b"extra")
+    with pytest.raises(ValueError, match="bytes"):
+        load_state_dict(path)
+
+
+def test_source_changed(checkpoint):
+    """
+        Tests that a checkpoint replaced after conversion is noticed, and one only touched is not.
+    """
+    path = convert_checkpoint(checkpoint)
+    assert not source_changed(path, checkpoint)
+    assert not source_changed(path, path)
+
+    stat = os.stat(checkpoint)
+    os.utime(checkpoint, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not source_changed(path, checkpoint)
+
+    torch.save({"model": {"module.head.bias": torch.zeros(2)}}, checkpoint)
+    assert source_changed(path, checkpoint)
+    convert_checkpoint(checkpoint)
+    assert not source_changed(path, checkpoint)
+    assert set(load_state_dict(path)) == {"head.bias"}